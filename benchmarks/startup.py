@@ -0,0 +1,205 @@
+"""
+Startup benchmark: time to first check for large test suites.
+
+Generates a suite of `--modules` test modules, with `--checks` testers in total, notifying
+`--integrations` integrations, and measures how long it takes to get it ready to run, phase
+by phase: integration_config.load_integrations (YAML parse and integration definitions),
+loader.load_test_files (discovery, compilation and import, which builds the integrations used)
+and registrar.register.
+
+The suite is loaded twice, each time in a fresh interpreter: first `cold`, right after being
+generated, then `warm`, with its bytecode and discovery caches in place.
+
+Prints, or writes to `--output`, a JSON document with the parameters and the results of both
+runs. With `--compare BASELINE`, also compare the results with a previous run, and exit with
+status 1 if any of them got worse by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.startup --modules 1000 --checks 50000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from benchmarks.throughput import find_regressions, get_peak_rss_kb
+
+""" { result_name: 1 if higher is better, -1 if lower is better } """
+COMPARED_RESULTS = {
+    'cold.total_seconds': -1,
+    'warm.total_seconds': -1,
+    'warm.phases.integration config': -1,
+    'warm.phases.test files': -1,
+    'warm.phases.registration': -1,
+    'warm.peak_rss_kb': -1
+}
+
+MODULES_PER_DIRECTORY = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how long large test suites take to start')
+    parser.add_argument('--modules', metavar='N', type=int, default=1000, help='test modules in the suite')
+    parser.add_argument('--checks', metavar='N', type=int, default=50000, help='testers in the whole suite')
+    parser.add_argument('--tests-per-module', metavar='N', type=int, default=10, help='setup functions per module')
+    parser.add_argument('--integrations', metavar='N', type=int, default=10, help='integrations in the configuration')
+    parser.add_argument('--keep', metavar='DIRECTORY', help='generate the suite in DIRECTORY, and keep it')
+    parser.add_argument('--output', metavar='PATH', help='write the results to PATH instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare the results with a previous run')
+    parser.add_argument('--tolerance', metavar='FRACTION', type=float, default=0.1,
+                        help='how much worse a result may get before it is a regression (default: 0.1)')
+    parser.add_argument('--measure', metavar='DIRECTORY', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+
+    directory = args.keep or tempfile.mkdtemp(prefix='pysellus-startup-')
+    try:
+        generate_suite(directory, args.modules, args.checks, args.tests_per_module, args.integrations)
+        results = {'cold': _measure_in_new_interpreter(directory), 'warm': _measure_in_new_interpreter(directory)}
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory)
+
+    report = {
+        'benchmark': 'startup',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'modules': args.modules,
+            'checks': args.checks,
+            'tests_per_module': args.tests_per_module,
+            'integrations': args.integrations
+        },
+        'results': results
+    }
+
+    rendered_report = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(rendered_report + '\n')
+    else:
+        print(rendered_report)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = find_regressions(
+                json.load(baseline_file)['results'], results, args.tolerance, COMPARED_RESULTS
+            )
+
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def generate_suite(directory, modules, checks, tests_per_module, integration_count):
+    """
+    generate_suite :: String -> Int -> Int -> Int -> Int -> IO
+
+    Write a test suite to the given directory: a configuration file declaring the given number
+    of integrations, alternating between terminal and Slack ones, and the given number of test
+    modules, in subdirectories of MODULES_PER_DIRECTORY modules each.
+
+    Every module checks a stream of its own with the given number of setup functions, each
+    notifying one of the integrations, so that the whole suite has (about) the given number of
+    testers.
+    """
+    with open(os.path.join(directory, '.ps_integrations.yml'), 'w') as configuration_file:
+        configuration_file.write('notify:\n')
+        for index in range(integration_count):
+            if index % 2 == 0:
+                configuration_file.write("    'alias-{}':\n        terminal:\n".format(index))
+            else:
+                configuration_file.write(
+                    "    'alias-{}':\n        slack:\n            url: 'http://127.0.0.1:9/'\n".format(index)
+                )
+
+    testers_per_test = max(1, checks // (modules * tests_per_module))
+    for module_index in range(modules):
+        module_directory = os.path.join(directory, 'group_{:03}'.format(module_index // MODULES_PER_DIRECTORY))
+        os.makedirs(module_directory, exist_ok=True)
+
+        with open(os.path.join(module_directory, 'checks_{:05}.py'.format(module_index)), 'w') as module_file:
+            module_file.write(_render_module(module_index, tests_per_module, testers_per_test, integration_count))
+
+
+def _render_module(module_index, tests_per_module, testers_per_test, integration_count):
+    lines = [
+        'from pysellus.integrations import on_failure',
+        'from pysellus.registrar import expect',
+        'from pysellus.streams import stream',
+        '',
+        'elements = stream(range(10))',
+        ''
+    ]
+
+    for tester_index in range(testers_per_test):
+        lines += [
+            '',
+            'def check_{}(element):'.format(tester_index),
+            '    return element >= {}'.format(-tester_index),
+            ''
+        ]
+
+    testers = ', '.join('check_{}'.format(tester_index) for tester_index in range(testers_per_test))
+    for test_index in range(tests_per_module):
+        lines += [
+            '',
+            "@on_failure('alias-{}')".format((module_index + test_index) % integration_count),
+            'def pscheck_{}_{}():'.format(module_index, test_index),
+            '    """module {}, test {}"""'.format(module_index, test_index),
+            '    expect(elements)({})'.format(testers),
+            ''
+        ]
+
+    return '\n'.join(lines)
+
+
+def _measure_in_new_interpreter(directory):
+    start = time.perf_counter()
+    output = subprocess.check_output([sys.executable, '-m', 'benchmarks.startup', '--measure', directory])
+
+    results = json.loads(output.decode('utf-8'))
+    results['process_seconds'] = time.perf_counter() - start
+
+    return results
+
+
+def measure(directory):
+    """
+    measure :: String -> { String: Any }
+
+    Load the suite in the given directory, the way `pysellus` does, and return how long every
+    phase took, along with the breakdowns recorded along the way (see startup#report)
+    """
+    from pysellus import integrations, integration_config, loader, registrar, startup
+
+    with startup.phase(startup.CONFIG_PHASE):
+        integration_config.load_integrations(directory)
+    with startup.phase(startup.TEST_FILES_PHASE):
+        setup_functions = loader.load_test_files(directory)
+    with startup.phase(startup.REGISTRATION_PHASE):
+        registrar.register(setup_functions)
+
+    return {
+        'total_seconds': sum(seconds for _, seconds in startup.phases),
+        'phases': dict(startup.phases),
+        'integration_config': integration_config.load_report,
+        'loader': loader.load_report,
+        'registration': registrar.registration_report,
+        'integration_build_seconds': sum(integrations.integration_build_seconds.values()),
+        'slowest_module_import_seconds': max(loader.module_import_seconds.values(), default=0.0),
+        'peak_rss_kb': get_peak_rss_kb()
+    }
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """
+    A local HTTP server standing in for a remote API, on a random port.
+
+    Every POST is answered with `{}`, and the arrival time of every request whose JSON body
+    the given predicate accepts is recorded in `arrivals`, as a time.perf_counter() value.
+
+    GETs are answered by the given `respond` function, which receives the request path (with
+    its query string) and headers, and returns a status, a dict of headers, and a body to send
+    as JSON (or None, for no body).
+
+    Connections are kept alive, like the ones of the real APIs.
+    """
+    def __init__(self, is_recorded=lambda body: True, respond=lambda path, headers: (404, {}, None)):
+        self.arrivals = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(self, is_recorded, respond))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='stub-server').start()
+
+    @property
+    def url(self):
+        """
+        url :: String
+
+        The base url of the server, ending in a slash
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _make_handler(stub_server, is_recorded, respond):
+    class _StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # the headers and the body are written separately, so Nagle's algorithm would hold
+        # the body back until the client acknowledges the headers
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            arrived_at = time.perf_counter()
+
+            with stub_server.lock:
+                stub_server.requests += 1
+                if is_recorded(json.loads(body.decode('utf-8') or 'null')):
+                    stub_server.arrivals.append(arrived_at)
+
+            self._send(200, {}, {})
+
+        def do_GET(self):
+            with stub_server.lock:
+                stub_server.requests += 1
+
+            self._send(*respond(self.path, self.headers))
+
+        def _send(self, status, headers, body):
+            response = b'' if body is None else json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, *args):
+            pass
+
+    return _StubHandler
@@ -0,0 +1,272 @@
+"""
+End-to-end throughput benchmark of the check pipeline.
+
+Builds `--streams` synthetic streams of `--elements` elements each, checked by `--testers`
+testers, whose failures are notified to `--integrations` Slack and Trello integrations talking
+to local stub servers. Everything runs through the real pipeline: integrations.on_failure,
+registrar.register, threader.build_threads and integrations._notify_integrations.
+
+Prints, or writes to `--output`, a JSON document with the parameters and the results:
+    - elements_per_second: elements checked per second, across all streams
+    - failures_per_second: notifications delivered to the stub servers per second
+    - alert_latency_ms: p50 and p99 time from the emission of a failing element until its
+      notification reaches a stub server. Notifications are matched to failing elements in
+      order, which is exact as long as every integration has a single delivery thread
+    - peak_rss_kb: peak resident memory of the process
+
+With `--compare BASELINE`, also compare the results with a previous run, and exit with
+status 1 if any of them got worse by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.throughput --elements 100000 --testers 4 --integrations 2
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+
+from rx import Observable
+
+from pysellus import integrations, registrar, threader
+from pysellus.stock_integrations.slack import SlackIntegration
+from pysellus.stock_integrations.trello import TrelloIntegration
+from benchmarks.stubs import StubServer
+
+""" { result_name: 1 if higher is better, -1 if lower is better } """
+COMPARED_RESULTS = {
+    'elements_per_second': 1,
+    'failures_per_second': 1,
+    'alert_latency_ms.p50': -1,
+    'alert_latency_ms.p99': -1,
+    'peak_rss_kb': -1
+}
+
+TRELLO_COMPLETION_TITLE = '--------| All tests run |--------'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the throughput of the check pipeline')
+    parser.add_argument('--elements', metavar='N', type=int, default=100000, help='elements per stream')
+    parser.add_argument('--streams', metavar='N', type=int, default=1, help='streams, one test each')
+    parser.add_argument('--testers', metavar='M', type=int, default=4, help='testers per stream')
+    parser.add_argument('--integrations', metavar='K', type=int, default=2,
+                        help='integrations notified by every test, alternating Slack and Trello')
+    parser.add_argument('--failure-rate', metavar='RATE', type=float, default=0.01,
+                        help='fraction of elements failing a check (default: 0.01)')
+    parser.add_argument('--dispatch-workers', metavar='N', type=int, default=1,
+                        help='delivery threads per integration; 0 delivers inline')
+    parser.add_argument('--queue-size', metavar='N', type=int, help='buffer elements between streams and testers')
+    parser.add_argument('--output', metavar='PATH', help='write the results to PATH instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare the results with a previous run')
+    parser.add_argument('--tolerance', metavar='FRACTION', type=float, default=0.1,
+                        help='how much worse a result may get before it is a regression (default: 0.1)')
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'throughput',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'elements': args.elements,
+            'streams': args.streams,
+            'testers': args.testers,
+            'integrations': args.integrations,
+            'failure_rate': args.failure_rate,
+            'dispatch_workers': args.dispatch_workers,
+            'queue_size': args.queue_size
+        },
+        'results': run(
+            args.elements,
+            args.streams,
+            args.testers,
+            args.integrations,
+            args.failure_rate,
+            args.dispatch_workers,
+            args.queue_size
+        )
+    }
+
+    rendered_report = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(rendered_report + '\n')
+    else:
+        print(rendered_report)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = find_regressions(json.load(baseline_file)['results'], report['results'], args.tolerance)
+
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def run(elements, streams, testers, integration_count, failure_rate, dispatch_workers=1, queue_size=None):
+    """
+    run :: Int -> Int -> Int -> Int -> Float -> Int -> Int | None -> { String: Any }
+
+    Run the benchmark once, with the given parameters, and return its results (see module docstring)
+    """
+    stub_servers = []
+    integration_aliases = []
+    for index in range(integration_count):
+        alias, stub_server = _define_integration(index)
+        integration_aliases.append(alias)
+        stub_servers.append(stub_server)
+
+    if dispatch_workers > 0:
+        integrations.enable_dispatcher(dispatch_workers)
+
+    failure_times = []
+    setup_functions = [
+        _make_setup_function(index, elements, testers, failure_rate, integration_aliases, failure_times)
+        for index in range(streams)
+    ]
+    stream_to_testers = registrar.register(setup_functions)
+
+    start = time.perf_counter()
+    threads = threader.build_threads(stream_to_testers, queue_size=queue_size)
+    threader.launch_threads(threads)
+    threader.join_threads(threads)
+    integrations.shutdown()
+    elapsed_seconds = time.perf_counter() - start
+
+    for stub_server in stub_servers:
+        stub_server.close()
+
+    failure_times.sort()
+    latencies = [
+        arrived_at - emitted_at
+        for stub_server in stub_servers
+        for emitted_at, arrived_at in zip(failure_times, sorted(stub_server.arrivals))
+    ]
+    notifications = sum(len(stub_server.arrivals) for stub_server in stub_servers)
+
+    return {
+        'seconds': elapsed_seconds,
+        'elements_per_second': elements * streams / elapsed_seconds,
+        'failures': len(failure_times),
+        'notifications': notifications,
+        'notifications_expected': len(failure_times) * integration_count,
+        'failures_per_second': notifications / elapsed_seconds,
+        'alert_latency_ms': {
+            'p50': _percentile_ms(latencies, 0.5),
+            'p99': _percentile_ms(latencies, 0.99)
+        },
+        'peak_rss_kb': get_peak_rss_kb()
+    }
+
+
+def _define_integration(index):
+    """
+    Define an integration alias notifying a new stub server, alternating between Slack and Trello
+    """
+    if index % 2 == 0:
+        stub_server = StubServer(lambda body: 'text' not in body)
+        alias = 'slack-{}'.format(index)
+        integrations.loaded_integrations.define(alias, lambda: SlackIntegration(url=stub_server.url))
+    else:
+        stub_server = StubServer(lambda body: body['name'] != TRELLO_COMPLETION_TITLE)
+        alias = 'trello-{}'.format(index)
+        integrations.loaded_integrations.define(alias, lambda: TrelloIntegration(
+            key='a-key',
+            token='a-token',
+            mode='list',
+            list='a-list',
+            base_url=stub_server.url + '1/'
+        ))
+
+    return alias, stub_server
+
+
+def _make_setup_function(index, elements, testers, failure_rate, integration_aliases, failure_times):
+    """
+    Build a setup function checking a stream of the given number of elements with the given
+    number of testers. The first tester fails on the given fraction of elements, and records
+    when each failing element was emitted in failure_times; the others always pass.
+    """
+    failure_period = round(1 / failure_rate) if failure_rate > 0 else 0
+
+    def emit_elements():
+        for number in range(elements):
+            yield {'number': number, 'emitted_at': time.perf_counter()}
+
+    def failing_tester(element):
+        if failure_period and element['number'] % failure_period == 0:
+            failure_times.append(element['emitted_at'])
+            return False
+        return True
+
+    def passing_tester(element):
+        return element['number'] >= 0
+
+    def setup_function():
+        registrar.expect(Observable.from_(emit_elements()))(
+            failing_tester,
+            *[passing_tester] * (testers - 1)
+        )
+
+    setup_function.__name__ = 'pscheck_throughput_{}'.format(index)
+    setup_function.__doc__ = 'throughput benchmark, stream {}'.format(index)
+
+    return integrations.on_failure(*integration_aliases)(setup_function)
+
+
+def _percentile_ms(seconds, fraction):
+    if not seconds:
+        return None
+
+    seconds = sorted(seconds)
+    return seconds[min(len(seconds) - 1, round(fraction * (len(seconds) - 1)))] * 1000
+
+
+def get_peak_rss_kb():
+    """
+    get_peak_rss_kb :: -> Int | None
+
+    Peak resident memory of this process so far, in kilobytes, or None where unknown
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+def find_regressions(baseline_results, results, tolerance, compared_results=COMPARED_RESULTS):
+    """
+    find_regressions :: { String: Any } -> { String: Any } -> Float -> { String: Int } -> [String]
+
+    Describe every compared result (see COMPARED_RESULTS) that got worse than its baseline
+    by more than the given fraction. Nested results are named with dots, like `a.b`.
+    """
+    regressions = []
+    for name, direction in sorted(compared_results.items()):
+        baseline, current = _get_result(baseline_results, name), _get_result(results, name)
+        if baseline is None or current is None:
+            continue
+
+        if direction > 0 and current < baseline * (1 - tolerance) or \
+                direction < 0 and current > baseline * (1 + tolerance):
+            regressions.append('{}: {:.3f} -> {:.3f}'.format(name, baseline, current))
+
+    return regressions
+
+
+def _get_result(results, name):
+    for key in name.split('.'):
+        if not isinstance(results, dict):
+            return None
+        results = results.get(key)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from rx import AnonymousObservable
+
+from pysellus import http_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 300.0
+DEFAULT_WORKERS = 4
+
+# statuses asking us to come back later, honouring their Retry-After header, see APIReader._handle
+_THROTTLING_STATUSES = (429, 503)
+
+
+class APIReader(AnonymousObservable):
+    """
+    An Observable polling one or more HTTP endpoints, and emitting the elements of every
+    new response they give.
+
+    Usage:
+    class Orders(APIReader):
+        urls = ['https://api.example.org/orders']
+        params = {'status': 'paid'}
+
+        def extract(self, body):
+            return body['orders']
+
+        def cursor(self, body):
+            return {'after': body['last_id']} if body['orders'] else None
+
+    orders = stream(Orders)  # or stream(APIReader(urls=[...], extract=..., cursor=...))
+
+    Settings are taken from the arguments given, or else from the class attributes:
+        - urls: the endpoints to poll, all of them with the same settings
+        - params, headers: sent along with every request
+        - extract: a function (or method) turning a decoded JSON response into an iterable of
+          elements. By default, lists are emitted element by element, and anything else as it is
+        - cursor: a function (or method) returning the query parameters to ask for the next
+          elements with, given a decoded JSON response, or None to keep asking with the same
+          ones. A cursor which moves after a response with elements is followed right away, so
+          that all pages are read as soon as they are available
+        - min_interval, max_interval: endpoints are polled every `min_interval` seconds while
+          they give new elements. Every poll without new elements doubles the interval of its
+          endpoint, up to `max_interval` seconds
+        - workers: how many requests are made at once, across all endpoints
+
+    Responses are remembered by their ETag and Last-Modified headers, and endpoints are asked
+    for something newer (If-None-Match, If-Modified-Since), so that unchanged responses are
+    neither downloaded nor emitted again. Requests go through the pooled session of http_pool,
+    so connections to the same host are kept open between polls.
+
+    Failed requests are logged and retried later, backing off like polls without new elements,
+    or for as long as told by servers answering 429 or 503 with a Retry-After header.
+
+    Polling never completes, unless the reader is stopped (see stop).
+    """
+    urls = ()
+    params = {}
+    headers = {}
+    min_interval = DEFAULT_MIN_INTERVAL
+    max_interval = DEFAULT_MAX_INTERVAL
+    workers = DEFAULT_WORKERS
+    session_name = 'api-reader'
+
+    def __init__(self, urls=None, params=None, headers=None, extract=None, cursor=None,
+                 min_interval=None, max_interval=None, workers=None):
+        settings = dict(
+            urls=urls, params=params, headers=headers, extract=extract, cursor=cursor,
+            min_interval=min_interval, max_interval=max_interval, workers=workers
+        )
+        for name, value in settings.items():
+            if value is not None:
+                setattr(self, name, value)
+
+        self._stopped = threading.Event()
+        super().__init__(self._poll)
+
+    def extract(self, body):
+        return body if isinstance(body, list) else [body]
+
+    def cursor(self, body):
+        return None
+
+    def stop(self):
+        """
+        stop :: -> IO
+
+        Stop polling once the requests being made are done, and complete.
+        Subscribing to the reader again afterwards starts polling over
+        """
+        self._stopped.set()
+        self._stopped = threading.Event()
+
+    def _poll(self, observer):
+        stopped = self._stopped
+        session = http_pool.get_session(self.session_name)
+        endpoints = [_Endpoint(url, dict(self.params), self.min_interval) for url in self.urls]
+        requests = {}
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix='api-reader') as executor:
+            while not (stopped.is_set() or observer.is_stopped):
+                now = time.monotonic()
+                waiting_endpoints = []
+                for endpoint in endpoints:
+                    if endpoint.polling:
+                        continue
+                    if endpoint.next_poll <= now:
+                        endpoint.polling = True
+                        requests[executor.submit(self._request, session, endpoint)] = endpoint
+                    else:
+                        waiting_endpoints.append(endpoint)
+
+                timeout = min((endpoint.next_poll - now for endpoint in waiting_endpoints), default=None)
+                if not requests:
+                    stopped.wait(timeout)
+                    continue
+
+                done, _ = wait(requests, timeout=timeout, return_when=FIRST_COMPLETED)
+                for request in done:
+                    endpoint = requests.pop(request)
+                    endpoint.polling = False
+                    self._handle(observer, endpoint, request)
+
+        observer.on_completed()
+
+    def _request(self, session, endpoint):
+        headers = dict(self.headers)
+        if endpoint.etag is not None:
+            headers['If-None-Match'] = endpoint.etag
+        if endpoint.last_modified is not None:
+            headers['If-Modified-Since'] = endpoint.last_modified
+
+        return session.get(endpoint.url, params=endpoint.params, headers=headers)
+
+    def _handle(self, observer, endpoint, request):
+        """
+        Emit the elements of a finished request, and schedule the next poll of its endpoint
+        """
+        try:
+            response = request.result()
+        except Exception:
+            logger.exception("Polling {} failed".format(endpoint.url))
+            self._back_off(endpoint)
+            return
+
+        if response.status_code == 304:
+            self._back_off(endpoint)
+            return
+
+        if response.status_code >= 400:
+            logger.warning("Polling {} failed with status {}".format(endpoint.url, response.status_code))
+            retry_after = response.headers.get('Retry-After', '')
+            if response.status_code in _THROTTLING_STATUSES and retry_after.isdigit():
+                self._back_off(endpoint, int(retry_after))
+            else:
+                self._back_off(endpoint)
+            return
+
+        try:
+            body = response.json()
+            elements = list(self.extract(body))
+            next_params = self.cursor(body)
+        except Exception:
+            logger.exception("Could not read the response of {}".format(endpoint.url))
+            self._back_off(endpoint)
+            return
+
+        for element in elements:
+            observer.on_next(element)
+
+        moved = next_params is not None and dict(self.params, **next_params) != endpoint.params
+        if moved:
+            # what we know about the last response belongs to the query we're moving away from
+            endpoint.move_to(dict(self.params, **next_params))
+        else:
+            endpoint.remember(response)
+
+        if not elements:
+            self._back_off(endpoint)
+        elif moved:
+            endpoint.schedule(0, self.min_interval)
+        else:
+            endpoint.schedule(self.min_interval, self.min_interval)
+
+    def _back_off(self, endpoint, delay=None):
+        interval = min(endpoint.interval * 2, self.max_interval)
+        endpoint.schedule(max(interval, delay or 0), interval)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, list(self.urls))
+
+
+class _Endpoint:
+    """
+    The polling state of an endpoint: the query to make next, what we know about the last
+    response to it, and when to poll it again
+    """
+    def __init__(self, url, params, interval):
+        self.url = url
+        self.params = params
+        self.etag = None
+        self.last_modified = None
+        self.interval = interval
+        self.next_poll = 0
+        self.polling = False
+
+    def remember(self, response):
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+
+    def move_to(self, params):
+        self.params = params
+        self.etag = None
+        self.last_modified = None
+
+    def schedule(self, delay, interval):
+        self.interval = interval
+        self.next_poll = time.monotonic() + delay
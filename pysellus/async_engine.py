@@ -0,0 +1,244 @@
+import asyncio
+import inspect
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from pysellus import integrations, schedulers
+
+logger = logging.getLogger(__name__)
+
+# how many rx Observables can be subscribed at once, see launch_tasks
+DEFAULT_SOURCE_WORKERS = 32
+
+# how many elements of an rx Observable can wait for its testers, see _observe_in_thread
+DEFAULT_QUEUE_SIZE = 64
+
+# the pool subscribing to rx Observables, and how far ahead of their testers they can get,
+# while tasks are running (see launch_tasks)
+source_executor = None
+source_queue_size = DEFAULT_QUEUE_SIZE
+
+# marks the end of a stream observed from a worker thread, see _observe_in_thread
+_COMPLETED = object()
+
+
+def blocking(tester):
+    """
+    blocking :: fn -> fn
+
+    Decorator that marks the given tester as blocking
+
+    Usage:
+    @blocking
+    def is_reachable(url):
+        return requests.head(url).ok
+
+    When running on the asyncio engine, blocking testers are offloaded to a thread pool
+    instead of being called on the event loop.
+
+    Returns the original function
+    """
+    tester.is_blocking = True
+    return tester
+
+
+def build_tasks(stream_to_testers):
+    """
+    build_tasks :: { stream: [fn] } -> [(-> Coroutine)]
+
+    Given a map of streams to testers, build a task for every stream, which consumes it and
+    gives every element to each of its testers.
+
+    Streams can be rx Observables, async iterables or `async def` generator functions.
+
+    See launch_tasks
+    """
+    return [
+        partial(_consume, stream, testers)
+        for stream, testers in stream_to_testers.items()
+    ]
+
+
+def launch_tasks(tasks, max_workers=None, source_workers=DEFAULT_SOURCE_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    launch_tasks :: [(-> Coroutine)] -> Int | None -> Int -> Int -> IO
+
+    Run all the given tasks on a single event loop, until all of them are done.
+
+    Testers marked with `blocking` are offloaded to a pool of at most `max_workers` threads.
+    rx Observables usually block the thread subscribing to them for as long as they run, so
+    they are subscribed from a separate pool of `source_workers` threads, and never-ending
+    Observables can't keep blocking testers waiting. Each Observable can get at most
+    `queue_size` elements ahead of its testers (see _observe_in_thread).
+
+    Observables beyond the first `source_workers` are only subscribed once an earlier one
+    completes, so `source_workers` should be at least the number of never-ending Observables.
+
+    A task failing is logged, and doesn't stop the others.
+
+    Notifications are delivered to integrations from the event loop, whichever thread the
+    tester sending them runs on (see integrations#deliver_on_loop).
+    """
+    global source_executor, source_queue_size
+
+    observables = sum(1 for task in tasks if not is_async_source(_get_stream(task)))
+    if observables > source_workers:
+        logger.warning(
+            "{} rx Observables share {} source workers: the last ones only start once earlier ones complete"
+            .format(observables, source_workers)
+        )
+
+    source_executor = ThreadPoolExecutor(source_workers, thread_name_prefix='observe')
+    source_queue_size = queue_size
+    try:
+        asyncio.run(_run_tasks(tasks, max_workers))
+    finally:
+        source_executor.shutdown(wait=False)
+        source_executor = None
+
+
+async def _run_tasks(tasks, max_workers):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers, thread_name_prefix='blocking-tester'))
+    integrations.deliver_on_loop(loop)
+    try:
+        results = await asyncio.gather(*(task() for task in tasks), return_exceptions=True)
+        # let the deliveries scheduled by the last elements run before the loop is closed
+        await asyncio.sleep(0)
+    finally:
+        integrations.deliver_on_loop(None)
+
+    for task, result in zip(tasks, results):
+        if isinstance(result, Exception):
+            logger.error("Stream {!r} failed".format(_get_stream(task)), exc_info=result)
+
+
+def _get_stream(task):
+    return task.args[0] if isinstance(task, partial) and task.args else task
+
+
+async def _consume(stream, testers):
+    async for element in iterate(stream):
+        for tester in testers:
+            await _call_tester(tester, element)
+
+
+async def _call_tester(tester, element):
+    if getattr(getattr(tester, 'tester', None), 'is_blocking', False):
+        await asyncio.get_running_loop().run_in_executor(None, tester, element)
+        return
+
+    result = tester(element)
+    if inspect.isawaitable(result):
+        await result
+
+
+def is_async_source(stream):
+    """
+    is_async_source :: Any -> Boolean
+
+    Whether the given stream is an async iterable, or an `async def` generator function
+    """
+    return hasattr(type(stream), '__aiter__') or inspect.isasyncgenfunction(stream)
+
+
+def iterate(stream):
+    """
+    iterate :: stream -> AsyncIterator
+
+    Given a stream, return an async iterator over its elements.
+
+    Async sources are iterated natively, while rx Observables are subscribed to
+    from a worker thread (see _observe_in_thread)
+    """
+    if inspect.isasyncgenfunction(stream):
+        return stream()
+
+    if hasattr(type(stream), '__aiter__'):
+        return stream
+
+    return _observe_in_thread(stream)
+
+
+async def _observe_in_thread(observable):
+    """
+    Subscribe to the given Observable from a thread of the source pool (see launch_tasks), and
+    yield its elements on the event loop as they arrive.
+
+    The subscribing thread waits whenever `source_queue_size` elements are already waiting for
+    the testers. Once its elements stop being consumed, the Observable gets a
+    StreamDetachedError on its next element, so that it can stop.
+
+    Errors raised by the Observable are re-raised on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    free_slots = threading.Semaphore(source_queue_size)
+    detaching = threading.Lock()
+    detached = []
+
+    def put(item):
+        free_slots.acquire()
+        with detaching:
+            if detached:
+                # wake up the next waiting put, if any
+                free_slots.release()
+                return False
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+            return True
+
+    def put_element(element):
+        if not put(element):
+            raise StreamDetachedError(observable)
+
+    def subscribe():
+        schedulers.own_trampoline()
+        try:
+            observable.subscribe(put_element, lambda error: put(_ObservableError(error)), lambda: put(_COMPLETED))
+        except StreamDetachedError:
+            pass
+        except Exception as error:
+            put(_ObservableError(error))
+
+    loop.run_in_executor(source_executor, subscribe)
+
+    try:
+        while True:
+            item = await queue.get()
+            free_slots.release()
+            if item is _COMPLETED:
+                break
+            if isinstance(item, _ObservableError):
+                raise item.error
+            yield item
+    finally:
+        with detaching:
+            detached.append(True)
+        free_slots.release()
+
+
+async def drain_async_source(stream, observer):
+    """
+    drain_async_source :: AsyncIterable -> rx.Observer -> Coroutine
+
+    Push every element of the given async source to the given observer, then complete it.
+
+    Used to run async sources on the thread engine (see threader#_perform_subscribe)
+    """
+    async for element in iterate(stream):
+        observer.on_next(element)
+    observer.on_completed()
+
+
+class StreamDetachedError(Exception):
+    """
+    Raised to an rx Observable, observed by the asyncio engine, which emits elements after its
+    testers stopped consuming them
+    """
+
+
+class _ObservableError:
+    def __init__(self, error):
+        self.error = error
@@ -0,0 +1,217 @@
+import threading
+
+from rx import AnonymousObservable
+from rx.disposables import CompositeDisposable, Disposable
+
+DEFAULT_BATCH_SIZE = 1024
+
+# seconds a batch waits for more elements after its first one, before being tested anyway
+DEFAULT_BATCH_WAIT = 1.0
+
+# numpy is only imported once a batch tester runs, see _get_numpy
+_numpy = None
+
+
+def vectorized(tester=None, batch_size=DEFAULT_BATCH_SIZE, batch_wait=DEFAULT_BATCH_WAIT):
+    """
+    vectorized :: (Chunk -> Mask) -> (Chunk -> Mask)
+
+    Decorator that marks the given tester as a batch tester
+
+    Usage:
+    @vectorized
+    def is_positive(numbers):
+        return numbers > 0
+
+    @vectorized(batch_size=256)
+    def is_positive(numbers):
+        ...
+
+    A batch tester receives a chunk of elements (see make_chunk) instead of a single element,
+    and returns a boolean mask with one entry per element in the chunk. Chunks are tested
+    once full, or `batch_wait` seconds after their first element (see buffer_with_wait).
+
+    Returns the original function
+    """
+    def decorator_of_tester(tester):
+        tester.vectorized_batch_size = batch_size
+        tester.vectorized_batch_wait = batch_wait
+        return tester
+
+    if tester is None:
+        return decorator_of_tester
+
+    return decorator_of_tester(tester)
+
+
+def batch_size_of(tester):
+    """
+    batch_size_of :: fn -> Int | None
+
+    Return the batch size the given tester was marked with, or None if it is not a batch tester
+    """
+    return getattr(tester, 'vectorized_batch_size', None)
+
+
+def batch_wait_of(tester):
+    """
+    batch_wait_of :: fn -> Float
+
+    Return the batch wait the given tester was marked with, or the default one
+    """
+    return getattr(tester, 'vectorized_batch_wait', DEFAULT_BATCH_WAIT)
+
+
+def buffer_with_wait(observable, batch_size, batch_wait):
+    """
+    buffer_with_wait :: rx.Observable -> Int -> Float | None -> rx.Observable
+
+    Given an Observable, return an Observable emitting lists of its elements: a list is
+    emitted once it holds `batch_size` elements, or `batch_wait` seconds after its first
+    element, whichever comes first, so that the elements of a slow stream are tested without
+    waiting for the batch to fill up. What's left is emitted when the Observable completes.
+
+    Without a wait, lists are only emitted once full, or on completion.
+    """
+    def subscribe(observer):
+        batcher = _Batcher(observer, batch_size, batch_wait)
+        subscription = observable.subscribe(batcher.on_next, batcher.on_error, batcher.on_completed)
+        return CompositeDisposable(subscription, Disposable(batcher.dispose))
+
+    return AnonymousObservable(subscribe)
+
+
+class _Batcher:
+    """
+    The batch being filled for a subscription to buffer_with_wait, and the timer emitting it.
+
+    Batches are emitted with the lock held, so that the timer thread and the thread of the
+    stream never emit at once.
+    """
+    def __init__(self, observer, batch_size, batch_wait):
+        self._observer = observer
+        self._batch_size = batch_size
+        self._batch_wait = batch_wait
+
+        # reentrant, as completing the observer disposes the subscription
+        self._lock = threading.RLock()
+        self._batch = []
+        self._timer = None
+
+    def on_next(self, element):
+        with self._lock:
+            self._batch.append(element)
+            if len(self._batch) >= self._batch_size:
+                self._emit()
+            elif len(self._batch) == 1 and self._batch_wait is not None:
+                self._timer = threading.Timer(self._batch_wait, self._on_timeout, args=(self._batch,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def on_error(self, error):
+        with self._lock:
+            self._cancel_timer()
+            self._observer.on_error(error)
+
+    def on_completed(self):
+        with self._lock:
+            if self._batch:
+                self._emit()
+            self._observer.on_completed()
+
+    def dispose(self):
+        with self._lock:
+            self._cancel_timer()
+
+    def _on_timeout(self, batch):
+        with self._lock:
+            # the batch may have been emitted in the meantime, once full
+            if batch is self._batch:
+                self._emit()
+
+    def _emit(self):
+        self._cancel_timer()
+        batch, self._batch = self._batch, []
+        self._observer.on_next(batch)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+def make_chunk(elements):
+    """
+    make_chunk :: [Any] -> numpy.ndarray | {String: numpy.ndarray} | [Any]
+
+    Given a list of elements, build the chunk a batch tester receives.
+
+    If all elements are dicts, return a dict mapping every key of the first element
+    to a NumPy array with that column. Otherwise, return a NumPy array of the elements.
+
+    If NumPy is not installed, return the list of elements as is.
+    """
+    numpy = _get_numpy()
+    if numpy is None:
+        return elements
+
+    if elements and all(isinstance(element, dict) for element in elements):
+        return {
+            key: numpy.asarray([element.get(key) for element in elements])
+            for key in elements[0]
+        }
+
+    return numpy.asarray(elements)
+
+
+def failing_positions(mask, chunk_length):
+    """
+    failing_positions :: Mask -> Int -> [Int]
+
+    Given the mask returned by a batch tester and the length of the chunk it was given,
+    return the positions of the elements that failed the test.
+
+    A scalar mask applies to the whole chunk.
+
+    Raises a ValueError if the mask length doesn't match the chunk length.
+    """
+    numpy = _get_numpy()
+    if numpy is not None:
+        mask = numpy.asarray(mask, dtype=bool)
+        if mask.ndim == 0:
+            mask = numpy.broadcast_to(mask, (chunk_length,))
+        _check_mask_length(len(mask), chunk_length)
+        return numpy.flatnonzero(~mask).tolist()
+
+    if isinstance(mask, bool):
+        mask = [mask] * chunk_length
+    mask = list(mask)
+    _check_mask_length(len(mask), chunk_length)
+    return [position for position, passed in enumerate(mask) if not passed]
+
+
+def _get_numpy():
+    """
+    _get_numpy :: -> python.Module | None
+
+    Import NumPy the first time it's needed, so that runs without batch testers don't pay for it.
+    Return None if it's not installed.
+    """
+    global _numpy
+
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+
+    return _numpy or None
+
+
+def _check_mask_length(mask_length, chunk_length):
+    if mask_length != chunk_length:
+        raise ValueError(
+            "Batch tester returned a mask of length {} for a chunk of length {}"
+            .format(mask_length, chunk_length)
+        )
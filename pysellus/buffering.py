@@ -0,0 +1,142 @@
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('block', 'drop-oldest', 'drop-newest', 'sample')
+
+# marks the end of the buffered stream, see BoundedBuffer#on_completed
+_COMPLETED = object()
+
+
+class BoundedBuffer:
+    """
+    A bounded queue sitting between a stream and its testers.
+
+    It is subscribed to the stream as an observer (see threader#build_threads), and its
+    elements are handed over to the testers from another thread (see drain_into).
+
+    When the buffer is full, new elements are handled according to the given policy:
+        - block: wait until there is room for the element, slowing down the stream
+        - drop-oldest: drop the oldest buffered element to make room for the new one
+        - drop-newest: drop the new element
+        - sample: keep one out of every `sample_every` new elements, dropping the oldest
+          buffered element to make room for it, and drop the rest
+
+    The current depth of the buffer, its maximum depth and the number of dropped elements
+    are available through the `stats` method.
+    """
+    def __init__(self, maxsize, policy='block', sample_every=10, name=None):
+        if policy not in POLICIES:
+            raise ValueError(
+                "Unknown queue policy '{}', must be one of: {}".format(policy, ', '.join(POLICIES))
+            )
+        if maxsize < 1:
+            raise ValueError("Queue size must be positive, got {}".format(maxsize))
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+
+        self._sample_every = sample_every
+        self._elements = deque()
+        self._condition = threading.Condition()
+        self._overflows = 0
+
+        self.dropped = 0
+        self.high_water = 0
+
+    @property
+    def depth(self):
+        return len(self._elements)
+
+    def stats(self):
+        """
+        stats :: -> { depth: Int, high_water: Int, dropped: Int }
+        """
+        with self._condition:
+            return {
+                'depth': self.depth,
+                'high_water': self.high_water,
+                'dropped': self.dropped
+            }
+
+    def on_next(self, element):
+        with self._condition:
+            if len(self._elements) >= self.maxsize and not self._make_room():
+                return
+
+            self._put(element)
+            self.high_water = max(self.high_water, len(self._elements))
+
+    def on_error(self, error):
+        with self._condition:
+            self._put(_BufferedError(error))
+
+    def on_completed(self):
+        with self._condition:
+            self._put(_COMPLETED)
+
+    def _make_room(self):
+        """
+        Apply the overflow policy. Return whether the new element should be buffered.
+        """
+        if self.policy == 'block':
+            while len(self._elements) >= self.maxsize:
+                self._condition.wait()
+            return True
+
+        if self.policy == 'drop-newest':
+            self._drop()
+            return False
+
+        if self.policy == 'sample':
+            self._overflows += 1
+            if self._overflows % self._sample_every:
+                self._drop()
+                return False
+
+        self._elements.popleft()
+        self._drop()
+        return True
+
+    def _drop(self):
+        if not self.dropped:
+            logger.warning(
+                "Queue for stream {} is full, dropping elements ({} policy)"
+                .format(self.name, self.policy)
+            )
+        self.dropped += 1
+
+    def _put(self, item):
+        self._elements.append(item)
+        self._condition.notify_all()
+
+    def drain_into(self, observer):
+        """
+        drain_into :: rx.Observer -> IO
+
+        Hand every buffered element over to the given observer, waiting for new ones,
+        until the stream completes or errors.
+        """
+        while True:
+            with self._condition:
+                while not self._elements:
+                    self._condition.wait()
+                item = self._elements.popleft()
+                self._condition.notify_all()
+
+            if item is _COMPLETED:
+                observer.on_completed()
+                return
+            if isinstance(item, _BufferedError):
+                observer.on_error(item.error)
+                return
+
+            observer.on_next(item)
+
+
+class _BufferedError:
+    def __init__(self, error):
+        self.error = error
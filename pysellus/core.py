@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
+import sys
+import logging
 import argparse
 
-from pysellus import loader, registrar, threader, integration_config
+from pysellus import loader, registrar, threader, watcher, async_engine, process_pool, buffering, integrations, \
+    integration_config, metrics, profiling, startup
 
 
 def main():
@@ -18,16 +21,136 @@ def main():
         '-d', '--directory', metavar='test_directory', nargs=1, help='directory of test files'
     )
 
+    parser.add_argument(
+        '-e', '--engine', choices=['thread', 'asyncio'], default='thread',
+        help='run every stream on its own thread (default), or all of them on a single asyncio event loop'
+    )
+
+    parser.add_argument(
+        '--source-workers', metavar='N', type=int, default=async_engine.DEFAULT_SOURCE_WORKERS,
+        help='subscribe to up to N rx Observables at once (asyncio engine only, default: {})'.format(
+            async_engine.DEFAULT_SOURCE_WORKERS
+        )
+    )
+
+    parser.add_argument(
+        '-w', '--workers', metavar='N', type=int, default=1,
+        help='split the streams across N worker processes, each running the thread engine'
+    )
+
+    parser.add_argument(
+        '-q', '--queue-size', metavar='N', type=int,
+        help='buffer up to N elements between each stream and its testers (thread engine only)'
+    )
+
+    parser.add_argument(
+        '--queue-policy', choices=buffering.POLICIES, default='block',
+        help='what to do with new elements when a stream queue is full (default: block)'
+    )
+
+    parser.add_argument(
+        '--dispatch-workers', metavar='N', type=int, default=0,
+        help='deliver notifications from N background threads per integration (default: 0, deliver them inline)'
+    )
+
+    parser.add_argument(
+        '--watch', action='store_true',
+        help='reload test files when they change, without restarting unaffected streams (thread engine only)'
+    )
+
+    parser.add_argument(
+        '--watch-interval', metavar='SECONDS', type=float, default=1.0,
+        help='how often to check test files for changes in watch mode (default: 1)'
+    )
+
+    parser.add_argument(
+        '--metrics-port', metavar='PORT', type=int,
+        help='serve metrics in the Prometheus text format at http://127.0.0.1:PORT/metrics'
+    )
+
+    parser.add_argument(
+        '--metrics-log-interval', metavar='SECONDS', type=float,
+        help='log a summary of the metrics every SECONDS seconds'
+    )
+
+    parser.add_argument(
+        '--profile', metavar='PATH', nargs='?', const='pysellus.prof',
+        help='profile every stream and dispatcher thread, and write the merged pstats profile to PATH '
+             '(default: pysellus.prof), and a per test, stream and integration report to PATH.txt, '
+             'on exit and on SIGUSR1 (thread engine only)'
+    )
+
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help='print how long every startup phase, integration and test module import took'
+    )
+
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='log progress and timing information'
+    )
+
     args = parser.parse_args()
+
+    if args.watch and (args.workers > 1 or args.engine != 'thread'):
+        parser.error('--watch only works with the thread engine and a single worker')
+    if args.profile and (args.workers > 1 or args.engine != 'thread'):
+        parser.error('--profile only works with the thread engine and a single worker')
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    if args.metrics_port is not None or args.metrics_log_interval is not None:
+        metrics.enable()
+    if args.metrics_port is not None:
+        metrics.start_http_server(args.metrics_port)
+    if args.metrics_log_interval is not None:
+        logging.basicConfig()
+        metrics.logger.setLevel(logging.INFO)
+        metrics.start_log_dump(args.metrics_log_interval)
+
+    if args.profile:
+        profiling.enable(args.profile)
+
     user_input = args.directory[0] if args.directory else args.file[0]
 
-    integration_config.load_integrations(user_input)
+    with startup.phase(startup.CONFIG_PHASE):
+        integration_config.load_integrations(user_input)
+    if args.dispatch_workers > 0:
+        integrations.enable_dispatcher(args.dispatch_workers)
+
+    with startup.phase(startup.TEST_FILES_PHASE):
+        setup_functions = loader.load_test_files(user_input)
+    with startup.phase(startup.REGISTRATION_PHASE):
+        stream_to_testers = registrar.register(setup_functions)
+
+    if args.profile_startup:
+        print(startup.report(), file=sys.stderr)
 
-    threader.launch_threads(
-        threader.build_threads(
-            registrar.register(loader.load_test_files(user_input))
+    if args.workers > 1:
+        process_pool.launch_workers(*process_pool.build_workers(stream_to_testers, args.workers))
+    elif args.engine == 'asyncio':
+        async_engine.launch_tasks(async_engine.build_tasks(stream_to_testers), source_workers=args.source_workers)
+    else:
+        threads = threader.build_threads(
+            stream_to_testers,
+            queue_size=args.queue_size,
+            queue_policy=args.queue_policy
         )
-    )
+        threader.launch_threads(threads)
+
+        if args.watch:
+            test_watcher = watcher.Watcher(
+                user_input,
+                args.watch_interval,
+                queue_size=args.queue_size,
+                queue_policy=args.queue_policy
+            )
+            test_watcher.run()
+            threads += test_watcher.threads
+
+        threader.join_threads(threads)
+
+    integrations.shutdown()
 
 
 if __name__ == '__main__':
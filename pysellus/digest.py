@@ -0,0 +1,159 @@
+import time
+import threading
+
+from pysellus.payload import FailurePayload
+
+
+class Digest:
+    """
+    Collects the failures notified to an integration, per test, and sends the integration one
+    summary message per test and window instead of one message per failure.
+
+    A window closes after `window` seconds, or after `count` failures, whichever comes first
+    (at least one of them must be given). Its summary is a payload whose element contains:
+        - count: the number of failures in the window
+        - first_seen, last_seen: the timestamps of the first and last failures
+        - samples: the elements of (at most) the first `samples` failures
+
+    Failures of sampled testers (see sampling#Sampler) are counted apart from the others: a
+    failure sampled at a different rate from the failures in the open window closes it, and
+    opens a new one, so that every summary carries the sampling rate of all its failures.
+
+    Errors raised by testers are not aggregated, and are passed through as they come.
+    """
+    def __init__(self, integration, window=None, count=None, samples=3, clock=time.time):
+        if window is None and count is None:
+            raise TypeError("A digest needs a 'window' (in seconds) and/or a 'count'")
+
+        self._integration = integration
+        self._window = window
+        self._count = count
+        self._samples = samples
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        # test function -> _DigestWindow
+        self._open_windows = {}
+
+    def on_next(self, payload):
+        now = self._clock()
+
+        summaries = []
+
+        with self._lock:
+            test = _get_test(payload)
+            sampling_rate = payload.get('sampling_rate')
+            if test in self._open_windows and self._open_windows[test].sampling_rate != sampling_rate:
+                summaries.append(self._close(test))
+
+            if test not in self._open_windows:
+                digest_window = _DigestWindow(payload, now, sampling_rate)
+                self._open_windows[test] = digest_window
+                digest_window.timer = self._start_timer(test, digest_window)
+
+            digest_window = self._open_windows[test]
+            digest_window.add(payload, now, self._samples)
+
+            if self._count is not None and digest_window.count >= self._count:
+                summaries.append(self._close(test))
+
+        for summary in summaries:
+            self._integration.on_next(summary)
+
+    def on_error(self, payload):
+        self._integration.on_error(payload)
+
+    def on_completed(self):
+        self.flush()
+        self._integration.on_completed()
+
+    def flush(self, test=None):
+        """
+        flush :: String | None -> IO
+
+        Close the window of the given test function (or every open window), and send its summary.
+        """
+        with self._lock:
+            tests = [test] if test is not None else list(self._open_windows)
+            summaries = [self._close(test_) for test_ in tests if test_ in self._open_windows]
+
+        for summary in summaries:
+            self._integration.on_next(summary)
+
+    def _start_timer(self, test, digest_window):
+        if self._window is None:
+            return None
+
+        timer = threading.Timer(self._window, self._expire, args=(test, digest_window))
+        timer.daemon = True
+        timer.start()
+
+        return timer
+
+    def _expire(self, test, digest_window):
+        """
+        Close the given window once its time is up, unless it was closed already: the timer may
+        have fired while the window was being closed, and another one opened for the same test.
+        """
+        with self._lock:
+            if self._open_windows.get(test) is not digest_window:
+                return
+            summary = self._close(test)
+
+        self._integration.on_next(summary)
+
+    def _close(self, test):
+        digest_window = self._open_windows.pop(test)
+        if digest_window.timer is not None:
+            digest_window.timer.cancel()
+
+        return digest_window.summary()
+
+
+def _get_test(payload):
+    """
+    Windows are kept per test function, as several tests may share a description. Payloads
+    built elsewhere may only carry the description.
+    """
+    return payload.get('test_function', payload['test_name'])
+
+
+class _DigestWindow:
+    def __init__(self, payload, first_seen, sampling_rate):
+        self.test_name = payload['test_name']
+        self.test_function = payload.get('test_function')
+        self.first_seen = first_seen
+        self.last_seen = first_seen
+        self.sampling_rate = sampling_rate
+        self.timer = None
+
+        self.count = 0
+        self.testers = []
+        self.samples = []
+
+    def add(self, payload, now, max_samples):
+        self.count += 1
+        self.last_seen = now
+
+        if payload['expect_function'] not in self.testers:
+            self.testers.append(payload['expect_function'])
+        if len(self.samples) < max_samples:
+            self.samples.append(payload['element'])
+
+    def summary(self):
+        summary = FailurePayload(
+            self.test_name,
+            ', '.join(self.testers),
+            {
+                'count': self.count,
+                'first_seen': self.first_seen,
+                'last_seen': self.last_seen,
+                'samples': self.samples
+            }
+        )
+        if self.test_function is not None:
+            summary.test_function = self.test_function
+        if self.sampling_rate is not None:
+            summary.sampling_rate = self.sampling_rate
+
+        return summary
@@ -0,0 +1,134 @@
+import time
+import queue
+import logging
+import threading
+
+from pysellus import profiling
+
+logger = logging.getLogger(__name__)
+
+# marks the end of a channel's queue for one of its workers, see _Channel#close
+_CLOSED = object()
+
+
+class Dispatcher:
+    """
+    Delivers notifications to integrations from background worker threads, so that the
+    stream threads finding failures never block on a slow integration.
+
+    Every integration gets its own channel (see channel_for), with its own queue and workers.
+    Queue depth and delivery latency for each channel are available through `stats`.
+    """
+    def __init__(self, workers_per_integration=1):
+        self._workers_per_integration = workers_per_integration
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def channel_for(self, integration_name, subject):
+        """
+        channel_for :: String -> rx.Subject -> _Channel
+
+        Return the channel delivering to the given integration subject, creating and starting
+        it if needed. Channels expose the same on_next/on_error/on_completed interface as the
+        subject itself.
+        """
+        with self._lock:
+            if integration_name not in self._channels:
+                self._channels[integration_name] = _Channel(
+                    integration_name,
+                    subject,
+                    self._workers_per_integration
+                )
+
+            return self._channels[integration_name]
+
+    def stats(self):
+        """
+        stats :: -> { String: { depth: Int, delivered: Int, mean_latency: Float, max_latency: Float } }
+        """
+        return {name: channel.stats() for name, channel in self._channels.items()}
+
+    def shutdown(self):
+        """
+        shutdown :: -> IO
+
+        Wait for every channel to deliver all its queued notifications, then complete
+        their subjects.
+        """
+        for channel in self._channels.values():
+            channel.close()
+
+
+class _Channel:
+    def __init__(self, name, subject, workers):
+        self.name = name
+        self._subject = subject
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self.delivered = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self._workers = [
+            threading.Thread(
+                target=profiling.profiled(self._deliver, 'dispatch-{}-{}'.format(name, index)),
+                daemon=True,
+                name='dispatch-{}-{}'.format(name, index)
+            )
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def on_next(self, payload):
+        self._queue.put((self._subject.on_next, payload, time.perf_counter()))
+
+    def on_error(self, payload):
+        self._queue.put((self._subject.on_error, payload, time.perf_counter()))
+
+    def on_completed(self):
+        self.close()
+
+    def close(self):
+        """
+        Let every worker drain the queue, then complete the subject, once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        for _ in self._workers:
+            self._queue.put(_CLOSED)
+        for worker in self._workers:
+            worker.join()
+
+        self._subject.on_completed()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'depth': self._queue.qsize(),
+                'delivered': self.delivered,
+                'mean_latency': self.total_latency / self.delivered if self.delivered else 0.0,
+                'max_latency': self.max_latency
+            }
+
+    def _deliver(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSED:
+                return
+
+            notify, payload, enqueued_at = item
+            try:
+                notify(payload)
+            except Exception:
+                logger.exception("Integration {} failed to deliver a notification".format(self.name))
+
+            latency = time.perf_counter() - enqueued_at
+            with self._stats_lock:
+                self.delivered += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
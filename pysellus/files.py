@@ -0,0 +1,349 @@
+import os
+import json
+import mmap
+import threading
+from functools import partial
+from itertools import chain
+
+from rx import AnonymousObservable
+
+# lines are split out of blocks of about this many bytes of the mapping, see split_blocks
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# how long followed files wait for new lines once they have read everything, see follow
+DEFAULT_POLL_INTERVAL = 0.25
+
+# the same file and settings always get the same source, see mapped_file
+""" { (String, Boolean): MappedFile } """
+_mapped_files = {}
+
+# same for followed files, see follow
+""" { (String, Boolean, String | None, Boolean, Float): FollowedFile } """
+_followed_files = {}
+
+
+def mapped_file(path, jsonl=False):
+    """
+    mapped_file :: String -> Boolean -> MappedFile
+
+    Get a source emitting the lines of the file at the given path, read through a memory map
+    (see MappedFile), to be turned into a stream:
+
+        logs = stream(mapped_file('/var/log/app.log'))
+
+    If `jsonl` is set, every line is a JSON document, only parsed when a tester looks into it
+    (see JSONLine).
+
+    The same path and settings always give the same source, so that streams built from it in
+    several test files share a single pass over the file (see streams#stream).
+    """
+    key = (os.path.abspath(path), jsonl)
+    if key not in _mapped_files:
+        _mapped_files[key] = MappedFile(*key)
+
+    return _mapped_files[key]
+
+
+class MappedFile(AnonymousObservable):
+    """
+    An Observable emitting the lines of a file, which maps the file in memory instead of
+    reading it.
+
+    Lines are emitted as `bytes`, without their line ending, and are never decoded: testers
+    can look for things in them as they are (`line.startswith(b'ERROR')`), and only pay for
+    decoding the lines they need as text (`line.decode()`).
+
+    Splitting is done in C, a block of the mapping at a time (see split_blocks), and lines are
+    emitted in a tight loop, instead of being scheduled one at a time like the elements of
+    other iterables (see streams#CanonicalStream.rebase). This means the whole file is emitted
+    as soon as the stream is subscribed: zipping it with another stream buffers it.
+
+    Every subscription (or iteration) maps the file again, so that it reads the file as it is
+    by then.
+    """
+    def __init__(self, path, jsonl=False):
+        self.path = path
+        self.jsonl = jsonl
+        super().__init__(self._emit_lines)
+
+    def __iter__(self):
+        return chain.from_iterable(self._blocks())
+
+    def _emit_lines(self, observer):
+        blocks = self._blocks()
+        try:
+            for lines in blocks:
+                if observer.is_stopped:
+                    return
+                for line in lines:
+                    observer.on_next(line)
+        finally:
+            blocks.close()
+
+        observer.on_completed()
+
+    def _blocks(self):
+        buffer = _map(self.path)
+        if buffer is None:
+            return
+
+        try:
+            for lines in split_blocks(buffer):
+                yield list(map(JSONLine, lines)) if self.jsonl else lines
+        finally:
+            buffer.close()
+
+    def __repr__(self):
+        return 'mapped_file({!r})'.format(self.path)
+
+
+def follow(path, jsonl=False, offset_path=None, from_start=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    follow :: String -> Boolean -> String | None -> Boolean -> Float -> FollowedFile
+
+    Get a source emitting the lines appended to the file at the given path, like `tail -F`
+    (see FollowedFile), to be turned into a stream, or given to `expect` as it is:
+
+        logs = stream(follow('/var/log/app.log', offset_path='/var/lib/pysellus/app.offset'))
+
+    If `jsonl` is set, every line is a JSON document, only parsed when a tester looks into it
+    (see JSONLine).
+
+    The same path and settings always give the same source, so that the file is followed once
+    for all the streams built from it (see streams#stream).
+    """
+    key = (os.path.abspath(path), jsonl, offset_path, from_start, poll_interval)
+    if key not in _followed_files:
+        _followed_files[key] = FollowedFile(*key)
+
+    return _followed_files[key]
+
+
+class FollowedFile(AnonymousObservable):
+    """
+    An Observable emitting the lines appended to a file, as they are written, which keeps
+    following the file when it's rotated or truncated.
+
+    The file is read in blocks of up to BLOCK_SIZE bytes, and every complete line in a block
+    is emitted at once, so that the thread following the file only wakes up once per block,
+    not once per line. Once everything has been read, the file is checked for new lines every
+    `poll_interval` seconds. Lines are emitted as `bytes`, like in MappedFile.
+
+    When the file is replaced by a new one (rotated), the rest of the old one is emitted, and
+    the new one is followed from its beginning. When it's truncated, it's followed from its
+    beginning again.
+
+    The file is followed from its end, unless `from_start` is set, or an offset file is given:
+    then, the position after the last line emitted is saved into the offset file after every
+    block, and, when following the same file again, it's resumed from there.
+
+    Following never completes, unless the source is stopped (see stop).
+    """
+    def __init__(self, path, jsonl=False, offset_path=None, from_start=False, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.path = path
+        self.jsonl = jsonl
+        self.offset_path = offset_path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        super().__init__(self._follow)
+
+    def stop(self):
+        """
+        stop :: -> IO
+
+        Stop following the file, and complete.
+        Subscribing to the source again afterwards starts following it over
+        """
+        self._stopped.set()
+        self._stopped = threading.Event()
+
+    def _follow(self, observer):
+        stopped = self._stopped
+        file = None
+        pending = b''
+        resuming = True
+        try:
+            while not (stopped.is_set() or observer.is_stopped):
+                if file is None:
+                    file = self._open(resuming)
+                    # files showing up later are followed from their beginning
+                    resuming = False
+                    if file is None:
+                        stopped.wait(self.poll_interval)
+                        continue
+
+                block = file.read(BLOCK_SIZE)
+                if block:
+                    pending = self._emit_lines(observer, pending + block)
+                    self._save_offset(file, file.tell() - len(pending))
+                elif file.tell() > os.fstat(file.fileno()).st_size:
+                    # truncated
+                    file.seek(0)
+                    pending = b''
+                elif self._is_rotated(file):
+                    # lines may have been appended to the old file since it was last read
+                    for block in iter(partial(file.read, BLOCK_SIZE), b''):
+                        pending = self._emit_lines(observer, pending + block)
+                    if pending:
+                        self._emit_lines(observer, pending + b'\n')
+                    pending = b''
+                    file.close()
+                    file = None
+                else:
+                    stopped.wait(self.poll_interval)
+        finally:
+            if file is not None:
+                file.close()
+
+        observer.on_completed()
+
+    def _emit_lines(self, observer, data):
+        """
+        Emit every complete line in the given data, and return what's left
+        """
+        end = data.rfind(b'\n') + 1
+        lines = data[:end].splitlines()
+        for line in map(JSONLine, lines) if self.jsonl else lines:
+            observer.on_next(line)
+
+        return data[end:]
+
+    def _open(self, resuming):
+        """
+        Open the file, and move to where it should be read from: the saved offset, if resuming
+        the same file, or else its start or its end. Return None if the file doesn't exist.
+        """
+        try:
+            file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+
+        if not resuming:
+            return file
+
+        status = os.fstat(file.fileno())
+        saved_offset = self._load_offset()
+        if saved_offset is not None and saved_offset['inode'] == status.st_ino:
+            file.seek(saved_offset['offset'] if saved_offset['offset'] <= status.st_size else 0)
+        elif not self.from_start:
+            file.seek(0, os.SEEK_END)
+
+        return file
+
+    def _is_rotated(self, file):
+        try:
+            return os.stat(self.path).st_ino != os.fstat(file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _load_offset(self):
+        if self.offset_path is None:
+            return None
+
+        try:
+            with open(self.offset_path) as offset_file:
+                return json.load(offset_file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_offset(self, file, offset):
+        if self.offset_path is None:
+            return
+
+        # written aside and then moved, so that a crash never leaves half an offset file behind
+        temporary_path = self.offset_path + '.tmp'
+        with open(temporary_path, 'w') as offset_file:
+            json.dump({'inode': os.fstat(file.fileno()).st_ino, 'offset': offset}, offset_file)
+        os.replace(temporary_path, self.offset_path)
+
+    def __repr__(self):
+        return 'follow({!r})'.format(self.path)
+
+
+def split_blocks(buffer, start=0, end=None, block_size=BLOCK_SIZE):
+    """
+    split_blocks :: Buffer -> Int -> Int | None -> Int -> Iterator [bytes]
+
+    Split the given bytes-like buffer into lines, from `start` to `end` (or to its end),
+    and yield them a block of about `block_size` bytes at a time. The last line may not end
+    with a line ending.
+    """
+    if end is None:
+        end = len(buffer)
+
+    while start < end:
+        block_end = buffer.rfind(b'\n', start, min(start + block_size, end)) + 1
+        if block_end == 0:
+            # no line ending in the whole block, so it's part of a very long line
+            block_end = buffer.find(b'\n', start, end) + 1 or end
+
+        yield buffer[start:block_end].splitlines()
+        start = block_end
+
+
+def _map(path):
+    """
+    _map :: String -> mmap.mmap | None
+
+    Map the file at the given path in memory, read-only, or return None if it's empty,
+    as empty files can't be mapped
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if hasattr(buffer, 'madvise'):
+        buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+    return buffer
+
+
+class JSONLine:
+    """
+    A line holding a JSON document, which is only parsed the first time it's looked into:
+    `line['key']`, `'key' in line`, `line.get('key')`... are all forwarded to the parsed document.
+
+    The line itself is available as `line.raw`, so that testers can skip parsing lines that
+    don't matter to them (`b'"level": "ERROR"' in line.raw`).
+    """
+    __slots__ = ('raw', '_json')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._json = None
+
+    @property
+    def json(self):
+        if self._json is None:
+            self._json = json.loads(self.raw)
+
+        return self._json
+
+    def __getitem__(self, key):
+        return self.json[key]
+
+    def __contains__(self, key):
+        return key in self.json
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return getattr(self.json, name)
+
+    def __eq__(self, other):
+        if isinstance(other, JSONLine):
+            return self.raw == other.raw
+
+        return self.json == other
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    def __str__(self):
+        return self.raw.decode('utf-8', 'replace')
+
+    def __repr__(self):
+        return repr(str(self))
@@ -0,0 +1,86 @@
+import threading
+
+"""
+{
+    pool_size: Int,     # connections kept open per host
+    keep_alive: Bool,   # reuse connections across requests
+    timeout: Float,     # default timeout for every request, in seconds
+    retries: Int        # retries on connection errors
+}
+"""
+settings = {
+    'pool_size': 10,
+    'keep_alive': True,
+    'timeout': 10.0,
+    'retries': 0
+}
+
+""" { session_name: requests.Session } """
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def configure(**new_settings):
+    """
+    configure :: {} -> IO
+
+    Update the connection pool settings with the given ones (see settings).
+    Sessions created before are dropped, so that they are rebuilt with the new settings.
+
+    Raises a TypeError if given an unknown setting.
+    """
+    unknown_settings = set(new_settings) - set(settings)
+    if unknown_settings:
+        raise TypeError("Unknown HTTP settings: {}".format(', '.join(sorted(unknown_settings))))
+
+    with _sessions_lock:
+        settings.update(new_settings)
+        _sessions.clear()
+
+
+def get_session(name='default'):
+    """
+    get_session :: String -> requests.Session
+
+    Get the shared session with the given name, building it the first time it is asked for.
+
+    Sessions keep a pool of connections open per host (see settings), so that consecutive
+    requests to the same host don't pay for TCP and TLS setup again. Stock integrations use the
+    default session; custom integrations can use it too, or ask for their own.
+    """
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = _build_session()
+
+        return _sessions[name]
+
+
+def _build_session():
+    # requests is only imported when an integration actually needs to talk HTTP
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_connections=settings['pool_size'],
+        pool_maxsize=settings['pool_size'],
+        max_retries=settings['retries']
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if not settings['keep_alive']:
+        session.headers['Connection'] = 'close'
+
+    session.request = _with_default_timeout(session.request, settings['timeout'])
+
+    return session
+
+
+def _with_default_timeout(request, timeout):
+    def request_with_default_timeout(method, url, **kwargs):
+        kwargs.setdefault('timeout', timeout)
+        return request(method, url, **kwargs)
+
+    return request_with_default_timeout
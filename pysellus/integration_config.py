@@ -1,25 +1,41 @@
 import os
+import time
 import inspect
+from functools import partial
 
 import yaml
 
-from pysellus import loader
-from pysellus.integrations import loaded_integrations, integration_classes
+from pysellus import loader, http_pool
+from pysellus import integrations
+from pysellus.integrations import loaded_integrations, integration_classes, integration_digests
 
 
 CONFIGURATION_FILE_NAME = '.ps_integrations.yml'
 
+""" { parse_seconds: Float, seconds: Float } """
+load_report = {}
+
 
 def load_integrations(path):
     """
     load_integrations :: String -> IO
 
     Given a path, find the config file at it and load it.
+
+    Store how long it took, and how much of it was spent parsing the file, in load_report.
+    Integrations are only built when first used (see integrations#_create).
     """
+    start = time.perf_counter()
     configuration = _load_config_file(path)
+    parsed = time.perf_counter()
+
+    _load_http_settings(configuration)
+    _load_throttle_settings(configuration)
     _load_custom_integrations(configuration)
     _load_defined_integrations(configuration)
 
+    load_report.update(parse_seconds=parsed - start, seconds=time.perf_counter() - start)
+
 
 def _load_config_file(path):
     """
@@ -77,6 +93,42 @@ def _load_configuration_from_config_file(config_file):
     return loaded_configuration
 
 
+def _load_http_settings(configuration):
+    """
+    _load_http_settings :: {} -> IO
+
+    Given an integration configuration dict, configure the HTTP connection pool shared by
+    integrations with its `http` section (see http_pool#settings).
+
+    If the section is missing, pass. Fails if it contains unknown settings.
+    """
+    if 'http' not in configuration:
+        return
+
+    try:
+        http_pool.configure(**configuration['http'])
+    except TypeError as error:
+        exit("Malformed 'http' section: {}".format(error))
+
+
+def _load_throttle_settings(configuration):
+    """
+    _load_throttle_settings :: {} -> IO
+
+    Given an integration configuration dict, deduplicate and rate-limit notifications
+    as described in its `throttle` section (see throttling#Throttle).
+
+    If the section is missing, pass. Fails if it contains unknown settings.
+    """
+    if 'throttle' not in configuration:
+        return
+
+    try:
+        integrations.enable_throttle(**configuration['throttle'])
+    except TypeError as error:
+        exit("Malformed 'throttle' section: {}".format(error))
+
+
 def _load_custom_integrations(configuration):
     """
     _load_custom_integrations :: {} -> IO
@@ -97,11 +149,11 @@ def _load_custom_integrations_classes(custom_configuration):
     """
     _load_custom_integrations_classes :: {} -> IO
 
-    Given a map of configuration definitions, find the integration module, import it,
-    and then load the appropiate class object into the integration_classes dict.
+    Given a map of configuration definitions, define every integration class in the
+    integration_classes registry, so that its module is imported, and the appropiate
+    class object loaded, the first time it is used (see _get_custom_integration_class)
 
-    Fails if it can't find the class object inside the module, or if the integration
-    name is a duplicate.
+    Fails if the integration name is a duplicate.
     """
     for alias, configuration in custom_configuration.items():
         if alias in integration_classes.keys():
@@ -116,22 +168,36 @@ def _load_custom_integrations_classes(custom_configuration):
         except KeyError:
             exit("Malformed integration '{}': missing class name and/or module path".format(alias))
 
-        classobject = _get_matching_classobject_from_path(
-            integration_class_name,
-            path_to_integration_module
+        integration_classes.define(
+            alias,
+            partial(_get_custom_integration_class, alias, integration_class_name, path_to_integration_module)
         )
 
-        if classobject is None:
-            exit(
-                "Malformed custom integration '{alias}:\n\t'{klass}' class not found in {path_to_integration_module}"
-                .format(
-                    alias=alias,
-                    klass=integration_class_name,
-                    path_to_integration_module=path_to_integration_module
-                )
+
+def _get_custom_integration_class(alias, integration_class_name, path_to_integration_module):
+    """
+    _get_custom_integration_class :: String -> String -> String -> python.ClassObject
+
+    Import the module at the given path, and return the class with the given name inside it.
+
+    Fails if it can't find the class object inside the module.
+    """
+    classobject = _get_matching_classobject_from_path(
+        integration_class_name,
+        path_to_integration_module
+    )
+
+    if classobject is None:
+        exit(
+            "Malformed custom integration '{alias}:\n\t'{klass}' class not found in {path_to_integration_module}"
+            .format(
+                alias=alias,
+                klass=integration_class_name,
+                path_to_integration_module=path_to_integration_module
             )
+        )
 
-        integration_classes[alias] = classobject
+    return classobject
 
 
 def _get_matching_classobject_from_path(class_name, path):
@@ -173,15 +239,29 @@ def _load_integrations_from_configuration(integrations_configuration):
     """
     _load_integrations_from_configuration :: {} -> IO
 
-    Given a map of integration constructors, gather the attributes and build an instance
-    of the integration. Then map their aliases with their instances inside the
-    loaded_integrations dict
+    Given a map of integration constructors, gather the attributes and define how to build
+    an instance of the integration. Then map their aliases with their definitions inside the
+    loaded_integrations registry, which builds each instance the first time it is used
+    (see integrations#_create)
+
+    Fails if an integration class is not defined.
+
+    A `digest` attribute is not passed to the constructor: it subscribes the integration in
+    digest mode instead, and is stored in the integration_digests dict (see digest#Digest)
     """
     for alias, integration_name, kwargs_for_integration_constructor \
             in _unpack_integration_configuration_data(integrations_configuration):
-        loaded_integrations[alias] = _get_integration_instance(
-            integration_name,
-            kwargs_for_integration_constructor
+        if kwargs_for_integration_constructor is not None and 'digest' in kwargs_for_integration_constructor:
+            kwargs_for_integration_constructor = dict(kwargs_for_integration_constructor)
+            integration_digests[alias] = kwargs_for_integration_constructor.pop('digest')
+            kwargs_for_integration_constructor = kwargs_for_integration_constructor or None
+
+        if integration_name not in integration_classes:
+            exit("On integration '{}': definition missing\nAborting...".format(integration_name))
+
+        loaded_integrations.define(
+            alias,
+            partial(_get_integration_instance, integration_name, kwargs_for_integration_constructor)
         )
 
 
@@ -198,6 +278,9 @@ def _unpack_integration_configuration_data(integrations_configuration):
         if child is None:
             integration_name = alias
             kwargs_for_integration_constructor = None
+        elif list(child.keys()) == ['digest']:
+            integration_name = alias
+            kwargs_for_integration_constructor = child
         elif _has_only_one_key_and_a_dict_as_value(child):
             integration_name = _get_the_only_key_in(child)
             kwargs_for_integration_constructor = child[integration_name]
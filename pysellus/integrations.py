@@ -1,32 +1,111 @@
+import time
 from inspect import getdoc
 
+from pysellus.sampling import make_sampler
+from pysellus.throttling import Throttle
+from pysellus.dispatcher import Dispatcher
+from pysellus.interfaces import AbstractIntegration
+from pysellus.registries import LazyInstanceRegistry
 from pysellus.stock_integrations import stock_integration_classes
 
 # integration_name -> integration_class_object
-# maps integration names to its object classes (inside modules)
+# maps integration names to its object classes (inside modules), which are imported on first use
 integration_classes = stock_integration_classes
 
 # integration_alias -> integration_instance
-# maps integration aliases to class instances
-loaded_integrations = {}
+# maps integration aliases to class instances, which are built on first use (see _create)
+loaded_integrations = LazyInstanceRegistry()
+
+# integration_alias -> digest settings
+# maps the aliases of integrations subscribed in digest mode to their settings (see digest#Digest)
+integration_digests = {}
 
 """
 {
     test_name: {
         test_description: String,
-        integrations: [ registered_integrations ]
+        integrations: [ registered_integrations ],
+        integration_names: [ String ],
+        sampler: sampling.Sampler | None
     }
 }
 """
 registered_integrations = {}
 
-""" { integration_name: rx.subjects.Subject } """
+""" { module_name: { setup_function_name: setup_function } } """
+setup_functions_by_module = {}
+
+""" { integration_name: rx.subjects.Subject | dispatcher._Channel } """
 integration_to_subject = {}
 
+""" { integration_alias: Float } """
+integration_build_seconds = {}
+
+# when set, integrations are notified from its worker threads, see enable_dispatcher
+dispatcher = None
+
+# when set, notifications go through it before reaching integrations, see enable_throttle
+throttle = None
+
+# when set, notifications are delivered from this event loop, see deliver_on_loop
+delivery_loop = None
+
+
+def enable_dispatcher(workers_per_integration=1):
+    """
+    enable_dispatcher :: Int -> IO
+
+    Deliver notifications to every integration created from now on through a dispatcher,
+    with the given number of worker threads per integration, instead of inline
+    (see dispatcher#Dispatcher)
+    """
+    global dispatcher
+    dispatcher = Dispatcher(workers_per_integration)
+
+
+def enable_throttle(**throttle_settings):
+    """
+    enable_throttle :: {} -> IO
+
+    Deduplicate and rate-limit notifications with the given settings
+    (see throttling#Throttle)
+    """
+    global throttle
+    throttle = Throttle(**throttle_settings)
+
+
+def deliver_on_loop(loop):
+    """
+    deliver_on_loop :: asyncio.AbstractEventLoop | None -> IO
+
+    Deliver notifications from the given event loop, instead of from the thread of the tester
+    sending them, or from that thread again if None is given (see async_engine#launch_tasks)
+
+    With the dispatcher enabled, delivering only queues notifications for its worker threads,
+    so integrations blocking on I/O don't block the loop
+    """
+    global delivery_loop
+    delivery_loop = loop
+
+
+def shutdown():
+    """
+    shutdown :: -> IO
 
-def on_failure(*integration_names):
+    Flush all pending notifications, and complete every integration, so that integrations
+    holding notifications back (like digests, see digest#Digest) send them before exiting
     """
-    on_failure :: [String] -> (fn -> fn)
+    if dispatcher is not None:
+        dispatcher.shutdown()
+        return
+
+    for subject in integration_to_subject.values():
+        subject.on_completed()
+
+
+def on_failure(*integration_names, sample=None, sample_key=None):
+    """
+    on_failure :: [String] -> Float | None -> String | (Any -> Any) | None -> (fn -> fn)
 
     Decorator that maps the given function to the supplied integration names tuple
 
@@ -42,18 +121,29 @@ def on_failure(*integration_names):
     creates a Subject object (see _get_integration). It then maps it against the
     given function name, {string: rx.Subject}.
 
+    If a sampling rate is given, the testers of the test only check that fraction of the
+    elements, chosen at random or by the hash of the given key (see sampling#make_sampler).
+
+    The function is also recorded in `setup_functions_by_module`, under the name of the
+    module defining it, so that the loader doesn't need to scan modules looking for it.
+
     Finally, returns the original function
 
     """
+    sampler = make_sampler(sample, sample_key)
+
     def decorator_of_setup_function(setup_function):
         _mark_as_setup_function(setup_function)
+        _record_setup_function(setup_function)
 
         registered_integrations[setup_function.__name__] = {
             'test_description': _get_test_description(setup_function),
             'integrations': [
                 _get_integration(integration_name_)
                 for integration_name_ in integration_names
-            ]
+            ],
+            'integration_names': list(integration_names),
+            'sampler': sampler
         }
 
         return setup_function
@@ -65,6 +155,11 @@ def _mark_as_setup_function(function):
     function.is_setup_function = True
 
 
+def _record_setup_function(function):
+    module_name = getattr(function, '__module__', None)
+    setup_functions_by_module.setdefault(module_name, {})[function.__name__] = function
+
+
 def _get_test_description(f):
     doc = getdoc(f)
     return doc if doc else f.__name__.replace('_', ' ')
@@ -95,17 +190,43 @@ def _create(integration_name):
     In any case, the returned Subject has already been subscribed by all interested functions,
     so one can send a message to it without fear that the message will be lost
 
+    If the integration is subscribed in digest mode, the Subject aggregates failures before
+    handing them to the integration (see interfaces#AbstractIntegration.get_subject)
+
+    Integrations using the Subject of interfaces#AbstractIntegration get their name, so that their
+    metrics are reported under it
+
+    If the dispatcher is enabled, return the dispatcher channel delivering to the Subject instead
+
+    Integrations are only built here, the first time a test uses them, so that integrations
+    declared in the configuration file but not used by any test cost nothing
+
+    How long building it took is stored in integration_build_seconds
+
     If no integration is found (KeyError), print an error and quit
 
     """
+    start = time.perf_counter()
     try:
         integration_instance = loaded_integrations[integration_name]
+        integration_build_seconds[integration_name] = time.perf_counter() - start
     except KeyError as e:
         exit("The integration {} is used, but it's not declared,\n"
              "check that all integrations used are correctly declared in the configuration file"
              .format(e))
 
-    return integration_instance.get_subject()
+    subject_settings = {}
+    if integration_name in integration_digests:
+        subject_settings['digest'] = integration_digests[integration_name]
+    # integrations overriding get_subject may not take a name
+    if getattr(type(integration_instance), 'get_subject', None) is AbstractIntegration.get_subject:
+        subject_settings['name'] = integration_name
+
+    subject = integration_instance.get_subject(**subject_settings)
+    if dispatcher is None:
+        return subject
+
+    return dispatcher.channel_for(integration_name, subject)
 
 
 def notify_element(test_name, element_payload):
@@ -127,9 +248,35 @@ def _notify_integrations(test_name, message, error=False):
 
     If the error flag is set to true, send the message as an error
 
+    If the throttle is enabled, only send the payload to the integrations it lets through
+
+    Tests removed while their last elements are still being checked (see watcher#Watcher) are
+    no longer registered: their notifications are dropped.
+
     """
-    for integration in registered_integrations[test_name]['integrations']:
+    registration = registered_integrations.get(test_name)
+    if registration is None:
+        return
+
+    if throttle is None:
+        deliveries = [(integration, message) for integration in registration['integrations']]
+    else:
+        deliveries = throttle.deliveries(
+            test_name,
+            registration['integration_names'],
+            registration['integrations'],
+            message
+        )
+
+    if delivery_loop is None:
+        _deliver(deliveries, error)
+    else:
+        delivery_loop.call_soon_threadsafe(_deliver, deliveries, error)
+
+
+def _deliver(deliveries, error):
+    for integration, payload in deliveries:
         if error:
-            integration.on_error(message)
+            integration.on_error(payload)
         else:
-            integration.on_next(message)
+            integration.on_next(payload)
@@ -2,15 +2,32 @@ from abc import ABCMeta, abstractmethod
 
 from rx.subjects import Subject
 
+from pysellus import metrics
+from pysellus.digest import Digest
+
 
 class AbstractIntegration(metaclass=ABCMeta):
-    def get_subject(self):
+    def get_subject(self, digest=None, name=None):
+        """
+        get_subject :: {} | None -> String | None -> rx.Subject
+
+        Return a Subject which notifies this integration.
+
+        If digest settings are given, failures go through a Digest first, so that the
+        integration receives one summary per test and window (see digest#Digest)
+
+        If metrics are enabled, deliveries are timed and counted under the given name,
+        or the class name (see metrics#instrument_integration)
+        """
         subject = Subject()
+        observer = metrics.instrument_integration(name or type(self).__name__, self)
+        if digest is not None:
+            observer = Digest(observer, **digest)
 
         subject.subscribe(
-            self.on_next,
-            self.on_error,
-            self.on_completed
+            observer.on_next,
+            observer.on_error,
+            observer.on_completed
         )
 
         return subject
@@ -1,7 +1,32 @@
 import os
 import sys
+import json
+import time
+import importlib
+import compileall
 from inspect import isfunction
 from importlib import import_module
+from importlib.util import cache_from_source, module_from_spec
+from importlib.machinery import ModuleSpec
+from concurrent.futures import ProcessPoolExecutor
+
+from pysellus import integrations, stl
+
+DISCOVERY_CACHE_FILE_NAME = os.path.join('__pycache__', 'pysellus-discovery.json')
+DISCOVERY_CACHE_VERSION = 2
+
+# test files are imported as submodules of this package, so that their names never shadow
+# other modules, see _add_test_root
+SUITE_PACKAGE = 'pysellus_suite'
+
+# below this many stale files, compiling them in parallel isn't worth starting a process pool
+MIN_FILES_TO_COMPILE_IN_PARALLEL = 8
+
+""" { files: Int, discovery_seconds: Float, compile_seconds: Float, import_seconds: Float } """
+load_report = {}
+
+""" { module_name: Float } """
+module_import_seconds = {}
 
 
 def load_test_files(path):
@@ -11,15 +36,14 @@ def load_test_files(path):
     Given a filesystem path, import all modules under that path, then import all setup_functions
     inside those modules.
 
+    Test files can be written in python (`.py`) or STL (`.stl`, see stl#transpile)
+
     See load_modules, _get_setup_functions_from_module
     """
-    modules = load_modules(path)
-
-    functions = []
-    for module in modules:
-        functions += _get_setup_functions_from_module(module)
+    if _is_test_file(path):
+        return _get_setup_functions_from_module(load_modules(path)[0])
 
-    return functions
+    return _load_test_files_from_directory(path)
 
 
 def load_modules(path):
@@ -29,54 +53,377 @@ def load_modules(path):
     Given a filesystem path, import all modules under that path.
 
     If the path is a file, import that file. If it's a directory, import all python files inside
-    that folder, in a non-recursive manner.
+    that folder and its subfolders (see _load_test_files_from_directory).
     """
-    if _is_python_file(path):
-        sys.path.insert(0, os.path.dirname(path))
-        module = import_module(_get_module_name_from_path(path))
+    stl.install_import_hook()
+
+    if _is_test_file(path):
+        _add_test_root(os.path.dirname(path))
+        module = _import_module(_get_module_name_from_relative_path(os.path.basename(path)))
         return [module]
 
     return _get_modules(path)
 
 
-def _get_module_name_from_path(path):
-    return _remove_extension(path.split('/')[-1])
+def find_test_files(path):
+    """
+    find_test_files :: String -> [String]
+
+    Return the paths of the test files that load_modules would import from the given path,
+    relative to it. If the path is a file, return just its name.
+    """
+    if _is_test_file(path):
+        return [os.path.basename(path)]
+
+    return list(_find_python_files(path, '', _DiscoveryCache(path)))
+
+
+def get_setup_functions(relative_path):
+    """
+    get_setup_functions :: String -> [(a -> b)]
+
+    Return the setup functions of the already imported module of the given test file
+    (see find_test_files)
+    """
+    return _get_setup_functions_from_module(sys.modules[_get_module_name_from_relative_path(relative_path)])
+
+
+def reload_test_file(path, relative_path):
+    """
+    reload_test_file :: String -> String -> [(a -> b)]
+
+    Import the given test file again, or for the first time if it's new, and return its
+    setup functions. The path is the one given to load_test_files, and the file path is
+    relative to it (see find_test_files).
+
+    The module is imported from scratch, so that functions removed from the file are gone.
+    If the import fails, the previous module is kept.
+    """
+    stl.install_import_hook()
+    _add_test_root(_get_test_root(path))
+
+    module_name = _get_module_name_from_relative_path(relative_path)
+    previous_module = sys.modules.pop(module_name, None)
+    previous_setup_functions = integrations.setup_functions_by_module.pop(module_name, None)
+
+    # the bytecode may look up to date if the file was changed quickly enough (see _has_stale_bytecode)
+    _remove_bytecode(os.path.join(_get_test_root(path), relative_path))
+    importlib.invalidate_caches()
+
+    try:
+        module = import_module(module_name)
+    except BaseException:
+        if previous_module is not None:
+            sys.modules[module_name] = previous_module
+        if previous_setup_functions is not None:
+            integrations.setup_functions_by_module[module_name] = previous_setup_functions
+        raise
+
+    return _get_setup_functions_from_module(module)
+
+
+def _get_test_root(path):
+    if _is_test_file(path):
+        return os.path.dirname(path)
+
+    return path
+
+
+def _remove_bytecode(path):
+    # STL code is cached by content hash, so it can't look up to date after a change
+    if not _is_python_file(path):
+        return
+
+    try:
+        os.remove(cache_from_source(path))
+    except OSError:
+        pass
+
+
+def _add_test_root(directory):
+    """
+    _add_test_root :: String -> IO
+
+    Make the test files under the given directory importable as submodules of SUITE_PACKAGE,
+    which is created the first time. The directory is searched before the ones added earlier.
+
+    Test directories are never added to sys.path, so that a test file named after a module
+    (`json.py`, `logging.py`...) doesn't shadow it for everyone importing it
+    """
+    suite_package = sys.modules.get(SUITE_PACKAGE)
+    if suite_package is None:
+        suite_package = module_from_spec(ModuleSpec(SUITE_PACKAGE, None, is_package=True))
+        sys.modules[SUITE_PACKAGE] = suite_package
+
+    directory = os.path.abspath(directory)
+    if directory in suite_package.__path__:
+        suite_package.__path__.remove(directory)
+    suite_package.__path__.insert(0, directory)
 
 
 def _get_setup_functions_from_module(module):
     """
     Gets all setup functions from the given module.
-    All setup functions have the 'is_setup_function' attribute
+
+    Setup functions declared with `on_failure` are recorded by module as they are defined,
+    so they are looked up directly. Otherwise, fall back to scanning the module namespace:
+    all setup functions have the 'is_setup_function' attribute
 
     See integrations#on_failure
     """
+    recorded_functions = integrations.setup_functions_by_module.get(module.__name__)
+    if recorded_functions is not None:
+        return list(recorded_functions.values())
+
+    return [
+        value
+        for value in vars(module).values()
+        if isfunction(value) and hasattr(value, 'is_setup_function')
+    ]
+
+
+def _get_modules(directory):
+    return [module for module, _ in _import_directory(directory, _DiscoveryCache(directory))]
+
+
+def _load_test_files_from_directory(directory):
+    """
+    _load_test_files_from_directory :: String -> [(a -> b)]
+
+    Import every python file under the given directory, recursively, and gather their
+    setup functions.
+
+    Modules are named after their path relative to the given directory, inside SUITE_PACKAGE,
+    so that `checks/api/users.py` is imported as `pysellus_suite.api.users`.
+
+    The test files found in each directory are cached (see _DiscoveryCache), so that unchanged
+    directories are not listed again.
+    """
+    stl.install_import_hook()
+
+    discovery_cache = _DiscoveryCache(directory)
+    modules = _import_directory(directory, discovery_cache)
+    discovery_cache.save()
+
     functions = []
-    for entry in dir(module):
-        value = getattr(module, entry)
-        if isfunction(value) and hasattr(value, 'is_setup_function'):
-            functions.append(value)
+    for module, _ in modules:
+        functions += _get_setup_functions_from_module(module)
+
     return functions
 
 
-def _get_modules(directory):
-    sys.path.insert(0, directory)
-    return [
-        import_module(filename)
-        for filename in _get_python_files(directory)
-    ]
+def _import_directory(directory, discovery_cache):
+    """
+    _import_directory :: String -> _DiscoveryCache -> [(python.Module, String)]
 
+    Compile all test files under the given directory in parallel, then import them.
+    Return each module along with the path of its file, relative to the directory.
 
-def _get_python_files(directory):
-    return [
-        _remove_extension(filename)
-        for filename in os.listdir(directory)
-        if not filename.startswith('__') and _is_python_file(filename)
+    How long each step took is stored in load_report.
+    """
+    _add_test_root(directory)
+
+    start = time.perf_counter()
+    relative_paths = list(_find_python_files(directory, '', discovery_cache))
+    discovered = time.perf_counter()
+    _compile_in_parallel([os.path.join(directory, relative_path) for relative_path in relative_paths])
+    compiled = time.perf_counter()
+
+    modules = [
+        (_import_module(_get_module_name_from_relative_path(relative_path)), relative_path)
+        for relative_path in relative_paths
     ]
 
+    load_report.update(
+        files=len(relative_paths),
+        discovery_seconds=discovered - start,
+        compile_seconds=compiled - discovered,
+        import_seconds=time.perf_counter() - compiled
+    )
+
+    return modules
+
+
+def _import_module(module_name):
+    """
+    _import_module :: String -> python.Module
+
+    Import the module with the given name, and store how long it took in module_import_seconds.
+    The time of a module includes the time of the modules it imports for the first time.
+    """
+    start = time.perf_counter()
+    module = import_module(module_name)
+    module_import_seconds[module_name] = time.perf_counter() - start
+
+    return module
+
+
+def _find_python_files(root, relative_directory, discovery_cache):
+    """
+    _find_python_files :: String -> String -> _DiscoveryCache -> Generator String
+
+    Yield the paths of all test files under the given directory, relative to the root.
+    Names starting with '__' or '.' are skipped.
+    """
+    filenames, subdirectories = discovery_cache.list_directory(relative_directory)
+
+    for filename in filenames:
+        yield os.path.join(relative_directory, filename)
+
+    for subdirectory in subdirectories:
+        yield from _find_python_files(root, os.path.join(relative_directory, subdirectory), discovery_cache)
+
+
+def _list_directory(directory):
+    """
+    _list_directory :: String -> ([String], [String])
+
+    Return the sorted names of the test files and subdirectories inside the given directory
+    """
+    filenames = []
+    subdirectories = []
+
+    for entry in os.scandir(directory):
+        if entry.name.startswith('__') or entry.name.startswith('.'):
+            continue
+
+        if entry.is_dir():
+            subdirectories.append(entry.name)
+        elif _is_test_file(entry.name):
+            filenames.append(entry.name)
+
+    return sorted(filenames), sorted(subdirectories)
+
+
+def _get_module_name_from_relative_path(relative_path):
+    return '.'.join([SUITE_PACKAGE] + _remove_extension(relative_path).split(os.sep))
+
+
+def _compile_in_parallel(paths):
+    """
+    _compile_in_parallel :: [String] -> IO
+
+    Compile the test files whose bytecode is missing or out of date, using one process
+    per core, so that importing them afterwards only needs to load their bytecode.
+    """
+    stale_paths = [path for path in paths if _has_stale_bytecode(path)]
+    if len(stale_paths) < MIN_FILES_TO_COMPILE_IN_PARALLEL:
+        return
+
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(_compile_file, stale_paths))
+
+
+def _compile_file(path):
+    if not _is_python_file(path):
+        # errors are reported when the file is imported
+        try:
+            stl.compile_file(path)
+        except (OSError, SyntaxError):
+            pass
+        return
+
+    compileall.compile_file(path, quiet=2)
+
+
+def _has_stale_bytecode(path):
+    if not _is_python_file(path):
+        return stl.has_stale_cache(path)
+
+    try:
+        return os.stat(cache_from_source(path)).st_mtime < os.stat(path).st_mtime
+    except OSError:
+        return True
+
+
+def _is_test_file(filename):
+    return _is_python_file(filename) or filename.endswith(stl.STL_EXTENSION)
+
 
 def _is_python_file(filename):
     return filename.endswith('.py')
 
 
 def _remove_extension(filename):
-    return filename[:-3]
+    return os.path.splitext(filename)[0]
+
+
+class _DiscoveryCache:
+    """
+    Remembers, between runs, the test files and subdirectories inside each directory under a
+    test directory, along with the directory mtime, so that unchanged directories are not
+    listed again.
+
+    Setup functions aren't cached: modules have to be imported anyway to run their tests,
+    and importing them records their setup functions (see integrations#on_failure).
+
+    It is stored as JSON in the `__pycache__` directory of the test directory. If it can't be
+    read or written, everything is discovered from scratch.
+    """
+    def __init__(self, root):
+        self._root = root
+        self._path = os.path.join(root, DISCOVERY_CACHE_FILE_NAME)
+
+        self._directories = self._read().get('directories', {})
+
+    def _read(self):
+        try:
+            with open(self._path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        if cache.get('version') != DISCOVERY_CACHE_VERSION:
+            return {}
+
+        return cache
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            self._refresh_directory_mtimes()
+            with open(self._path, 'w') as cache_file:
+                json.dump({
+                    'version': DISCOVERY_CACHE_VERSION,
+                    'directories': self._directories
+                }, cache_file)
+        except OSError:
+            pass
+
+    def list_directory(self, relative_directory):
+        """
+        list_directory :: String -> ([String], [String])
+
+        Return the python files and subdirectories inside the given directory
+        (see loader#_list_directory), listing it only if it changed since last time.
+        """
+        mtime = os.stat(os.path.join(self._root, relative_directory)).st_mtime_ns
+
+        cached_listing = self._directories.get(relative_directory)
+        if cached_listing is not None and cached_listing['mtime'] == mtime:
+            return cached_listing['files'], cached_listing['subdirectories']
+
+        filenames, subdirectories = _list_directory(os.path.join(self._root, relative_directory))
+        self._directories[relative_directory] = {
+            'mtime': mtime,
+            'files': filenames,
+            'subdirectories': subdirectories
+        }
+
+        return filenames, subdirectories
+
+    def _refresh_directory_mtimes(self):
+        # importing creates `__pycache__` directories, which changes the mtime of the directories
+        # that were just listed: if their listing is still the same, don't list them again next time
+        for relative_directory, cached_listing in self._directories.items():
+            try:
+                mtime = os.stat(os.path.join(self._root, relative_directory)).st_mtime_ns
+            except OSError:
+                continue
+
+            if mtime == cached_listing['mtime']:
+                continue
+
+            filenames, subdirectories = _list_directory(os.path.join(self._root, relative_directory))
+            if (filenames, subdirectories) == (cached_listing['files'], cached_listing['subdirectories']):
+                cached_listing['mtime'] = mtime
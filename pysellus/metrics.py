@@ -0,0 +1,475 @@
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# instrumentation hooks do nothing until metrics are enabled, see enable
+enabled = False
+
+""" [Counter | Histogram] """
+_metrics = []
+
+""" [(-> [(String, String, String, [({ String: String }, Float)])])] """
+_collectors = []
+
+
+class Counter:
+    """
+    A monotonically increasing value, for every combination of label values (see labels)
+    """
+    type = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+
+        self._children = {}
+        self._lock = threading.Lock()
+
+        _metrics.append(self)
+
+    def labels(self, *label_values):
+        """
+        labels :: [String] -> _CounterChild
+
+        Return the counter for the given label values, creating it the first time
+        """
+        child = self._children.get(label_values)
+        if child is not None:
+            return child
+
+        with self._lock:
+            return self._children.setdefault(label_values, _CounterChild())
+
+    def samples(self):
+        """
+        samples :: -> [(String, { String: String }, Float)]
+        """
+        return [
+            (self.name, dict(zip(self.label_names, label_values)), child.value)
+            for label_values, child in list(self._children.items())
+        ]
+
+    def totals(self):
+        """
+        totals :: -> { (String): Float }
+        """
+        return {label_values: child.value for label_values, child in list(self._children.items())}
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Counts observed values (i.e. durations, in seconds) into buckets, for every combination
+    of label values (see labels)
+    """
+    type = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+
+        self._children = {}
+        self._lock = threading.Lock()
+
+        _metrics.append(self)
+
+    def labels(self, *label_values):
+        """
+        labels :: [String] -> _HistogramChild
+
+        Return the histogram for the given label values, creating it the first time
+        """
+        child = self._children.get(label_values)
+        if child is not None:
+            return child
+
+        with self._lock:
+            return self._children.setdefault(label_values, _HistogramChild(self.buckets))
+
+    def samples(self):
+        """
+        samples :: -> [(String, { String: String }, Float)]
+
+        Bucket counts are cumulative, as Prometheus expects them
+        """
+        samples = []
+        for label_values, child in list(self._children.items()):
+            labels = dict(zip(self.label_names, label_values))
+            counts, total, count = child.snapshot()
+
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative_count += bucket_count
+                samples.append((
+                    self.name + '_bucket',
+                    dict(labels, le=_format_value(upper_bound)),
+                    cumulative_count
+                ))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, count))
+
+        return samples
+
+    def totals(self):
+        """
+        totals :: -> { (String): (Float, Int) }
+
+        The sum and count of the observed values, for every combination of label values
+        """
+        return {
+            label_values: child.snapshot()[1:]
+            for label_values, child in list(self._children.items())
+        }
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._total = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        bucket = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[bucket] += 1
+            self._total += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._total, self._count
+
+
+stream_elements = Counter(
+    'pysellus_stream_elements_total', 'Elements emitted by each stream', ['stream']
+)
+tester_seconds = Histogram(
+    'pysellus_tester_seconds', 'Time spent running each tester on an element (or batch)', ['test', 'tester']
+)
+tester_failures = Counter(
+    'pysellus_tester_failures_total', 'Elements that failed each tester', ['test', 'tester']
+)
+tester_errors = Counter(
+    'pysellus_tester_errors_total', 'Exceptions raised by each tester', ['test', 'tester']
+)
+integration_seconds = Histogram(
+    'pysellus_integration_seconds', 'Time spent delivering each notification to each integration', ['integration']
+)
+integration_notifications = Counter(
+    'pysellus_integration_notifications_total', 'Notifications delivered to each integration', ['integration']
+)
+integration_errors = Counter(
+    'pysellus_integration_errors_total', 'Notifications each integration failed to deliver', ['integration']
+)
+
+
+def enable():
+    """
+    enable :: -> IO
+
+    Turn the instrumentation hooks on. Streams, testers and integrations set up before this
+    call are not instrumented.
+    """
+    global enabled
+
+    enabled = True
+    if _collect_queue_stats not in _collectors:
+        register_collector(_collect_queue_stats)
+
+
+def register_collector(collector):
+    """
+    register_collector :: (-> [(String, String, String, [({ String: String }, Float)])]) -> IO
+
+    Add a function to be called on every render, returning extra metrics computed on demand,
+    as (name, type, help text, [(labels, value)]) tuples
+    """
+    _collectors.append(collector)
+
+
+def time_tester(test_name, tester_name, tester, element):
+    """
+    time_tester :: String -> String -> fn -> Any -> Any
+
+    Call the given tester on the given element, and return its result.
+    If metrics are enabled, record how long the call took.
+    """
+    if not enabled:
+        return tester(element)
+
+    with _timing_tester(test_name, tester_name):
+        return tester(element)
+
+
+async def time_async_tester(test_name, tester_name, tester, element):
+    """
+    time_async_tester :: String -> String -> fn -> Any -> Coroutine
+
+    Same as time_tester, for testers defined with `async def`: the time spent awaiting the
+    tester is recorded.
+    """
+    if not enabled:
+        return await tester(element)
+
+    with _timing_tester(test_name, tester_name):
+        return await tester(element)
+
+
+@contextmanager
+def _timing_tester(test_name, tester_name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tester_seconds.labels(test_name, tester_name).observe(time.perf_counter() - start)
+
+
+def record_tester_failure(test_name, tester_name):
+    if enabled:
+        tester_failures.labels(test_name, tester_name).inc()
+
+
+def record_tester_error(test_name, tester_name):
+    if enabled:
+        tester_errors.labels(test_name, tester_name).inc()
+
+
+def instrument_stream(name, subject):
+    """
+    instrument_stream :: String -> rx.Subject -> IO
+
+    If metrics are enabled, count the elements going through the given stream Subject
+    """
+    if not enabled:
+        return
+
+    counter = stream_elements.labels(name)
+    subject.subscribe(lambda element: counter.inc())
+
+
+def instrument_integration(name, observer):
+    """
+    instrument_integration :: String -> Observer -> Observer
+
+    If metrics are enabled, return an observer timing and counting the notifications
+    delivered to the given integration observer. Otherwise, return the observer as is.
+    """
+    if not enabled:
+        return observer
+
+    return _InstrumentedIntegration(name, observer)
+
+
+class _InstrumentedIntegration:
+    def __init__(self, name, observer):
+        self._observer = observer
+        self._seconds = integration_seconds.labels(name)
+        self._notifications = integration_notifications.labels(name)
+        self._errors = integration_errors.labels(name)
+
+    def on_next(self, payload):
+        self._deliver(self._observer.on_next, payload)
+
+    def on_error(self, payload):
+        self._deliver(self._observer.on_error, payload)
+
+    def on_completed(self):
+        self._observer.on_completed()
+
+    def _deliver(self, notify, payload):
+        start = time.perf_counter()
+        try:
+            notify(payload)
+        except Exception:
+            self._errors.inc()
+            raise
+        finally:
+            self._seconds.observe(time.perf_counter() - start)
+
+        self._notifications.inc()
+
+
+def _collect_queue_stats():
+    # imported here, since both modules report to this one
+    from pysellus import integrations, threader
+
+    samples = []
+
+    stream_buffers = list(threader.stream_buffers.values())
+    if stream_buffers:
+        samples.append((
+            'pysellus_stream_queue_depth', 'gauge', 'Elements waiting in each stream queue',
+            [({'stream': buffer.name}, buffer.stats()['depth']) for buffer in stream_buffers]
+        ))
+        samples.append((
+            'pysellus_stream_queue_dropped_total', 'counter', 'Elements dropped by each full stream queue',
+            [({'stream': buffer.name}, buffer.stats()['dropped']) for buffer in stream_buffers]
+        ))
+
+    if integrations.dispatcher is not None:
+        channel_stats = integrations.dispatcher.stats()
+        samples.append((
+            'pysellus_dispatch_queue_depth', 'gauge', 'Notifications waiting to be delivered to each integration',
+            [({'integration': name}, stats['depth']) for name, stats in channel_stats.items()]
+        ))
+        samples.append((
+            'pysellus_dispatch_max_latency_seconds', 'gauge',
+            'Longest time a notification waited before being delivered to each integration',
+            [({'integration': name}, stats['max_latency']) for name, stats in channel_stats.items()]
+        ))
+
+    return samples
+
+
+def render():
+    """
+    render :: -> String
+
+    Render every metric in the Prometheus text exposition format
+    """
+    lines = []
+
+    for metric in _metrics:
+        samples = metric.samples()
+        if not samples:
+            continue
+
+        lines.append('# HELP {} {}'.format(metric.name, metric.help_text))
+        lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+        lines += [_format_sample(name, labels, value) for name, labels, value in samples]
+
+    for collector in _collectors:
+        for name, metric_type, help_text, samples in collector():
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            lines += [_format_sample(name, labels, value) for labels, value in samples]
+
+    return '\n'.join(lines) + '\n'
+
+
+def _format_sample(name, labels, value):
+    if not labels:
+        return '{} {}'.format(name, _format_value(value))
+
+    return '{}{{{}}} {}'.format(
+        name,
+        ','.join('{}="{}"'.format(label, _escape(label_value)) for label, label_value in labels.items()),
+        _format_value(value)
+    )
+
+
+def _escape(label_value):
+    return str(label_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """
+    start_http_server :: Int -> String -> http.server.HTTPServer
+
+    Serve the rendered metrics at http://host:port/metrics from a background thread.
+    Only listens on the local interface by default.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics-server').start()
+
+    return server
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def start_log_dump(interval, clock=time.monotonic):
+    """
+    start_log_dump :: Float -> IO
+
+    Log a summary of the metrics every `interval` seconds, from a background thread
+    (see summarize)
+    """
+    def dump_periodically():
+        previous_totals, previous_time = stream_elements.totals(), clock()
+        while True:
+            time.sleep(interval)
+            totals, now = stream_elements.totals(), clock()
+            for line in summarize(previous_totals, now - previous_time):
+                logger.info(line)
+            previous_totals, previous_time = totals, now
+
+    threading.Thread(target=dump_periodically, daemon=True, name='metrics-log').start()
+
+
+def summarize(previous_stream_totals, elapsed_seconds, slowest_testers=5):
+    """
+    summarize :: { (String): Int } -> Float -> Int -> [String]
+
+    Summarize the metrics in a few lines:
+        - the elements per second of every stream, since the given previous totals
+        - the testers with the highest mean latency, along with their failures and errors
+        - the notifications, errors and mean latency of every integration
+    """
+    lines = []
+
+    for (stream_name,), total in sorted(stream_elements.totals().items()):
+        rate = (total - previous_stream_totals.get((stream_name,), 0)) / elapsed_seconds if elapsed_seconds else 0.0
+        lines.append('{}: {} elements, {:.1f}/s'.format(stream_name, total, rate))
+
+    failures = tester_failures.totals()
+    errors = tester_errors.totals()
+    tester_latencies = sorted(
+        ((total / count, labels, count) for labels, (total, count) in tester_seconds.totals().items() if count),
+        reverse=True
+    )
+    for mean_latency, labels, count in tester_latencies[:slowest_testers]:
+        lines.append('{} -> {}: {} calls, {:.6f}s mean, {} failures, {} errors'.format(
+            labels[0], labels[1], count, mean_latency, failures.get(labels, 0), errors.get(labels, 0)
+        ))
+
+    integration_errors_totals = integration_errors.totals()
+    for (name,), (total, count) in sorted(integration_seconds.totals().items()):
+        lines.append('integration {}: {} notifications, {} errors, {:.6f}s mean'.format(
+            name, count, integration_errors_totals.get((name,), 0), total / count if count else 0.0
+        ))
+
+    return lines
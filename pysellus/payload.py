@@ -0,0 +1,78 @@
+from collections.abc import Mapping
+
+_UNSET = object()
+
+
+class FailurePayload(Mapping):
+    """
+    The message delivered to integrations whenever a test fails, or raises an error.
+
+    Payloads are only built on failure, so they are kept as small as possible: every field
+    is a slot, and optional fields are only present once set:
+        - test_function: the name of the registered test function, which, unlike its
+          description in test_name, is unique
+        - error: the exception raised by the tester
+        - suppressed: how many notifications to the same integration were suppressed before
+          this one (see throttling#Throttle)
+        - sampling_rate: the fraction of elements the tester checks, if it is sampled, so that
+          failure counts can be extrapolated (see sampling#Sampler)
+
+    For compatibility with integrations written against plain dictionaries, payloads
+    support read-only dict-style access (`payload['test_name']`, `'error' in payload`,
+    `dict(payload)`...), plus item assignment of known fields.
+    """
+    __slots__ = ('test_name', 'expect_function', 'element', 'test_function', 'error', 'suppressed', 'sampling_rate')
+
+    def __init__(self, test_name, expect_function, element, test_function=_UNSET, error=_UNSET,
+                 suppressed=_UNSET, sampling_rate=_UNSET):
+        self.test_name = test_name
+        self.expect_function = expect_function
+        self.element = element
+        self.test_function = test_function
+        self.error = error
+        self.suppressed = suppressed
+        self.sampling_rate = sampling_rate
+
+    def replace(self, **fields):
+        """
+        replace :: {} -> FailurePayload
+
+        Return a copy of this payload, with the given fields replaced
+        """
+        return FailurePayload(**dict(self, **fields))
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        value = getattr(self, key)
+        if value is _UNSET:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if getattr(self, key) is not _UNSET)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __getstate__(self):
+        # unset fields are left out, as the _UNSET marker doesn't survive pickling
+        return dict(self)
+
+    def __setstate__(self, state):
+        for key in self.__slots__:
+            setattr(self, key, state.get(key, _UNSET))
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{}={!r}'.format(key, value) for key, value in self.items())
+        )
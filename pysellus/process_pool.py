@@ -0,0 +1,147 @@
+import os
+import queue
+import logging
+import multiprocessing
+
+from pysellus import integrations, threader
+
+logger = logging.getLogger(__name__)
+
+# how often the parent checks that workers are alive while none of them sends anything, see launch_workers
+WORKER_CHECK_INTERVAL = 1.0
+
+# marks that a worker process ran out of streams, sent along with its pid, see _run_worker
+_WORKER_DONE = None
+
+
+def build_workers(stream_to_testers, workers):
+    """
+    build_workers :: { stream: [fn] } -> Int -> ([multiprocessing.Process], multiprocessing.Queue)
+
+    Given a map of streams to testers, split it into (at most) `workers` shards, and build a
+    worker process for each of them. Each worker runs its shard with the thread engine
+    (see threader#build_threads).
+
+    Workers are forked, so that they inherit the already registered streams and testers,
+    which usually can't be pickled. Failures found by a worker are funnelled back to the
+    parent process through the returned queue (see launch_workers), so their elements and
+    errors must be picklable.
+    """
+    context = multiprocessing.get_context('fork')
+    failure_queue = context.Queue()
+
+    return [
+        context.Process(target=_run_worker, args=(shard, failure_queue), daemon=True)
+        for shard in _make_shards(stream_to_testers, workers)
+    ], failure_queue
+
+
+def _make_shards(stream_to_testers, workers):
+    """
+    _make_shards :: { stream: [fn] } -> Int -> [{ stream: [fn] }]
+
+    Split the given map into `workers` maps of (roughly) the same number of testers.
+    Empty shards are dropped.
+    """
+    shards = [{} for _ in range(workers)]
+    shard_sizes = [0] * workers
+
+    by_number_of_testers = sorted(stream_to_testers.items(), key=lambda item: -len(item[1]))
+    for stream, testers in by_number_of_testers:
+        smallest_shard = shard_sizes.index(min(shard_sizes))
+        shards[smallest_shard][stream] = testers
+        shard_sizes[smallest_shard] += len(testers)
+
+    return [shard for shard in shards if shard]
+
+
+def _run_worker(stream_to_testers, failure_queue):
+    _forward_notifications_to(failure_queue)
+
+    threads = threader.build_threads(stream_to_testers)
+    threader.launch_threads(threads)
+    for thread in threads:
+        thread.join()
+
+    failure_queue.put((_WORKER_DONE, os.getpid()))
+
+
+def _forward_notifications_to(failure_queue):
+    """
+    Replace the integration subjects of every registered test with a forwarder, so that
+    failures are sent to the parent process instead of being notified from the worker.
+
+    Notifications are throttled by the parent, which sees the failures of all workers.
+    """
+    integrations.throttle = None
+    for test_name, registration in integrations.registered_integrations.items():
+        registration['integrations'] = [_QueueForwarder(test_name, failure_queue)]
+
+
+def launch_workers(workers, failure_queue):
+    """
+    launch_workers :: ([multiprocessing.Process], multiprocessing.Queue) -> IO
+
+    Start all the given workers, and notify the failures they send back to the loaded
+    integrations of this process, until all of them are done.
+
+    Workers dying before they are done (killed, or crashed) are logged, and counted as done,
+    once everything they sent has been notified.
+    """
+    for worker in workers:
+        worker.start()
+
+    running_workers = {worker.pid: worker for worker in workers}
+    while running_workers:
+        try:
+            notification = failure_queue.get(timeout=WORKER_CHECK_INTERVAL)
+        except queue.Empty:
+            _forget_dead_workers(running_workers, failure_queue)
+            continue
+
+        _handle_notification(notification, running_workers)
+
+    for worker in workers:
+        worker.join()
+
+
+def _handle_notification(notification, running_workers):
+    if notification[0] is _WORKER_DONE:
+        running_workers.pop(notification[1], None)
+        return
+
+    test_name, payload, error = notification
+    integrations._notify_integrations(test_name, payload, error=error)
+
+
+def _forget_dead_workers(running_workers, failure_queue):
+    """
+    Stop waiting for the workers which are not alive anymore. What they sent before exiting
+    is already in the queue, so it's notified first: those which exited normally are found done.
+    """
+    dead_workers = [worker for worker in running_workers.values() if not worker.is_alive()]
+    if not dead_workers:
+        return
+
+    while True:
+        try:
+            notification = failure_queue.get_nowait()
+        except queue.Empty:
+            break
+        _handle_notification(notification, running_workers)
+
+    for worker in dead_workers:
+        if running_workers.pop(worker.pid, None) is not None:
+            logger.error("Worker {} exited with code {} before finishing its streams".format(worker.pid, worker.exitcode))
+
+
+class _QueueForwarder:
+    def __init__(self, test_name, failure_queue):
+        self._test_name = test_name
+        self._failure_queue = failure_queue
+
+    def on_next(self, payload):
+        self._failure_queue.put((self._test_name, payload, False))
+
+    def on_error(self, payload):
+        self._failure_queue.put((self._test_name, payload, True))
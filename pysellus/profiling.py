@@ -0,0 +1,206 @@
+import signal
+import atexit
+import pstats
+import logging
+import cProfile
+import threading
+from functools import wraps
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# threads are only profiled once profiling is enabled, see enable
+enabled = False
+
+# where profiles are written, see dump
+output_path = None
+
+""" { thread_name: cProfile.Profile } """
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+_dump_lock = threading.Lock()
+
+
+def enable(path, dump_signal=getattr(signal, 'SIGUSR1', None)):
+    """
+    enable :: String -> signal.Signals | None -> IO
+
+    Profile every thread built from now on (see profiled), and write the profiles to
+    the given path (see dump) when the program exits, or when it receives the given signal.
+
+    Must be called from the main thread, for the signal handler to be installed.
+    """
+    global enabled, output_path
+
+    enabled = True
+    output_path = path
+
+    atexit.register(dump)
+    if dump_signal is not None:
+        signal.signal(dump_signal, lambda signal_number, frame: dump())
+
+
+def profiled(target, name):
+    """
+    profiled :: fn -> String -> fn
+
+    If profiling is enabled, return a function running the given thread target under its own
+    profiler, kept under the given name. Otherwise, return the target as is.
+    """
+    if not enabled:
+        return target
+
+    @wraps(target)
+    def run_profiled(*args, **kwargs):
+        profile = cProfile.Profile()
+        with _profiles_lock:
+            _profiles[name] = profile
+
+        try:
+            profile.enable()
+        except ValueError:
+            # since python 3.12, a single profiler sees every thread, so the one running
+            # already is profiling this thread too
+            _warn_about_shared_profiler()
+            return target(*args, **kwargs)
+
+        try:
+            return target(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    return run_profiled
+
+
+_warned_about_shared_profiler = False
+
+
+def _warn_about_shared_profiler():
+    global _warned_about_shared_profiler
+
+    if not _warned_about_shared_profiler:
+        _warned_about_shared_profiler = True
+        logger.warning("This python version can't profile threads separately: "
+                       "per-stream times include every thread")
+
+
+def dump():
+    """
+    dump :: -> IO
+
+    Write the merged profiles of all threads so far, in the pstats format, to the output path,
+    and a report of the time spent per test, stream and integration next to it, with a `.txt`
+    extension (see report). Threads keep being profiled.
+    """
+    with _dump_lock:
+        with _profiles_lock:
+            thread_stats = {name: _snapshot(profile) for name, profile in _profiles.items()}
+
+        thread_stats = {name: stats for name, stats in thread_stats.items() if stats is not None}
+        if not thread_stats:
+            return
+
+        merged_stats = pstats.Stats()
+        merged_stats.add(*thread_stats.values())
+        merged_stats.dump_stats(output_path)
+
+        with open(output_path + '.txt', 'w') as report_file:
+            report_file.write(report(merged_stats, thread_stats))
+
+        logger.info("Wrote profile to {0} and report to {0}.txt".format(output_path))
+
+
+def _snapshot(profile):
+    """
+    Build the stats of the given profile so far, without stopping it
+    (pstats.Stats(profile) would disable it)
+    """
+    profile.snapshot_stats()
+    if not profile.stats:
+        return None
+
+    return pstats.Stats(_ProfileSnapshot(dict(profile.stats)))
+
+
+class _ProfileSnapshot:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def report(merged_stats, thread_stats):
+    """
+    report :: pstats.Stats -> { String: pstats.Stats } -> String
+
+    Report, in plain text:
+        - the calls and cumulative time of every tester, grouped by test name
+        - the total time spent in every profiled thread (streams, stream queues, dispatchers)
+        - the calls and cumulative time of the notification handlers of every integration
+    """
+    lines = ['Testers, by test:']
+    for test_name, testers in sorted(_get_testers_by_test().items()):
+        lines.append('  {}'.format(test_name))
+        for tester in testers:
+            lines.append('    ' + _format_function_stats(tester.__name__, merged_stats, tester))
+
+    lines.append('')
+    lines.append('Threads:')
+    for name, stats in sorted(thread_stats.items()):
+        lines.append('  {}: {:.3f}s'.format(name, stats.total_tt))
+
+    lines.append('')
+    lines.append('Integrations:')
+    for alias, integration in sorted(_get_built_integrations().items()):
+        for handler_name in ('on_next', 'on_error'):
+            handler = getattr(type(integration), handler_name, None)
+            if handler is None:
+                continue
+
+            lines.append('  ' + _format_function_stats(
+                '{} ({}.{})'.format(alias, type(integration).__name__, handler_name),
+                merged_stats,
+                handler
+            ))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _format_function_stats(label, stats, function):
+    code = getattr(function, '__code__', None)
+    if code is None:
+        return '{}: not profiled'.format(label)
+
+    key = (code.co_filename, code.co_firstlineno, code.co_name)
+    if key not in stats.stats:
+        return '{}: never called'.format(label)
+
+    primitive_calls, calls, total_time, cumulative_time, callers = stats.stats[key]
+    return '{}: {} calls, {:.6f}s cumulative, {:.1f}us per call'.format(
+        label, calls, cumulative_time, cumulative_time / calls * 1e6 if calls else 0.0
+    )
+
+
+def _get_testers_by_test():
+    # imported here, since both modules use this one
+    from pysellus import registrar
+
+    testers_by_test = defaultdict(list)
+    for testers in registrar.stream_to_testers.values():
+        for wrapped_tester in testers:
+            tester = getattr(wrapped_tester, 'tester', wrapped_tester)
+            if tester not in testers_by_test[getattr(wrapped_tester, 'test_name', None)]:
+                testers_by_test[getattr(wrapped_tester, 'test_name', None)].append(tester)
+
+    return testers_by_test
+
+
+def _get_built_integrations():
+    from pysellus import integrations
+
+    loaded_integrations = integrations.loaded_integrations
+    is_built = getattr(loaded_integrations, 'is_built', lambda alias: True)
+
+    return {alias: loaded_integrations[alias] for alias in list(loaded_integrations) if is_built(alias)}
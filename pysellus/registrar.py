@@ -1,27 +1,145 @@
+import sys
+import time
 import inspect
+import logging
 from functools import partial
+from contextlib import contextmanager
 
-from pysellus import integrations
+from pysellus import integrations, batching, metrics, sampling
+from pysellus.payload import FailurePayload
+
+logger = logging.getLogger(__name__)
 
 stream_to_testers = {}
 
+""" { setup_functions: Int, testers: Int, streams: Int, seconds: Float } """
+registration_report = {}
+
+# name of the setup function being run by `register`, see _running_setup_function
+_current_test_name = None
+
+""" { (rx.Observable, Int, Float | None): rx.Observable } """
+_batched_streams = {}
+
+# above this many, fused testers are split across several generated functions, see fuse_testers
+FUSED_TESTERS_PER_FUNCTION = 256
+
 
 def register(function_list):
+    """
+    register :: [fn] -> { rx.Observable: [fn] }
+
+    Call every setup function in the given list, so that they register their testers
+    through `expect`, and return the resulting map of streams to testers.
+
+    Store how long registration took in registration_report, and log it.
+
+    """
+    start = time.perf_counter()
+
+    setup_functions = 0
     for fn in function_list:
-        fn()
+        with _running_setup_function(fn):
+            fn()
+        setup_functions += 1
+
+    registration_report.update(
+        setup_functions=setup_functions,
+        testers=sum(len(testers) for testers in stream_to_testers.values()),
+        streams=len(stream_to_testers),
+        seconds=time.perf_counter() - start
+    )
+    logger.info(
+        "Registered {testers} testers on {streams} streams from {setup_functions} "
+        "setup functions in {seconds:.3f}s".format(**registration_report)
+    )
+
     return stream_to_testers
 
 
-def expect(stream):
+def replace_tests(test_names, function_list):
     """
-    expect :: rx.Observable -> ([(Any -> Boolean)] -> IO)
+    replace_tests :: [String] -> [fn] -> ([(rx.Observable, fn)], [(rx.Observable, fn)])
+
+    Replace the testers registered by the given tests with the ones registered by the given
+    setup functions (see register), and return the removed testers and the added ones,
+    along with their streams. Streams left without testers are removed.
+
+    If a setup function raises, nothing is replaced.
+
+    """
+    previous_stream_to_testers = {stream: list(testers) for stream, testers in stream_to_testers.items()}
+
+    try:
+        register(function_list)
+    except Exception:
+        stream_to_testers.clear()
+        stream_to_testers.update(previous_stream_to_testers)
+        raise
+
+    added_testers = [
+        (stream, tester)
+        for stream, testers in stream_to_testers.items()
+        for tester in testers
+        if tester not in previous_stream_to_testers.get(stream, [])
+    ]
+    removed_testers = [
+        (stream, tester)
+        for stream, testers in previous_stream_to_testers.items()
+        for tester in testers
+        if getattr(tester, 'test_name', None) in test_names
+    ]
+
+    for stream, tester in removed_testers:
+        stream_to_testers[stream].remove(tester)
+        if not stream_to_testers[stream]:
+            del stream_to_testers[stream]
+
+    return removed_testers, added_testers
+
+
+@contextmanager
+def _running_setup_function(setup_function):
+    """
+    Set the name of the given setup function as the name of the test being registered,
+    for as long as the context lasts (see expect)
+
+    """
+    global _current_test_name
+
+    _current_test_name = setup_function.__name__
+    try:
+        yield
+    finally:
+        _current_test_name = None
+
+
+def expect(stream, batch=None, batch_wait=None, sample=None, sample_key=None):
+    """
+    expect :: rx.Observable -> Int | None -> Float | None -> Float | None -> String | (Any -> Any) | None -> ([(Any -> Boolean)] -> IO)
 
     Given an observable, return a function that takes a function tuple, and maps them
 
-    Store our caller function name for future use (see _get_name_of_expect_caller)
+    If a batch size is given, every tester receives chunks of that many elements
+    instead of single elements (see batching#vectorized). Testers marked with
+    batching#vectorized are always run in batch mode. Chunks which don't fill up are tested
+    anyway `batch_wait` seconds after their first element (by default, the wait the tester
+    was marked with, or batching#DEFAULT_BATCH_WAIT).
+
+    If a sampling rate is given, the testers only check that fraction of the elements, chosen
+    at random or by the hash of the given key (see sampling#make_sampler). Otherwise, the
+    sampling rate of the test is used, if any (see integrations#on_failure).
+
+    The test name is the name of the setup function being run by `register`. If called
+    outside of `register`, use our caller function name (see _get_name_of_expect_caller)
 
     """
-    test_name = _get_name_of_expect_caller()
+    test_name = _current_test_name or _get_name_of_expect_caller()
+    test_description = _get_test_description(test_name)
+    if sample is None and sample_key is None:
+        sampler = _get_test_sampler(test_name)
+    else:
+        sampler = sampling.make_sampler(sample, sample_key)
 
     def tests_registrar(*testers):
         """
@@ -36,94 +154,294 @@ def expect(stream):
         This function takes an element, and performs a check on it. If the test returns false,
         send a message to the appropiate integration (see integrations#notify_{message,error})
 
+        Testers defined with `async def` get a wrapper coroutine function instead.
+
         """
         for tester in testers:
-            _register_tester_for_stream(
-                stream,
-                partial(_on_failure_wrapper, test_name, tester)
-            )
+            batch_size = batch or batching.batch_size_of(tester)
+            if batch_size:
+                wait = batch_wait if batch_wait is not None else batching.batch_wait_of(tester)
+                _register_tester_for_stream(
+                    _get_batched_stream(stream, batch_size, wait),
+                    _wrap_tester(_on_batch_failure_wrapper, test_name, test_description, tester, sampler)
+                )
+            elif inspect.iscoroutinefunction(tester):
+                _register_tester_for_stream(
+                    stream,
+                    _wrap_tester(_on_async_failure_wrapper, test_name, test_description, tester, sampler)
+                )
+            else:
+                _register_tester_for_stream(
+                    stream,
+                    _wrap_tester(_on_failure_wrapper, test_name, test_description, tester, sampler)
+                )
 
     return tests_registrar
 
 
-def _on_failure_wrapper(test_name, tester, element):
+def _wrap_tester(wrapper, test_name, test_description, tester, sampler=None):
+    """
+    _wrap_tester :: fn -> String -> String -> fn -> sampling.Sampler | None -> fn
+
+    Bind the given wrapper function to a test and a tester, and to a sampler, if any.
+
+    The returned function also keeps the test name and the original tester as attributes,
+    so that execution engines can inspect them (see async_engine#blocking)
+
     """
-    Given a test name, a tester, and an element, wrap the tester call
-    with the given element in a try-except block. Whenever the test fails,
+    if sampler is None:
+        wrapped_tester = partial(wrapper, test_name, test_description, tester.__name__, tester)
+    else:
+        wrapped_tester = partial(wrapper, test_name, test_description, tester.__name__, tester, sampler=sampler)
+    wrapped_tester.test_name = test_name
+    wrapped_tester.tester = tester
+
+    return wrapped_tester
+
+
+def _on_failure_wrapper(test_name, test_description, tester_name, tester, element, sampler=None):
+    """
+    Given a test name, its description, a tester and its name, and an element, wrap the tester
+    call with the given element in a try-except block. Whenever the test fails,
     or an exception occurs, notify the assigned subject of it, including
     the test name where it failed.
 
+    The payload is only built when something has to be notified; the description and the
+    tester name are resolved once, at registration time (see expect)
+
+    Tester latency, failures and errors are recorded if metrics are enabled (see metrics#time_tester)
+
+    If a sampler is given, elements it doesn't accept are skipped, and notified payloads carry
+    its sampling rate (see sampling#Sampler). Elements it can't decide on (lacking their
+    sampling key, for instance) are notified as tester errors
+
     TODO: Add _on_match_wrapper, like `if tester(element)`
           Also, the description of the payload message should change
 
     """
-
-    payload_message = _make_message_payload(
-        integrations.registered_integrations[test_name]['test_description'],
-        tester.__name__,
-        element
-    )
     try:
-        if not tester(element):
-            integrations.notify_element(test_name, payload_message)
+        if sampler is not None and not sampler.accepts(element):
+            return
+
+        if not metrics.time_tester(test_name, tester_name, tester, element):
+            _notify_failure(test_name, test_description, tester_name, element, sampler)
     except Exception as e:
         # In theory, no exception happening above could crash the application,
         # so, again, in _theory_, this should be safe.
 
         # Catch any errors that could happen inside the tester, and send that to
         # whoever is interested in the result
-        payload_message['error'] = e
-        integrations.notify_error(test_name, payload_message)
+        _notify_tester_error(test_name, test_description, tester_name, element, e, sampler)
 
 
-def _get_name_of_expect_caller():
+def _notify_failure(test_name, test_description, tester_name, element, sampler=None):
+    metrics.record_tester_failure(test_name, tester_name)
+    integrations.notify_element(
+        test_name,
+        _make_message_payload(test_name, test_description, tester_name, element, sampler)
+    )
+
+
+def _notify_tester_error(test_name, test_description, tester_name, element, error, sampler=None):
+    metrics.record_tester_error(test_name, tester_name)
+    payload_message = _make_message_payload(test_name, test_description, tester_name, element, sampler)
+    payload_message['error'] = error
+    integrations.notify_error(test_name, payload_message)
+
+
+async def _on_async_failure_wrapper(test_name, test_description, tester_name, tester, element, sampler=None):
     """
-    _get_name_of_expect_caller :: -> String
+    Same as _on_failure_wrapper, for testers defined with `async def`
 
-    Get the function name of the caller to the `expect` function
+    """
+    try:
+        if sampler is not None and not sampler.accepts(element):
+            return
 
-    Note: This function should only be called inside the `expect` function. Any other use can not
-    be guaranteed to work
+        if not await metrics.time_async_tester(test_name, tester_name, tester, element):
+            _notify_failure(test_name, test_description, tester_name, element, sampler)
+    except Exception as e:
+        _notify_tester_error(test_name, test_description, tester_name, element, e, sampler)
+
+
+def _on_batch_failure_wrapper(test_name, test_description, tester_name, tester, elements, sampler=None):
+    """
+    Given a test name, its description, a batch tester and its name, and a list of elements,
+    build a chunk out of the elements and give it to the tester. Notify the assigned subject
+    of every element whose entry in the returned mask is false.
+
+    If the tester raises, or returns a malformed mask, notify the error along
+    with the whole list of elements.
+
+    If a sampler is given, only the elements it accepts make it into the chunk.
+
+    """
+    try:
+        if sampler is not None:
+            elements = [element for element in elements if sampler.accepts(element)]
+            if not elements:
+                return
+
+        positions = batching.failing_positions(
+            metrics.time_tester(test_name, tester_name, tester, batching.make_chunk(elements)),
+            len(elements)
+        )
+    except Exception as e:
+        _notify_tester_error(test_name, test_description, tester_name, elements, e, sampler)
+        return
+
+    for position in positions:
+        _notify_failure(test_name, test_description, tester_name, elements[position], sampler)
+
+
+def fuse_testers(testers, adapt=lambda tester: tester):
+    """
+    fuse_testers :: [fn] -> (fn -> fn) -> (Any -> IO)
+
+    Generate a single function giving an element to every one of the given testers, in order,
+    so that a stream can call it once per element instead of calling every tester separately.
+
+    Testers wrapped by _on_failure_wrapper are inlined: the generated function calls the
+    original tester inside its own try-except block, and notifies failures and errors exactly
+    like the wrapper would, skipping the elements its sampler doesn't accept. Any other tester
+    (async or batch testers, or testers timed by metrics, see metrics#time_tester) is adapted
+    with the given function and called as it is.
+
+    Past FUSED_TESTERS_PER_FUNCTION testers, the generated code is split into several functions,
+    called one after the other, to keep each of them reasonably small.
+    """
+    if len(testers) > FUSED_TESTERS_PER_FUNCTION:
+        return _fuse_functions([
+            fuse_testers(testers[start:start + FUSED_TESTERS_PER_FUNCTION], adapt)
+            for start in range(0, len(testers), FUSED_TESTERS_PER_FUNCTION)
+        ])
+
+    namespace = {}
+    lines = ['def fused_testers(element):']
+    for index, tester in enumerate(testers):
+        if _can_inline(tester):
+            test_name, test_description, tester_name, original_tester = tester.args
+            sampler = tester.keywords.get('sampler')
+            namespace['tester_{}'.format(index)] = original_tester
+            namespace['on_failure_{}'.format(index)] = partial(
+                _notify_failure, test_name, test_description, tester_name, sampler=sampler
+            )
+            namespace['on_error_{}'.format(index)] = partial(
+                _notify_tester_error, test_name, test_description, tester_name, sampler=sampler
+            )
+            if sampler is not None:
+                namespace['accepts_{}'.format(index)] = sampler.accepts
+                check = '    if accepts_{0}(element) and not tester_{0}(element):'
+            else:
+                check = '    if not tester_{0}(element):'
+            lines += ['    ' + line.format(index) for line in [
+                'try:',
+                check,
+                '        on_failure_{0}(element)',
+                'except Exception as error:',
+                '    on_error_{0}(element, error)'
+            ]]
+        else:
+            namespace['tester_{}'.format(index)] = adapt(tester)
+            lines.append('    tester_{}(element)'.format(index))
+
+    if not testers:
+        lines.append('    pass')
+
+    exec(compile('\n'.join(lines), '<fused testers>', 'exec'), namespace)
+
+    return namespace['fused_testers']
+
+
+def _can_inline(tester):
+    return isinstance(tester, partial) and tester.func is _on_failure_wrapper and not metrics.enabled
+
+
+def _fuse_functions(functions):
+    def fused_functions(element):
+        for function in functions:
+            function(element)
 
-    The stack is a list of frame records. The first entry in it represents the caller,
-    the last entry represents the outermost call on the stack.
+    return fused_functions
 
-    As we want the parent of expect, we should get the fourth element of the stack
 
-    Each frame record  is a tuple of six items: the frame object (0), the filename (1),
-    the line number of the current line (2), the function name (3), a list of lines of context
-    from the source code (4), and the index of the current line within that list (5).
+def _get_test_description(test_name):
+    """
+    _get_test_description :: String -> String
+
+    Get the description registered for the given test name (see integrations#on_failure)
 
-    We want to get the function name, so we will get the [3] element
+    If the test has not been registered, fall back to its name
+
+    """
+    try:
+        return integrations.registered_integrations[test_name]['test_description']
+    except KeyError:
+        return test_name
 
-    Most of this is taken from the docs,
-    see https://docs.python.org/3/library/inspect.html#the-interpreter-stack
 
+def _get_test_sampler(test_name):
     """
-    # Magic. Do not touch.
-    distance_to_setup_function = sum([
-        # at the moment, the call stack looks something like this
-        # ... more frames
-        1,  # call to `pscheck_` function, whose name we want to retrieve
-        1,  # call to `expect`
-        1,  # call to this function, `_get_name_of_expect_caller`
-    ]) - 1  # stack is 0-indexed
+    _get_test_sampler :: String -> sampling.Sampler | None
+
+    Get the sampler registered for the given test name (see integrations#on_failure), if any
 
-    return inspect.stack()[distance_to_setup_function][3]
+    """
+    return integrations.registered_integrations.get(test_name, {}).get('sampler')
 
 
-def _make_message_payload(test_name, tester_name, element):
+def _get_batched_stream(stream, batch_size, batch_wait=batching.DEFAULT_BATCH_WAIT):
     """
-    _make_message_payload :: String -> String -> Any -> {}
+    _get_batched_stream :: rx.Observable -> Int -> Float | None -> rx.Observable
+
+    Given an Observable, a batch size and a batch wait, return an Observable emitting lists of
+    up to `batch_size` elements of the original one (see batching#buffer_with_wait).
 
-    Create a message payload dictionary with the supplied arguments
+    The same batched Observable is returned for the same stream, size and wait, so that all
+    batch testers on it share a single subscription (see threader#build_threads)
 
     """
-    return {
-        'test_name': test_name,
-        'expect_function': tester_name,
-        'element': element
-    }
+    key = (stream, batch_size, batch_wait)
+    if key not in _batched_streams:
+        _batched_streams[key] = stream.let(lambda observable: batching.buffer_with_wait(observable, batch_size, batch_wait))
+
+    return _batched_streams[key]
+
+
+def _get_name_of_expect_caller():
+    """
+    _get_name_of_expect_caller :: -> String
+
+    Get the function name of the caller to the `expect` function
+
+    Note: This function should only be called inside the `expect` function. Any other use can not
+    be guaranteed to work
+
+    Only the frame we need is looked up: unlike `inspect.stack`, this builds no frame records and
+    reads no source lines from disk.
+
+    """
+    # at the moment, the call stack looks something like this
+    # ... more frames
+    # 2: call to `pscheck_` function, whose name we want to retrieve
+    # 1: call to `expect`
+    # 0: call to this function, `_get_name_of_expect_caller`
+    return sys._getframe(2).f_code.co_name
+
+
+def _make_message_payload(test_name, test_description, tester_name, element, sampler=None):
+    """
+    _make_message_payload :: String -> String -> String -> Any -> sampling.Sampler | None -> FailurePayload
+
+    Create a message payload with the supplied arguments, along with the sampling rate of the
+    given sampler, if any
+
+    """
+    payload = FailurePayload(test_description, tester_name, element, test_function=test_name)
+    if sampler is not None:
+        payload.sampling_rate = sampler.rate
+
+    return payload
 
 
 def _register_tester_for_stream(stream, tester):
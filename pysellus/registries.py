@@ -0,0 +1,169 @@
+import threading
+from functools import partial
+from importlib import import_module
+from collections.abc import MutableMapping
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:
+    entry_points = None
+
+
+class LazyClassRegistry(MutableMapping):
+    """
+    Maps names to classes, importing the module of each class the first time it is asked for.
+
+    Classes are found, in order:
+        - among the classes set on the registry
+        - among the given class paths, of the form 'package.module:ClassName', and the classes
+          defined later on (see define)
+        - among the entry points of the given group, which installed packages can declare
+          to provide their own classes
+
+    Checking whether a name is in the registry doesn't import anything.
+    """
+    def __init__(self, class_paths=None, entry_point_group=None):
+        self._class_loaders = {
+            name: partial(_import_from_path, class_path)
+            for name, class_path in (class_paths or {}).items()
+        }
+        self._entry_point_group = entry_point_group
+        self._entry_points = None
+        self._classes = {}
+        self._lock = threading.RLock()
+
+    def define(self, name, class_loader):
+        """
+        define :: String -> (-> python.ClassObject) -> IO
+
+        Get the class with the given name by calling the given function,
+        the first time it is asked for
+        """
+        with self._lock:
+            self._classes.pop(name, None)
+            self._class_loaders[name] = class_loader
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._classes:
+                self._classes[name] = self._import_class(name)
+
+            return self._classes[name]
+
+    def __setitem__(self, name, classobject):
+        with self._lock:
+            self._classes[name] = classobject
+
+    def __delitem__(self, name):
+        with self._lock:
+            if name not in self._classes and name not in self._class_loaders:
+                raise KeyError(name)
+
+            self._classes.pop(name, None)
+            self._class_loaders.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._classes or name in self._class_loaders or name in self._get_entry_points()
+
+    def __iter__(self):
+        names = list(self._classes)
+        names += [name for name in self._class_loaders if name not in self._classes]
+        names += [name for name in self._get_entry_points() if name not in names]
+
+        return iter(names)
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def _import_class(self, name):
+        if name in self._class_loaders:
+            return self._class_loaders[name]()
+
+        entry_point = self._get_entry_points().get(name)
+        if entry_point is None:
+            raise KeyError(name)
+
+        return entry_point.load()
+
+    def _get_entry_points(self):
+        """
+        Entry points are only looked up once, and only when a name isn't found otherwise,
+        since that means reading the metadata of every installed package
+        """
+        if self._entry_points is None:
+            self._entry_points = _find_entry_points(self._entry_point_group)
+
+        return self._entry_points
+
+
+def _import_from_path(class_path):
+    module_name, _, class_name = class_path.partition(':')
+    return getattr(import_module(module_name), class_name)
+
+
+def _find_entry_points(group):
+    if group is None or entry_points is None:
+        return {}
+
+    try:
+        group_entry_points = entry_points(group=group)
+    except TypeError:
+        # before python 3.10, entry points are grouped in a dict
+        group_entry_points = entry_points().get(group, [])
+
+    return {entry_point.name: entry_point for entry_point in group_entry_points}
+
+
+class LazyInstanceRegistry(MutableMapping):
+    """
+    Maps names to instances, which are built by calling their factory (see define)
+    the first time they are asked for. Instances can also be set directly.
+    """
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def define(self, name, factory):
+        """
+        define :: String -> (-> Any) -> IO
+
+        Build the instance with the given name by calling the given factory,
+        the first time it is asked for
+        """
+        with self._lock:
+            self._instances.pop(name, None)
+            self._factories[name] = factory
+
+    def is_built(self, name):
+        return name in self._instances
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+                del self._factories[name]
+
+            return self._instances[name]
+
+    def __setitem__(self, name, instance):
+        with self._lock:
+            self._factories.pop(name, None)
+            self._instances[name] = instance
+
+    def __delitem__(self, name):
+        with self._lock:
+            if name not in self._instances and name not in self._factories:
+                raise KeyError(name)
+
+            self._instances.pop(name, None)
+            self._factories.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._instances or name in self._factories
+
+    def __iter__(self):
+        return iter(list(self._instances) + list(self._factories))
+
+    def __len__(self):
+        return len(self._instances) + len(self._factories)
@@ -0,0 +1,72 @@
+import random
+from hashlib import blake2b
+from operator import itemgetter
+
+# sampling keys are hashed to this many bytes, see Sampler._accepts_by_key
+_KEY_HASH_BYTES = 8
+
+
+def make_sampler(rate=None, key=None):
+    """
+    make_sampler :: Float | None -> String | (Any -> Any) | None -> Sampler | None
+
+    Build a sampler for the given rate and key (see Sampler), or return None if every element
+    should be tested (no rate, or a rate of 1).
+
+    Raise ValueError if the rate is not within (0, 1], or if a key is given without a rate
+    """
+    if rate is None:
+        if key is not None:
+            raise ValueError("A sampling key needs a sampling rate")
+        return None
+
+    if not 0 < rate <= 1:
+        raise ValueError("Sampling rates must be greater than 0, and at most 1, got {!r}".format(rate))
+
+    if rate == 1:
+        return None
+
+    return Sampler(rate, key)
+
+
+class Sampler:
+    """
+    Decides which elements of a stream a sampled tester gets to check.
+
+    Given a key, the decision is deterministic: an element is checked if the hash of its key
+    falls within the sampling rate, so that all elements sharing a key (the same user, the same
+    request...) are either all checked or all skipped, in every run and in every process.
+    The key can be the name of an item of the elements (`'user_id'`), or a function returning it.
+
+    Without a key, each element is checked with probability `rate`.
+    """
+    def __init__(self, rate, key=None):
+        self.rate = rate
+        self.key = itemgetter(key) if isinstance(key, str) else key
+        self._threshold = int(rate * 2 ** (8 * _KEY_HASH_BYTES))
+
+        if self.key is None:
+            self.accepts = self._accepts_at_random
+        else:
+            self.accepts = self._accepts_by_key
+
+    def _accepts_at_random(self, element):
+        return random.random() < self.rate
+
+    def _accepts_by_key(self, element):
+        digest = blake2b(_to_bytes(self.key(element)), digest_size=_KEY_HASH_BYTES).digest()
+        return int.from_bytes(digest, 'big') < self._threshold
+
+    def __repr__(self):
+        return '{}(rate={!r})'.format(type(self).__name__, self.rate)
+
+
+def _to_bytes(key):
+    """
+    Stable across processes, unlike `hash`, which is salted for strings
+    """
+    if isinstance(key, bytes):
+        return key
+    if isinstance(key, str):
+        return key.encode('utf-8')
+    return repr(key).encode('utf-8')
@@ -0,0 +1,60 @@
+import threading
+from functools import wraps
+
+from rx.concurrency.currentthreadscheduler import CurrentThreadScheduler
+
+# the trampolines of the threads which own one, see own_trampoline
+_trampolines = threading.local()
+
+
+def own_trampoline():
+    """
+    own_trampoline :: -> IO
+
+    Give the calling thread a trampoline of its own for the work Rx schedules on the current
+    thread, instead of the one Rx 1.2 shares between all threads.
+
+    With the shared trampoline, while a never-ending source (a followed file, a poller...) is
+    subscribed on a thread, the elements of every stream subscribed on any other thread are
+    queued behind it, and never emitted. Both engines subscribe each stream from a thread of
+    their own, so they call this from those threads (see with_own_trampoline): other threads,
+    including the ones of any other code using Rx in the process, keep the shared trampoline.
+    """
+    _install_trampoline_lookup()
+    _trampolines.owned = True
+
+
+def with_own_trampoline(function):
+    """
+    with_own_trampoline :: fn -> fn
+
+    Wrap the given thread target, so that its thread owns a trampoline (see own_trampoline)
+    """
+    @wraps(function)
+    def function_with_own_trampoline(*args, **kwargs):
+        own_trampoline()
+        return function(*args, **kwargs)
+
+    return function_with_own_trampoline
+
+
+def _install_trampoline_lookup():
+    """
+    Make CurrentThreadScheduler look up the trampoline of the current thread, if it owns one,
+    and the shared one otherwise. Safe to call more than once.
+    """
+    if isinstance(CurrentThreadScheduler.__dict__.get('queue'), property):
+        return
+
+    def get_queue(scheduler):
+        if getattr(_trampolines, 'owned', False):
+            return getattr(_trampolines, 'queue', None)
+        return scheduler.__dict__.get('queue')
+
+    def set_queue(scheduler, queue):
+        if getattr(_trampolines, 'owned', False):
+            _trampolines.queue = queue
+        else:
+            scheduler.__dict__['queue'] = queue
+
+    CurrentThreadScheduler.queue = property(get_queue, set_queue)
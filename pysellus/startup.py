@@ -0,0 +1,80 @@
+import time
+from contextlib import contextmanager
+
+from pysellus import loader, registrar, integrations, integration_config
+
+CONFIG_PHASE = 'integration config'
+TEST_FILES_PHASE = 'test files'
+REGISTRATION_PHASE = 'registration'
+
+""" [(phase_name, seconds)] """
+phases = []
+
+
+@contextmanager
+def phase(name):
+    """
+    phase :: String -> ContextManager
+
+    Record how long the context took, as a startup phase with the given name (see report)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, time.perf_counter() - start))
+
+
+def report(slowest_modules=20):
+    """
+    report :: Int -> String
+
+    Report, in plain text, how long every startup phase took, with the breakdowns recorded by
+    integration_config#load_integrations, loader#load_test_files and registrar#register,
+    the time spent building every integration, and the given number of slowest test modules
+    to import.
+    """
+    lines = ['Startup: {:.3f}s'.format(sum(seconds for _, seconds in phases))]
+    for name, seconds in phases:
+        lines.append('  {}: {:.3f}s'.format(name, seconds))
+        lines += ['    ' + detail for detail in _get_phase_details(name)]
+
+    if integrations.integration_build_seconds:
+        lines.append('')
+        lines.append('Integrations built:')
+        for alias, seconds in _slowest_first(integrations.integration_build_seconds):
+            lines.append('  {:.3f}s  {}'.format(seconds, alias))
+
+    if loader.module_import_seconds:
+        lines.append('')
+        lines.append('Slowest test modules to import ({} of {}):'.format(
+            min(slowest_modules, len(loader.module_import_seconds)),
+            len(loader.module_import_seconds)
+        ))
+        for module_name, seconds in _slowest_first(loader.module_import_seconds)[:slowest_modules]:
+            lines.append('  {:.3f}s  {}'.format(seconds, module_name))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _get_phase_details(name):
+    if name == CONFIG_PHASE and integration_config.load_report:
+        return ['YAML parse: {parse_seconds:.3f}s'.format(**integration_config.load_report)]
+
+    if name == TEST_FILES_PHASE and loader.load_report:
+        return [
+            '{files} files: discovery {discovery_seconds:.3f}s, compilation {compile_seconds:.3f}s, '
+            'import {import_seconds:.3f}s'.format(**loader.load_report)
+        ]
+
+    if name == REGISTRATION_PHASE and registrar.registration_report:
+        return [
+            '{testers} testers on {streams} streams from {setup_functions} setup functions'
+            .format(**registrar.registration_report)
+        ]
+
+    return []
+
+
+def _slowest_first(seconds_by_name):
+    return sorted(seconds_by_name.items(), key=lambda item: (-item[1], item[0]))
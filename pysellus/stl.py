@@ -0,0 +1,288 @@
+import os
+import re
+import sys
+import ast
+import marshal
+import hashlib
+from importlib.abc import Loader, MetaPathFinder
+from importlib.util import MAGIC_NUMBER, spec_from_file_location
+
+from pysellus import integrations, registrar, streams, files
+from pysellus.api_reader import APIReader
+
+STL_EXTENSION = '.stl'
+
+# bump whenever transpile output changes, so that cached code is compiled again
+STL_CACHE_VERSION = b'\x01'
+
+FAILURE_LINE = re.compile(r'^(?P<indent>\s*)@failure\b(?P<integrations>.*)$')
+CHECK_LINE = re.compile(r'^(?P<indent>\s*)@check\b(?P<description>.*):\s*$')
+INTEGRATION_NAME = re.compile(r'^[\w.-]+$')
+
+
+class STLSyntaxError(SyntaxError):
+    pass
+
+
+def transpile(source, filename='<stl>'):
+    """
+    transpile :: String -> String -> String
+
+    Translate the given STL source to Python.
+
+    Test cases are turned into setup functions:
+
+        @failure >> slack, terminal             @_pscheck('this is a test', 'slack', 'terminal')
+        @check 'this is a test':           =>   def pscheck_this_is_a_test():
+            expect(input)(is_positive)              expect(input)(is_positive)
+
+    Every other line is left as it is, and no line is added or removed, so that line numbers
+    in tracebacks point to the STL source.
+
+    Raises STLSyntaxError on malformed test cases.
+    """
+    lines = source.split('\n')
+    function_names = set()
+
+    # [(line_number, indent, [integration_name])] of the test case being read
+    failure_lines = []
+
+    for line_number, line in enumerate(lines, start=1):
+        failure_line = FAILURE_LINE.match(line)
+        if failure_line:
+            failure_lines.append((
+                line_number,
+                failure_line.group('indent'),
+                _parse_integration_names(failure_line.group('integrations'), filename, line_number, line)
+            ))
+            continue
+
+        check_line = CHECK_LINE.match(line)
+        if check_line:
+            if not failure_lines:
+                raise _syntax_error("'@check' without a '@failure' notification before it", filename, line_number, line)
+
+            description = _parse_description(check_line.group('description'), filename, line_number, line)
+            function_name = _make_function_name(description, line_number, function_names)
+
+            first_line_number, indent, _ = failure_lines[0]
+            lines[first_line_number - 1] = '{0}@_pscheck({1!r}, {2})'.format(
+                indent,
+                description,
+                ', '.join(repr(name) for _, _, names in failure_lines for name in names)
+            )
+            for other_line_number, _, _ in failure_lines[1:]:
+                lines[other_line_number - 1] = ''
+            lines[line_number - 1] = '{0}def {1}():'.format(check_line.group('indent'), function_name)
+
+            failure_lines = []
+            continue
+
+        if failure_lines and line.strip() and not line.strip().startswith('#'):
+            raise _syntax_error("'@failure' notification not followed by a '@check'", filename, line_number, line)
+
+    if failure_lines:
+        line_number = failure_lines[-1][0]
+        raise _syntax_error("'@failure' notification not followed by a '@check'",
+                            filename, line_number, lines[line_number - 1])
+
+    return '\n'.join(lines)
+
+
+def _parse_integration_names(text, filename, line_number, line):
+    text = text.strip()
+    if not text.startswith('>>'):
+        raise _syntax_error("expected '@failure >> integration'", filename, line_number, line)
+
+    integration_names = re.split(r'\s*(?:>>|,)\s*', text[2:].strip())
+    for name in integration_names:
+        if not INTEGRATION_NAME.match(name):
+            raise _syntax_error("invalid integration name '{}'".format(name), filename, line_number, line)
+
+    return integration_names
+
+
+def _parse_description(text, filename, line_number, line):
+    try:
+        description = ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError):
+        description = None
+
+    if not isinstance(description, str):
+        raise _syntax_error("the test description must be a string", filename, line_number, line)
+
+    return description
+
+
+def _make_function_name(description, line_number, function_names):
+    """
+    Name setup functions after their description, so that they are recognizable in stack traces
+    and logs (see registrar#_get_name_of_expect_caller)
+    """
+    slug = re.sub(r'\W+', '_', description).strip('_').lower()
+    function_name = 'pscheck_{}'.format(slug or line_number)
+    if function_name in function_names:
+        function_name = '{}_{}'.format(function_name, line_number)
+
+    function_names.add(function_name)
+    return function_name
+
+
+def _syntax_error(message, filename, line_number, line):
+    return STLSyntaxError(message, (filename, line_number, 1, line))
+
+
+def check(description, *integration_names):
+    """
+    check :: String -> [String] -> (fn -> fn)
+
+    Decorator for the setup functions of STL test cases: give the function the test
+    description as its docstring, then register it (see integrations#on_failure)
+    """
+    def decorator_of_setup_function(setup_function):
+        setup_function.__doc__ = description
+        return integrations.on_failure(*integration_names)(setup_function)
+
+    return decorator_of_setup_function
+
+
+def get_prelude():
+    """
+    get_prelude :: -> { String: Any }
+
+    The names available to every STL file without importing them
+    """
+    return {
+        '_pscheck': check,
+        'APIReader': APIReader,
+        'expect': registrar.expect,
+        'follow': files.follow,
+        'mapped_file': files.mapped_file,
+        'on_failure': integrations.on_failure,
+        'stream': streams.stream
+    }
+
+
+def compile_file(path):
+    """
+    compile_file :: String -> python.Code
+
+    Transpile and compile the given STL file, or load its code from the cache if the file
+    didn't change since it was last compiled.
+
+    Code is cached in the `__pycache__` directory next to the file, keyed by a hash of the
+    file contents, so touching a file without changing it doesn't compile it again.
+    """
+    with open(path, 'rb') as stl_file:
+        source = stl_file.read()
+
+    cache_path = get_cache_path(path)
+    header = _cache_header(source)
+
+    code = _read_cached_code(cache_path, header)
+    if code is not None:
+        return code
+
+    code = compile(transpile(source.decode('utf-8'), path), path, 'exec', dont_inherit=True)
+    _write_cached_code(cache_path, header, code)
+
+    return code
+
+
+def has_stale_cache(path):
+    """
+    has_stale_cache :: String -> Boolean
+
+    Whether the given STL file would have to be compiled again (see compile_file)
+    """
+    try:
+        with open(path, 'rb') as stl_file:
+            header = _cache_header(stl_file.read())
+        with open(get_cache_path(path), 'rb') as cache_file:
+            return cache_file.read(len(header)) != header
+    except OSError:
+        return True
+
+
+def get_cache_path(path):
+    directory, filename = os.path.split(path)
+    return os.path.join(
+        directory,
+        '__pycache__',
+        '{}.{}.pyc'.format(filename, sys.implementation.cache_tag)
+    )
+
+
+def _cache_header(source):
+    return MAGIC_NUMBER + STL_CACHE_VERSION + hashlib.sha1(source).digest()
+
+
+def _read_cached_code(cache_path, header):
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            data = cache_file.read()
+    except OSError:
+        return None
+
+    if not data.startswith(header):
+        return None
+
+    try:
+        return marshal.loads(data[len(header):])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_cached_code(cache_path, header, code):
+    # write to a temporary file first, so that concurrent readers never see a partial file
+    temporary_path = '{}.{}'.format(cache_path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temporary_path, 'wb') as cache_file:
+            cache_file.write(header + marshal.dumps(code))
+        os.replace(temporary_path, cache_path)
+    except OSError:
+        pass
+
+
+def install_import_hook():
+    """
+    install_import_hook :: -> IO
+
+    Make `.stl` files importable like python modules (see STLFinder). Safe to call more than once.
+    """
+    if not any(isinstance(finder, STLFinder) for finder in sys.meta_path):
+        sys.meta_path.append(STLFinder())
+
+
+class STLFinder(MetaPathFinder):
+    """
+    Finds `.stl` files on `sys.path` (or inside packages), when no python module with the same
+    name is found first
+    """
+    def find_spec(self, fullname, path=None, target=None):
+        filename = fullname.rpartition('.')[2] + STL_EXTENSION
+
+        for directory in (path if path is not None else sys.path):
+            candidate_path = os.path.join(directory or '.', filename)
+            if os.path.isfile(candidate_path):
+                return spec_from_file_location(fullname, candidate_path, loader=STLLoader(candidate_path))
+
+        return None
+
+
+class STLLoader(Loader):
+    def __init__(self, path):
+        self.path = path
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        code = compile_file(self.path)
+        module.__dict__.update(get_prelude())
+        exec(code, module.__dict__)
+
+    def get_source(self, fullname):
+        with open(self.path, 'r', encoding='utf-8') as stl_file:
+            return stl_file.read()
@@ -1,7 +1,12 @@
-from pysellus.stock_integrations import terminal, slack, trello
+from pysellus.registries import LazyClassRegistry
 
-stock_integration_classes = {
-    'terminal': terminal.TerminalIntegration,
-    'slack': slack.SlackIntegration,
-    'trello': trello.TrelloIntegration
-}
+# integration modules are only imported when an integration is used, so that a run that only
+# prints to the terminal doesn't pay for importing the HTTP clients of the others
+stock_integration_classes = LazyClassRegistry(
+    {
+        'terminal': 'pysellus.stock_integrations.terminal:TerminalIntegration',
+        'slack': 'pysellus.stock_integrations.slack:SlackIntegration',
+        'trello': 'pysellus.stock_integrations.trello:TrelloIntegration'
+    },
+    entry_point_group='pysellus.integrations'
+)
@@ -1,30 +1,37 @@
-import requests
-
+from pysellus import http_pool
 from pysellus.interfaces import AbstractIntegration
 
 
 class SlackIntegration(AbstractIntegration):
-    def __init__(self, url, channel=None):
+    def __init__(self, url, channel=None, http_client=None):
         self._url = url
         self._channel = channel
-        self._payload = {}
-        if self._channel:
-            self._payload['channel'] = self._channel
+        self._http_client = http_client if http_client is not None else http_pool.get_session()
 
     def on_next(self, element):
-        self._compose_on_next_message(element)
-        requests.post(self._url, json=self._payload)
+        self._http_client.post(self._url, json=self._compose_on_next_message(element))
 
     def on_error(self, element):
-        self._compose_on_error_message(element)
-        requests.post(self._url, json=self._payload)
+        self._http_client.post(self._url, json=self._compose_on_error_message(element))
 
     def on_completed(self):
-        self._payload['text'] = 'All tests run, out of data.\nAll done for now...'
-        requests.post(self._url, json=self._payload)
+        payload = self._new_payload()
+        payload['text'] = 'All tests run, out of data.\nAll done for now...'
+        self._http_client.post(self._url, json=payload)
+
+    def _new_payload(self):
+        """
+        Every message gets a payload of its own, as several dispatch workers may be sending
+        messages at once (see integrations#enable_dispatcher)
+        """
+        payload = {}
+        if self._channel:
+            payload['channel'] = self._channel
+        return payload
 
     def _compose_on_next_message(self, element):
-        self._payload['attachments'] = [{
+        payload = self._new_payload()
+        payload['attachments'] = [{
             'fallback': 'An error just error happened on {}'.format(element['test_name']),
             'pretext': 'An error just happened!',
 
@@ -34,9 +41,12 @@ class SlackIntegration(AbstractIntegration):
             'text': element['test_name'],
             'color': '#CF6160'
         }]
+        self._add_suppressed_count(payload, element)
+        return payload
 
     def _compose_on_error_message(self, element):
-        self._payload['attachments'] = [{
+        payload = self._new_payload()
+        payload['attachments'] = [{
             'fallback': 'And just exception happened on {}'.format(element['test_name']),
             'pretext': 'An exception just happened!',
 
@@ -46,3 +56,11 @@ class SlackIntegration(AbstractIntegration):
             'text': element['test_name'],
             'color': 'danger'
         }]
+        self._add_suppressed_count(payload, element)
+        return payload
+
+    def _add_suppressed_count(self, payload, element):
+        if 'suppressed' in element:
+            payload['attachments'][0]['footer'] = '{} similar notifications were suppressed'.format(
+                element['suppressed']
+            )
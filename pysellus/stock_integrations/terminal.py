@@ -1,24 +1,208 @@
+import sys
+import time
+import atexit
 import pprint
+import reprlib
+import threading
+from collections import Counter
 
 from pysellus.interfaces import AbstractIntegration
 
+MODES = ('full', 'summary')
+
 
 class TerminalIntegration(AbstractIntegration):
+    """
+    Prints failures to the terminal.
+
+    Output is buffered, and written once `buffer_size` characters are pending, or every
+    `flush_interval` seconds. Rendered elements longer than `max_element_length` characters
+    are truncated.
+
+    In summary mode, instead of printing every failure, the number of failures and errors of
+    each check is printed every `flush_interval` seconds, whenever it changes. Counts of sampled
+    checks come along with an estimate of the total (see sampling#Sampler).
+    """
+    def __init__(self, mode='full', buffer_size=8192, flush_interval=1.0, max_element_length=None, output=None):
+        if mode not in MODES:
+            raise ValueError("Unknown terminal mode '{}', must be one of: {}".format(mode, ', '.join(MODES)))
+
+        self._mode = mode
+        self._flush_interval = flush_interval
+        self._render = _make_renderer(max_element_length)
+        self._writer = _BufferedWriter(output if output is not None else sys.stdout, buffer_size, flush_interval)
+
+        self._counts_lock = threading.Lock()
+        self._failure_counts = Counter()
+        self._error_counts = Counter()
+        self._sampling_rates = {}
+        self._last_summary = None
+
+        if mode == 'summary':
+            _start_periodic(self._write_summary, flush_interval)
+
     def on_next(self, message):
-        print('Assert error: in {0} -> {1}'.format(
-            message['test_name'],
-            message['expect_function']
-        ))
-        print('Got:')
-        pprint.pprint(message['element'])
+        if self._mode == 'summary':
+            self._count(self._failure_counts, message)
+            return
+
+        self._writer.write(''.join([
+            'Assert error: in {0} -> {1}\n'.format(message['test_name'], message['expect_function']),
+            _suppressed_count(message),
+            _sampling_rate(message),
+            'Got:\n',
+            self._render(message['element']),
+            '\n'
+        ]))
 
     def on_error(self, error_message):
-        print('Runtime Error: In {0} -> {1}'.format(
-            error_message['test_name'],
-            error_message['expect_function']
-        ))
-        print('Got:')
-        pprint.pprint(error_message['error'])
+        if self._mode == 'summary':
+            self._count(self._error_counts, error_message)
+            return
+
+        self._writer.write(''.join([
+            'Runtime Error: In {0} -> {1}\n'.format(error_message['test_name'], error_message['expect_function']),
+            _suppressed_count(error_message),
+            _sampling_rate(error_message),
+            'Got:\n',
+            self._render(error_message['error']),
+            '\n'
+        ]))
 
     def on_completed(self):
-        print("All tests done.")
+        if self._mode == 'summary':
+            self._write_summary()
+
+        self._writer.write("All tests done.\n")
+        self._writer.flush()
+
+    def _count(self, counter, message):
+        check = (message['test_name'], message['expect_function'])
+        with self._counts_lock:
+            counter[check] += 1
+            if 'sampling_rate' in message:
+                self._sampling_rates[check] = message['sampling_rate']
+
+    def _write_summary(self):
+        with self._counts_lock:
+            summary = [
+                _summary_line(
+                    check,
+                    self._failure_counts[check],
+                    self._error_counts[check],
+                    self._sampling_rates.get(check)
+                )
+                for check in sorted(set(self._failure_counts) | set(self._error_counts))
+            ]
+
+        if not summary or summary == self._last_summary:
+            return
+        self._last_summary = summary
+
+        self._writer.write(''.join(['--- Failures so far ---\n'] + summary))
+        self._writer.flush()
+
+
+def _suppressed_count(message):
+    if 'suppressed' not in message:
+        return ''
+
+    return '({} similar notifications were suppressed)\n'.format(message['suppressed'])
+
+
+def _sampling_rate(message):
+    if 'sampling_rate' not in message:
+        return ''
+
+    return '(sampled: {:.2%} of the elements are checked)\n'.format(message['sampling_rate'])
+
+
+def _summary_line(check, failures, errors, sampling_rate):
+    test_name, expect_function = check
+    line = '{0} -> {1}: {2} failures, {3} errors'.format(test_name, expect_function, failures, errors)
+    if sampling_rate is None:
+        return line + '\n'
+
+    return line + ' (sampled at {0:.2%}, about {1:.0f} failures, {2:.0f} errors in total)\n'.format(
+        sampling_rate,
+        failures / sampling_rate,
+        errors / sampling_rate
+    )
+
+
+def _make_renderer(max_element_length):
+    """
+    _make_renderer :: Int | None -> (Any -> String)
+
+    Return a function rendering elements. If a maximum length is given, elements are rendered
+    with reprlib, which stops walking large nested elements early, and cut to that length.
+    """
+    if max_element_length is None:
+        return pprint.pformat
+
+    shortener = reprlib.Repr()
+    shortener.maxstring = shortener.maxother = shortener.maxlong = max_element_length
+
+    def render(element):
+        rendered_element = shortener.repr(element)
+        if len(rendered_element) <= max_element_length:
+            return rendered_element
+
+        return rendered_element[:max_element_length] + '...'
+
+    return render
+
+
+def _start_periodic(function, interval):
+    def run_periodically():
+        while True:
+            time.sleep(interval)
+            function()
+
+    threading.Thread(target=run_periodically, daemon=True).start()
+
+
+class _BufferedWriter:
+    """
+    Collects writes, and passes them on to the output in a single write once `buffer_size`
+    characters are pending, or every `flush_interval` seconds.
+    Pending writes are also flushed at exit.
+    """
+    def __init__(self, output, buffer_size, flush_interval):
+        self._output = output
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_size = 0
+        self._flusher_started = False
+
+        atexit.register(self.flush)
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            if self._pending_size < self._buffer_size:
+                self._start_flusher()
+                return
+
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+
+            self._output.write(''.join(self._pending))
+            self._output.flush()
+            self._pending = []
+            self._pending_size = 0
+
+    def _start_flusher(self):
+        if self._flusher_started or self._flush_interval is None:
+            return
+
+        self._flusher_started = True
+        _start_periodic(self.flush, self._flush_interval)
@@ -1,16 +1,15 @@
 import json
 
-import requests
-
+from pysellus import http_pool
 from pysellus.interfaces import AbstractIntegration
 
 
 class TrelloIntegration(AbstractIntegration):
-    def __init__(self, key, token, mode=None, trello_api_client=None, formatter=None, **kwargs):
+    def __init__(self, key, token, mode=None, trello_api_client=None, formatter=None, base_url=None, **kwargs):
         self.notification = self._get_notification_class_from_mode(mode)(**kwargs)
 
         self.trello_api_client = trello_api_client if trello_api_client is not None else TrelloAPI(
-            key, token
+            key, token, base_url=base_url
         )
 
         self.formatter = formatter if formatter is not None else Formatter
@@ -78,7 +77,7 @@ class Formatter:
     def create_element_message(element):
         return {
             'title': element['test_name'],
-            'content': markdown_quote(json.dumps(element['element']))
+            'content': markdown_quote(json.dumps(element['element'], default=str)) + Formatter._suppressed_count(element)
         }
 
     @staticmethod
@@ -91,12 +90,19 @@ class Formatter:
             ]),
             'content': '\n'.join([
                 ':bangbang: When processing element',
-                markdown_quote(json.dumps(element['element'])),
+                markdown_quote(json.dumps(element['element'], default=str)),
                 'the following error was raised:',
                 markdown_quote(repr(element['error']))
-            ])
+            ]) + Formatter._suppressed_count(element)
         }
 
+    @staticmethod
+    def _suppressed_count(element):
+        if 'suppressed' not in element:
+            return ''
+
+        return '\n({} similar notifications were suppressed)'.format(element['suppressed'])
+
     @staticmethod
     def create_completion_message(completion_phrase):
         return {
@@ -121,15 +127,16 @@ class TrelloAPI:
     TRELLO_MAX_STRING_LENGTH = 16384
     BASE_URL = 'https://trello.com/1/'
 
-    def __init__(self, key, token, http_client=requests):
+    def __init__(self, key, token, http_client=None, base_url=None):
         self._api_key = key
         self._api_token = token
+        self._base_url = base_url if base_url is not None else TrelloAPI.BASE_URL
 
-        self._http_client = http_client
+        self._http_client = http_client if http_client is not None else http_pool.get_session()
 
     def post(self, endpoint, body):
         self._http_client.post(
-            url=TrelloAPI.BASE_URL + endpoint,
+            url=self._base_url + endpoint,
             params=self._query_parameters,
             json=self._cap_body(body)
         )
@@ -0,0 +1,292 @@
+import types
+
+from rx import Observable
+
+from pysellus import async_engine
+from pysellus.api_reader import APIReader
+
+# the same key always gets the same stream, see CanonicalStream
+""" { key: CanonicalStream } """
+_canonical_streams = {}
+
+# values compared by value when building keys, see get_key
+_VALUE_TYPES = (bool, int, float, complex, str, bytes, type(None), type(Ellipsis), range)
+
+
+def stream(source):
+    """
+    stream :: Iterable | rx.Observable | Type APIReader | AsyncIterable -> CanonicalStream | AsyncIterable
+
+    Turn the given source into a stream that tests can `expect` things from:
+        - Observables emit their elements
+        - APIReader subclasses are built, and emit the elements they poll (see api_reader#APIReader)
+        - asynchronous sources (see async_engine#is_async_source) are streams already,
+          and are returned as they are
+        - any other iterable (a list, a generator, an open file...) emits its elements
+
+    Observables and iterables are turned into canonical streams, so that the same source always
+    gives the same stream (see CanonicalStream).
+    """
+    if async_engine.is_async_source(source):
+        return source
+
+    key = ('source', get_key(source))
+    if isinstance(source, type) and issubclass(source, APIReader) and key not in _canonical_streams:
+        # readers given as classes are built once, along with their stream
+        return _get_canonical_stream(key, source=source())
+
+    return _get_canonical_stream(key, source=source)
+
+
+def get_source(a_stream):
+    """
+    get_source :: Any -> CanonicalStream | None
+
+    Get the canonical stream of the source the given stream was built from,
+    or None if the given stream is not a canonical stream
+    """
+    if not isinstance(a_stream, CanonicalStream):
+        return None
+
+    while a_stream.parent is not None:
+        a_stream = a_stream.parent
+
+    return a_stream
+
+
+def get_shared_source(a_stream):
+    """
+    get_shared_source :: Any -> CanonicalStream | None
+
+    Get the canonical stream of the source the given stream was built from, if the streams
+    given as arguments to its operators (like in `a.merge(b)`) were all built from it too,
+    so that the whole stream can be rebased onto a single upstream (see CanonicalStream.rebase).
+    Otherwise, or if the given stream is not a canonical stream, return None.
+    """
+    source = get_source(a_stream)
+    if source is None:
+        return None
+
+    while a_stream.parent is not None:
+        for argument in list(a_stream._args) + list(a_stream._kwargs.values()):
+            if isinstance(argument, CanonicalStream):
+                if get_shared_source(argument) is not source:
+                    return None
+            elif isinstance(argument, Observable):
+                return None
+        a_stream = a_stream.parent
+
+    return source
+
+
+def stop_source(a_stream):
+    """
+    stop_source :: Any -> IO
+
+    Stop the source the given stream was built from, or the given stream itself if it's not
+    a canonical stream, if it can be stopped (like api_reader#APIReader or files#FollowedFile).
+    Other sources are left alone.
+    """
+    source = get_source(a_stream)
+    stop = getattr(source._source if source is not None else a_stream, 'stop', None)
+    if callable(stop):
+        stop()
+
+
+class CanonicalStream:
+    """
+    A stream which remembers how it was built: from which source, and through which
+    chain of operators (`.filter(...)`, `.map(...)`...).
+
+    Canonical streams are built once per source and chain: applying an operator to a stream
+    with arguments equivalent to ones seen before (see get_key) returns the stream built back
+    then, so that identical streams defined in different test files end up being the same
+    stream, subscribed once, and fanned out to all their testers (see threader#build_threads).
+
+    Streams built from the same source can also share a single subscription to it, by
+    rebuilding their chains on top of a Subject fed by the source (see rebase).
+
+    Everything else is delegated to the Observable the stream stands for (see observable).
+    """
+    def __init__(self, key, source=None, parent=None, operator=None, args=(), kwargs=None):
+        self.key = key
+        self.parent = parent
+
+        self._source = source
+        self._operator = operator
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._observable = None
+
+    @property
+    def observable(self):
+        """
+        observable :: rx.Observable
+
+        The Observable this stream stands for, built the first time it is asked for
+        """
+        if self._observable is None:
+            self._observable = self.rebase(None)
+
+        return self._observable
+
+    def rebase(self, upstream):
+        """
+        rebase :: rx.Observable | None -> rx.Observable
+
+        Build a new Observable applying the chain of operators of this stream to the given
+        upstream, instead of to its source. If no upstream is given, use the source.
+
+        Streams given as arguments to the operators are rebased onto the same upstream, so it
+        must stand for their source too (see get_shared_source).
+        """
+        if self.parent is None:
+            if upstream is not None:
+                return upstream
+            if isinstance(self._source, Observable):
+                return self._source
+            return Observable.from_(self._source)
+
+        return getattr(self.parent.rebase(upstream), self._operator)(
+            *[_rebase(arg, upstream) for arg in self._args],
+            **{name: _rebase(value, upstream) for name, value in self._kwargs.items()}
+        )
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        attribute = getattr(self.observable, name)
+        if not callable(attribute):
+            return attribute
+
+        def apply_operator(*args, **kwargs):
+            result = attribute(*[_unwrap(arg) for arg in args], **{key: _unwrap(value) for key, value in kwargs.items()})
+            if not isinstance(result, Observable):
+                return result
+
+            return _get_canonical_stream(
+                (self.key, name, get_key(args), get_key(tuple(sorted(kwargs.items())))),
+                parent=self,
+                operator=name,
+                args=args,
+                kwargs=kwargs
+            )
+
+        return apply_operator
+
+    def __repr__(self):
+        if self.parent is None:
+            return 'stream({!r})'.format(self._source)
+
+        return '{!r}.{}(...)'.format(self.parent, self._operator)
+
+
+def _get_canonical_stream(key, **stream_definition):
+    if key not in _canonical_streams:
+        _canonical_streams[key] = CanonicalStream(key, **stream_definition)
+
+    return _canonical_streams[key]
+
+
+def _unwrap(value):
+    return value.observable if isinstance(value, CanonicalStream) else value
+
+
+def _rebase(value, upstream):
+    if upstream is None or not isinstance(value, CanonicalStream):
+        return _unwrap(value)
+
+    return value.rebase(upstream)
+
+
+def get_key(value, _seen_functions=None):
+    """
+    get_key :: Any -> Hashable
+
+    Build a key for the given value, equal to the key of any equivalent value:
+        - numbers, strings, ranges and other immutable values, by value
+        - tuples and frozensets, by the keys of their items
+        - functions, by their code (regardless of where it is), defaults, closures, and the
+          values of the globals they use, so that the same lambda written in two test files
+          gets the same key, as long as it means the same thing in both
+        - canonical streams, by their own key
+        - anything else, by identity: mutable values, like lists, may not stay equivalent
+    """
+    if isinstance(value, CanonicalStream):
+        return ('stream', value.key)
+
+    if isinstance(value, _VALUE_TYPES):
+        return (type(value), value)
+
+    if isinstance(value, tuple):
+        return (type(value), tuple(get_key(item, _seen_functions) for item in value))
+
+    if isinstance(value, frozenset):
+        return (type(value), frozenset(get_key(item, _seen_functions) for item in value))
+
+    if isinstance(value, types.FunctionType):
+        return _get_function_key(value, _seen_functions or set())
+
+    return ('id', id(value))
+
+
+def _get_function_key(function, seen_functions):
+    if function in seen_functions:
+        # a recursive function, which is already being keyed further up
+        return ('function', function.__name__)
+
+    seen_functions = seen_functions | {function}
+    code = function.__code__
+    global_names = [name for name in _get_global_names(code) if name in function.__globals__]
+
+    return (
+        'function',
+        _get_code_key(code),
+        get_key(function.__defaults__, seen_functions),
+        get_key(tuple(sorted((function.__kwdefaults__ or {}).items())), seen_functions),
+        tuple(_get_cell_key(cell, seen_functions) for cell in function.__closure__ or ()),
+        tuple((name, get_key(function.__globals__[name], seen_functions)) for name in global_names)
+    )
+
+
+def _get_global_names(code):
+    """
+    The names used by a code object, and by the code objects nested in it (generator
+    expressions, comprehensions, inner functions...), which may be globals
+    """
+    names = dict.fromkeys(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names.update(dict.fromkeys(_get_global_names(constant)))
+
+    return list(names)
+
+
+def _get_cell_key(cell, seen_functions):
+    try:
+        return get_key(cell.cell_contents, seen_functions)
+    except ValueError:
+        # the variable was not assigned yet
+        return ('cell', id(cell))
+
+
+def _get_code_key(code):
+    """
+    Everything about a code object, except where it was defined
+    """
+    return (
+        code.co_code,
+        code.co_argcount,
+        code.co_posonlyargcount,
+        code.co_kwonlyargcount,
+        code.co_flags,
+        code.co_names,
+        code.co_varnames,
+        code.co_freevars,
+        code.co_cellvars,
+        tuple(
+            _get_code_key(constant) if isinstance(constant, types.CodeType) else get_key(constant)
+            for constant in code.co_consts
+        )
+    )
@@ -1,29 +1,267 @@
+import asyncio
+import inspect
+from functools import partial
+from threading import Thread, Lock
+
+from rx import Observer
 from rx.subjects import Subject
 
-from threading import Thread
+from pysellus import async_engine, metrics, profiling, schedulers, streams, registrar
+from pysellus.buffering import BoundedBuffer
+
+""" { stream: buffering.BoundedBuffer } """
+stream_buffers = {}
+
+""" { stream: rx.subjects.Subject } """
+stream_subjects = {}
+
+""" { stream: [fn] } """
+stream_testers = {}
+
+# the testers of every stream, fused into a single function, see _fuse_stream_testers
+""" { stream: fn } """
+stream_dispatchers = {}
+
+""" { source_key: rx.subjects.Subject } """
+source_subjects = {}
+
+# subscriptions of the streams rebased onto the Subject of a shared source, see _build_stream_threads
+""" { stream: rx.Disposable } """
+stream_subscriptions = {}
+
+# event loop running `async def` testers for all stream threads, see _get_coroutine_loop
+_coroutine_loop = None
+_coroutine_loop_lock = Lock()
 
 
 def _perform_subscribe(stream, observer):
+    if async_engine.is_async_source(stream):
+        asyncio.run(async_engine.drain_async_source(stream, observer))
+        return
+
     stream.subscribe(observer)
 
 
-def build_threads(stream_to_testers, thread_target=_perform_subscribe):
+def build_threads(stream_to_testers, thread_target=_perform_subscribe, queue_size=None, queue_policy='block'):
+    """
+    build_threads :: { stream: [fn] } -> fn -> Int | None -> String -> [Thread]
+
+    Build a thread for every stream, which subscribes its testers to it.
+
+    If a queue size is given, each stream pushes its elements into a bounded queue instead,
+    which is drained into the testers by a second thread. See buffering#BoundedBuffer
+    for the available overflow policies; each stream's queue is kept in stream_buffers.
+
+    The testers of each stream are fused into a single function, called once per element
+    (see registrar#fuse_testers). The Subject each stream feeds is kept in stream_subjects,
+    and its testers in stream_testers, so that testers can be attached and detached while
+    the streams run (see attach_testers, detach_testers)
+
+    Streams built from the same source (see streams#CanonicalStream) share a single thread,
+    subscribed once to the source, which feeds a Subject their operators are applied to
+    (see _build_source_thread). The Subject of each source is kept in source_subjects.
+    """
     threads = []
 
-    for stream, testers in stream_to_testers.items():
-        subject = Subject()
-        for tester in testers:
-            subject.subscribe(tester)
+    for source, source_streams in _group_by_shared_source(stream_to_testers).items():
+        upstream = source_subjects[source.key] = Subject()
+        for stream in source_streams:
+            threads += _build_stream_threads(
+                stream, stream_to_testers[stream], thread_target, queue_size, queue_policy, upstream
+            )
+        threads.append(_make_thread(thread_target, source, upstream, 'source-{}'.format(len(source_subjects) - 1)))
 
-        threads.append(_make_thread(thread_target, stream, subject))
+    for stream, testers in stream_to_testers.items():
+        if stream not in stream_subjects:
+            threads += _build_stream_threads(stream, testers, thread_target, queue_size, queue_policy)
 
     return threads
 
 
-def _make_thread(thread_target, stream, subject):
-    return Thread(target=thread_target, args=(stream, subject))
+def attach_testers(stream, testers, thread_target=_perform_subscribe, queue_size=None, queue_policy='block'):
+    """
+    attach_testers :: stream -> [fn] -> fn -> Int | None -> String -> [Thread]
+
+    Subscribe the given testers to the given stream, while it's running.
+
+    If the stream isn't running yet, build its threads instead (see build_threads), and return
+    them for the caller to launch. If its source is already shared by running streams, the new
+    stream joins them, and no source thread is needed.
+    """
+    if stream not in stream_subjects:
+        source = streams.get_shared_source(stream)
+        upstream = source_subjects.get(source.key) if source is not None else None
+        return _build_stream_threads(stream, testers, thread_target, queue_size, queue_policy, upstream)
+
+    stream_testers[stream] += testers
+    _fuse_stream_testers(stream)
+
+    return []
+
+
+def detach_testers(testers):
+    """
+    detach_testers :: [fn] -> IO
+
+    Unsubscribe the given testers from their streams. Streams left without testers are
+    stopped (see _stop_stream), the others keep running.
+    """
+    unused_streams = []
+    for stream, running_testers in stream_testers.items():
+        remaining_testers = [tester for tester in running_testers if tester not in testers]
+        if len(remaining_testers) < len(running_testers):
+            stream_testers[stream] = remaining_testers
+            _fuse_stream_testers(stream)
+            if not remaining_testers:
+                unused_streams.append(stream)
+
+    for stream in unused_streams:
+        _stop_stream(stream)
+
+
+def _stop_stream(stream):
+    """
+    Complete the Subject of the given stream, and forget it, so that attaching testers to it
+    later starts it again (see attach_testers). Its dispatcher is kept, without testers, for
+    the elements already on their way.
+
+    A stream rebased onto the Subject of a shared source is unsubscribed from it. Once no
+    running stream is built from its source, the source is stopped too, if it can be (see
+    streams#stop_source): sources which can't, like plain Observables, run until they complete
+    on their own, but nothing reaches testers from them anymore.
+    """
+    subject = stream_subjects.pop(stream)
+    del stream_testers[stream]
+
+    subscription = stream_subscriptions.pop(stream, None)
+    if subscription is not None:
+        subscription.dispose()
+
+    buffer = stream_buffers.pop(stream, None)
+    (buffer or subject).on_completed()
+
+    source = streams.get_source(stream) or stream
+    if any((streams.get_source(running) or running) is source for running in stream_subjects):
+        return
+
+    if isinstance(source, streams.CanonicalStream):
+        source_subjects.pop(source.key, None)
+    streams.stop_source(source)
+
+
+def _group_by_shared_source(stream_to_testers):
+    """
+    _group_by_shared_source :: { stream: [fn] } -> { streams.CanonicalStream: [stream] }
+
+    Group the given streams by their source, leaving out sources used by a single stream,
+    asynchronous sources, and streams combined with streams from other sources
+    (see streams#get_shared_source)
+    """
+    streams_by_source = {}
+    for stream in stream_to_testers:
+        source = streams.get_shared_source(stream)
+        if source is not None:
+            streams_by_source.setdefault(source, []).append(stream)
+
+    return {
+        source: source_streams
+        for source, source_streams in streams_by_source.items()
+        if len(source_streams) > 1
+    }
+
+
+def _build_stream_threads(stream, testers, thread_target, queue_size, queue_policy, upstream=None):
+    """
+    Subscribe the given testers to a Subject fed by the given stream, and build the threads
+    feeding it.
+
+    If an upstream is given, the stream's operators are applied to it right away (see
+    streams#CanonicalStream.rebase), and no thread is needed to subscribe to the stream.
+    """
+    name = 'stream-{}'.format(len(stream_subjects))
+
+    stream_subjects[stream] = subject = Subject()
+    metrics.instrument_stream(name, subject)
+
+    stream_testers[stream] = list(testers)
+    _fuse_stream_testers(stream)
+    subject.subscribe(partial(_dispatch, stream))
+
+    if queue_size is None:
+        observer, threads = subject, []
+    else:
+        stream_buffers[stream] = buffer = BoundedBuffer(queue_size, queue_policy, name=name)
+        observer = Observer(buffer.on_next, buffer.on_error, buffer.on_completed)
+        threads = [Thread(target=profiling.profiled(buffer.drain_into, name + '-queue'), args=(subject,))]
+
+    if upstream is not None:
+        stream_subscriptions[stream] = stream.rebase(upstream).subscribe(observer)
+        return threads
+
+    return [_make_thread(thread_target, stream, observer, name)] + threads
+
+
+def _fuse_stream_testers(stream):
+    """
+    Fuse the current testers of the given stream again. Elements being dispatched keep
+    going through the previous function; the following ones go through the new one.
+    """
+    stream_dispatchers[stream] = registrar.fuse_testers(stream_testers[stream], adapt=_as_synchronous)
+
+
+def _dispatch(stream, element):
+    stream_dispatchers[stream](element)
+
+
+def _as_synchronous(tester):
+    """
+    Testers defined with `async def` are run to completion on every element
+    (see _run_coroutine_tester)
+    """
+    if inspect.iscoroutinefunction(tester):
+        return partial(_run_coroutine_tester, tester)
+
+    return tester
+
+
+def _run_coroutine_tester(tester, element):
+    """
+    Run the given coroutine tester on a background event loop, and wait for it to finish.
+
+    The stream thread may already be running its own event loop (see _perform_subscribe),
+    so the coroutine can't be run on it.
+    """
+    asyncio.run_coroutine_threadsafe(tester(element), _get_coroutine_loop()).result()
+
+
+def _get_coroutine_loop():
+    global _coroutine_loop
+
+    with _coroutine_loop_lock:
+        if _coroutine_loop is None:
+            _coroutine_loop = asyncio.new_event_loop()
+            Thread(target=_coroutine_loop.run_forever, daemon=True).start()
+
+    return _coroutine_loop
+
+
+def _make_thread(thread_target, stream, subject, name=None):
+    """
+    The thread is profiled under the given name if profiling is enabled (see profiling#profiled),
+    and subscribes to its stream on a trampoline of its own (see schedulers#own_trampoline)
+    """
+    thread_target = schedulers.with_own_trampoline(thread_target)
+    if name is None:
+        return Thread(target=thread_target, args=(stream, subject))
+
+    return Thread(target=profiling.profiled(thread_target, name), args=(stream, subject), name=name)
 
 
 def launch_threads(threads):
     for thread in threads:
         thread.start()
+
+
+def join_threads(threads):
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,209 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class Throttle:
+    """
+    Sits between failing tests and their integrations, to keep a high-volume stream from
+    flooding them with notifications:
+        - identical failures (same test, tester and element) seen within `dedup_ttl` seconds
+          are suppressed (see TTLKeyStore)
+        - each test notifies at most `test_rate` failures per second, with bursts of up to
+          `test_burst` failures, across all of its integrations (failures no integration gets
+          don't count)
+        - each integration gets at most `rate` notifications per second from each test,
+          with bursts of up to `burst` notifications (see TokenBucket), and at most
+          `integration_rate` notifications per second from all tests together, with bursts of
+          up to `integration_burst` notifications, so that many tests failing at once can't
+          flood it either
+
+    Every stage is optional. The number of notifications suppressed for an integration is
+    reported in the `suppressed` field of the next payload that gets through to it.
+    """
+    def __init__(self, rate=None, burst=None, dedup_ttl=None, max_keys=10000,
+                 integration_rate=None, integration_burst=None, test_rate=None, test_burst=None,
+                 clock=time.monotonic):
+        self._clock = clock
+        self._recent_failures = TTLKeyStore(dedup_ttl, max_keys, clock) if dedup_ttl else None
+
+        self._lock = threading.Lock()
+        self._buckets = _BucketFactory(rate, burst, clock)
+        self._integration_buckets = _BucketFactory(integration_rate, integration_burst, clock)
+        self._test_buckets = _BucketFactory(test_rate, test_burst, clock)
+        self._suppressed = {}
+
+    def deliveries(self, test_name, integration_names, integrations, payload):
+        """
+        deliveries :: String -> [String] -> [rx.Subject] -> FailurePayload -> [(rx.Subject, FailurePayload)]
+
+        Given a failure of a test, and the integrations it notifies, return the integrations
+        that should be notified of it, along with the payload to send each of them.
+        """
+        with self._lock:
+            keys = [(test_name, integration_name) for integration_name in integration_names]
+
+            if self._recent_failures is not None and self._recent_failures.seen(_failure_key(test_name, payload)):
+                self._suppress(keys)
+                return []
+
+            test_bucket = self._test_buckets.get(test_name)
+            if test_bucket is not None and not test_bucket.has_token():
+                self._suppress(keys)
+                return []
+
+            allowed_deliveries = []
+            for key, integration_name, integration in zip(keys, integration_names, integrations):
+                buckets = [self._buckets.get(key), self._integration_buckets.get(integration_name)]
+                if not _take_tokens(buckets):
+                    self._suppress([key])
+                    continue
+
+                allowed_deliveries.append((integration, self._with_suppressed_count(key, payload)))
+
+            # the test is only charged for failures that reach at least one integration
+            if allowed_deliveries and test_bucket is not None:
+                test_bucket.take()
+
+            return allowed_deliveries
+
+    def _suppress(self, keys):
+        for key in keys:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+
+    def _with_suppressed_count(self, key, payload):
+        suppressed = self._suppressed.pop(key, 0)
+        if not suppressed:
+            return payload
+
+        return payload.replace(suppressed=suppressed)
+
+
+def _take_tokens(buckets):
+    """
+    Take a token from each of the given buckets (None standing for no limit), only if all of
+    them have one, so that a notification suppressed by one bucket doesn't use up the others
+    """
+    buckets = [bucket for bucket in buckets if bucket is not None]
+    if not all(bucket.has_token() for bucket in buckets):
+        return False
+
+    for bucket in buckets:
+        bucket.take()
+    return True
+
+
+class _BucketFactory:
+    """
+    Builds a TokenBucket for every key the first time it's asked for, with the given settings,
+    or no bucket at all (None) if no rate is given
+    """
+    def __init__(self, rate, burst, clock):
+        self._rate = rate
+        self._burst = burst if burst is not None else rate
+        self._clock = clock
+        self._buckets = {}
+
+    def get(self, key):
+        if self._rate is None:
+            return None
+
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self._rate, self._burst, self._clock)
+
+        return self._buckets[key]
+
+
+def _failure_key(test_name, payload):
+    """
+    Failures are keyed on their element itself when it's hashable. Other elements are keyed on
+    a digest of their repr, which, unlike their hash, two different elements won't share.
+    """
+    element = payload.get('element')
+    try:
+        hash(element)
+    except TypeError:
+        element = hashlib.blake2b(repr(element).encode(), digest_size=16).digest()
+
+    return (test_name, payload.get('expect_function'), element)
+
+
+class TokenBucket:
+    """
+    Allows `rate` events per second on average, and bursts of up to `burst` events.
+    """
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+
+        self._tokens = burst
+        self._last_refill = clock()
+
+    def take(self):
+        """
+        take :: -> Boolean
+
+        Take a token if there's one available. Return whether a token was taken.
+        """
+        if not self.has_token():
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def has_token(self):
+        """
+        has_token :: -> Boolean
+
+        Return whether a token is available, without taking it.
+        """
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+        return self._tokens >= 1
+
+
+class TTLKeyStore:
+    """
+    Remembers keys for `ttl` seconds, using bounded memory: once it holds `max_keys` keys,
+    the oldest ones are evicted first.
+    """
+    def __init__(self, ttl, max_keys, clock=time.monotonic):
+        self._ttl = ttl
+        self._max_keys = max_keys
+        self._clock = clock
+
+        # key -> expiry time, oldest first
+        self._expiry_times = OrderedDict()
+
+    def __len__(self):
+        return len(self._expiry_times)
+
+    def seen(self, key):
+        """
+        seen :: Hashable -> Boolean
+
+        Return whether the given key was seen within the last `ttl` seconds.
+        If it wasn't, remember it from now on.
+        """
+        now = self._clock()
+        self._evict_expired(now)
+
+        if key in self._expiry_times:
+            return True
+
+        self._expiry_times[key] = now + self._ttl
+        if len(self._expiry_times) > self._max_keys:
+            self._expiry_times.popitem(last=False)
+
+        return False
+
+    def _evict_expired(self, now):
+        while self._expiry_times:
+            oldest_key, expiry_time = next(iter(self._expiry_times.items()))
+            if expiry_time > now:
+                return
+            del self._expiry_times[oldest_key]
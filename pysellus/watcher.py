@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+
+from pysellus import loader, registrar, threader, integrations
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """
+    Watches the test files loaded from a path, and hot-reloads the ones that change while
+    their streams are running:
+        - the module of a changed (or new) file is imported again, and its setup functions
+          are registered again (see registrar#replace_tests)
+        - the testers they registered before are detached from their running streams, and the
+          new ones are attached (see threader#attach_testers); testers on streams that
+          aren't running yet get new threads
+        - the testers of a deleted file are detached
+
+    Unchanged files, and the streams they test, are left running untouched.
+
+    Changes are detected by polling the modification times of the files every `interval`
+    seconds. `queue_size` and `queue_policy` are used for new streams (see threader#build_threads)
+    """
+    def __init__(self, path, interval=1.0, queue_size=None, queue_policy='block'):
+        self._path = path
+        self._root = loader._get_test_root(path)
+        self._interval = interval
+        self._queue_size = queue_size
+        self._queue_policy = queue_policy
+
+        self._modification_times = self._scan()
+        # relative_path -> [test_name]
+        self._test_names = {
+            relative_path: [setup_function.__name__ for setup_function in loader.get_setup_functions(relative_path)]
+            for relative_path in self._modification_times
+        }
+
+        # threads started for streams that weren't running before
+        self.threads = []
+
+    def run(self):
+        """
+        run :: -> IO
+
+        Poll for changes until interrupted
+        """
+        try:
+            while True:
+                time.sleep(self._interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+
+    def poll(self):
+        """
+        poll :: -> IO
+
+        Reload the test files that changed since the last poll
+        """
+        modification_times = self._scan()
+
+        changed_paths = [
+            relative_path
+            for relative_path, modification_time in modification_times.items()
+            if self._modification_times.get(relative_path) != modification_time
+        ]
+        deleted_paths = [
+            relative_path
+            for relative_path in self._modification_times
+            if relative_path not in modification_times
+        ]
+
+        self._modification_times = modification_times
+
+        for relative_path in deleted_paths:
+            self._forget(relative_path)
+        for relative_path in changed_paths:
+            self._reload(relative_path)
+
+    def _scan(self):
+        modification_times = {}
+        for relative_path in loader.find_test_files(self._path):
+            try:
+                modification_times[relative_path] = os.stat(os.path.join(self._root, relative_path)).st_mtime_ns
+            except OSError:
+                # deleted while scanning
+                continue
+
+        return modification_times
+
+    def _reload(self, relative_path):
+        try:
+            setup_functions = loader.reload_test_file(self._path, relative_path)
+            self._replace_tests(relative_path, setup_functions)
+        except Exception:
+            logger.exception("Could not reload {}, its previous tests keep running".format(relative_path))
+
+    def _forget(self, relative_path):
+        test_names = self._test_names.get(relative_path, [])
+        self._replace_tests(relative_path, [])
+        del self._test_names[relative_path]
+
+        # elements already on their way through the detached testers may still fail: their
+        # notifications are dropped once the tests are unregistered (see integrations#_notify_integrations)
+        for test_name in test_names:
+            integrations.registered_integrations.pop(test_name, None)
+
+    def _replace_tests(self, relative_path, setup_functions):
+        removed_testers, added_testers = registrar.replace_tests(
+            self._test_names.get(relative_path, []),
+            setup_functions
+        )
+        self._test_names[relative_path] = [setup_function.__name__ for setup_function in setup_functions]
+
+        new_threads = []
+        for stream, testers in _group_by_stream(added_testers).items():
+            new_threads += threader.attach_testers(
+                stream,
+                testers,
+                queue_size=self._queue_size,
+                queue_policy=self._queue_policy
+            )
+        threader.launch_threads(new_threads)
+        self.threads += new_threads
+
+        # detached last, so that streams kept by the new tests are not stopped in between
+        threader.detach_testers([tester for _, tester in removed_testers])
+
+        logger.info("Reloaded {}: detached {} testers, attached {} testers, started {} new streams".format(
+            relative_path, len(removed_testers), len(added_testers), len(new_threads)
+        ))
+
+
+def _group_by_stream(stream_tester_pairs):
+    stream_to_testers = {}
+    for stream, tester in stream_tester_pairs:
+        stream_to_testers.setdefault(stream, []).append(tester)
+
+    return stream_to_testers
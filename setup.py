@@ -13,7 +13,8 @@ setup(
         'Intended Audience :: Information Technology',
         'Operating System :: POSIX :: Linux',
         'Operating System :: MacOS :: MacOS X',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Topic :: Software Development :: Quality Assurance',
         'License :: OSI Approved :: MIT License'
     ],
@@ -22,13 +23,16 @@ setup(
     author_email='',
     url='',
     license='MIT',
-    packages=find_packages(exclude=['ez_setup', 'examples', 'tests']),
+    packages=find_packages(exclude=['ez_setup', 'examples', 'tests', 'benchmarks']),
     include_package_data=True,
     zip_safe=False,
     install_requires=[
         # -*- Extra requirements: -*-
         i.strip() for i in open('requirements.txt').readlines()
     ],
+    extras_require={
+        'vectorized': ['numpy']
+    },
     entry_points={
         'console_scripts': [
             'pysellus = pysellus.core:main'
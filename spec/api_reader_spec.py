@@ -0,0 +1,104 @@
+import time
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+from expects import expect, equal, be, be_a, have_key
+
+from benchmarks.stubs import StubServer
+from pysellus import streams
+from pysellus.api_reader import APIReader, _Endpoint
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+with description('the api_reader module'):
+    with before.each:
+        self.received_elements = []
+        self.received_headers = []
+        self.readers = []
+        self.server = None
+
+        def start_reading(reader):
+            thread = threading.Thread(target=reader.subscribe, args=(self.received_elements.append,))
+            thread.start()
+            self.readers.append((reader, thread))
+
+        self.start_reading = start_reading
+
+    with after.each:
+        for reader, thread in self.readers:
+            reader.stop()
+            thread.join()
+        if self.server is not None:
+            self.server.close()
+
+    with it('polls every endpoint, emitting the elements of their responses'):
+        def respond(path, headers):
+            return 200, {}, [path.strip('/') + '-1', path.strip('/') + '-2']
+
+        self.server = StubServer(respond=respond)
+
+        self.start_reading(APIReader(urls=[self.server.url + 'a', self.server.url + 'b'], min_interval=60))
+        wait_until(lambda: len(self.received_elements) == 4)
+
+        expect(sorted(self.received_elements)).to(equal(['a-1', 'a-2', 'b-1', 'b-2']))
+
+    with it('asks for newer responses only, and emits nothing for unchanged ones'):
+        def respond(path, headers):
+            self.received_headers.append(dict(headers))
+            if headers.get('If-None-Match') == '"v1"':
+                return 304, {}, None
+            return 200, {'ETag': '"v1"'}, [1]
+
+        self.server = StubServer(respond=respond)
+
+        self.start_reading(APIReader(urls=[self.server.url], min_interval=0.01))
+        wait_until(lambda: len(self.received_headers) >= 3)
+
+        expect(self.received_elements).to(equal([1]))
+        expect(self.received_headers[1]).to(have_key('If-None-Match', '"v1"'))
+
+    with it('follows the cursor of every response right away, until there are no new elements'):
+        pages = {'0': ([1, 2], '2'), '2': ([3], '3'), '3': ([], '3')}
+
+        def respond(path, headers):
+            after = parse_qs(urlsplit(path).query)['after'][0]
+            elements, last = pages[after]
+            return 200, {}, {'elements': elements, 'last': last}
+
+        self.server = StubServer(respond=respond)
+
+        self.start_reading(APIReader(
+            urls=[self.server.url],
+            params={'after': '0'},
+            extract=lambda body: body['elements'],
+            cursor=lambda body: {'after': body['last']},
+            min_interval=60
+        ))
+        wait_until(lambda: len(self.received_elements) == 3)
+
+        expect(self.received_elements).to(equal([1, 2, 3]))
+
+    with it('backs off endpoints without new elements, up to the maximum interval'):
+        reader = APIReader(min_interval=1, max_interval=3)
+        endpoint = _Endpoint('http://example.org', {}, 1)
+
+        intervals = []
+        for _ in range(3):
+            reader._back_off(endpoint)
+            intervals.append(endpoint.interval)
+
+        expect(intervals).to(equal([2, 3, 3]))
+
+    with it('builds readers given as classes once, along with their stream'):
+        class SomeReader(APIReader):
+            urls = ['http://example.org']
+
+        a_stream = streams.stream(SomeReader)
+
+        expect(streams.get_source(a_stream)._source).to(be_a(SomeReader))
+        expect(streams.stream(SomeReader)).to(be(a_stream))
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+
+from rx import Observable
+from rx.subjects import Subject
+from expects import expect, equal, be_true, be_false, be_a
+
+from pysellus import async_engine, integrations
+from pysellus.async_engine import blocking
+
+with description('the async_engine module'):
+    with it('should create as many tasks as streams in the supplied dict'):
+        stream_to_testers = {
+            Observable.from_([1]): [lambda element: None],
+            Observable.from_([2]): [lambda element: None, lambda element: None]
+        }
+
+        expect(len(async_engine.build_tasks(stream_to_testers))).to(equal(2))
+
+    with it('should give every element of an rx Observable to each of its testers'):
+        received_elements = []
+        stream_to_testers = {
+            Observable.from_([1, 2, 3]): [received_elements.append, received_elements.append]
+        }
+
+        async_engine.launch_tasks(async_engine.build_tasks(stream_to_testers))
+
+        expect(received_elements).to(equal([1, 1, 2, 2, 3, 3]))
+
+    with it('should support async sources and testers natively'):
+        received_elements = []
+
+        async def a_source():
+            for element in [1, 2]:
+                yield element
+
+        async def a_tester(element):
+            received_elements.append(element)
+
+        async_engine.launch_tasks(async_engine.build_tasks({a_source: [a_tester]}))
+
+        expect(received_elements).to(equal([1, 2]))
+
+    with it('should offload testers marked as blocking to a worker thread'):
+        threads_running_tester = []
+
+        @blocking
+        def a_blocking_tester(element):
+            threads_running_tester.append(threading.current_thread())
+
+        def a_wrapped_tester(element):
+            a_wrapped_tester.tester(element)
+
+        a_wrapped_tester.tester = a_blocking_tester
+
+        async_engine.launch_tasks(async_engine.build_tasks({
+            Observable.from_([1]): [a_wrapped_tester]
+        }))
+
+        expect(threads_running_tester[0] is threading.main_thread()).to(be_false)
+
+    with it('should keep consuming finite streams alongside many never-ending Observables'):
+        received_elements = []
+        released = threading.Event()
+        released_in_time = []
+
+        def a_waiting_observable(observer):
+            released_in_time.append(released.wait(2))
+            observer.on_completed()
+
+        def a_tester(element):
+            received_elements.append(element)
+            if len(received_elements) == 3:
+                released.set()
+
+        stream_to_testers = {Observable.create(a_waiting_observable): [] for _ in range(40)}
+        stream_to_testers[Observable.from_([1, 2, 3])] = [a_tester]
+
+        async_engine.launch_tasks(async_engine.build_tasks(stream_to_testers), max_workers=1, source_workers=41)
+
+        expect(received_elements).to(equal([1, 2, 3]))
+        expect(all(released_in_time)).to(be_true)
+
+    with it('should subscribe Observables beyond the source workers once earlier ones complete'):
+        subscribing_threads = set()
+        received_elements = []
+
+        def a_source(observer):
+            subscribing_threads.add(threading.current_thread())
+            observer.on_next(1)
+            observer.on_completed()
+
+        async_engine.launch_tasks(async_engine.build_tasks({
+            Observable.create(a_source): [received_elements.append] for _ in range(5)
+        }), source_workers=2)
+
+        expect(received_elements).to(equal([1] * 5))
+        expect(len(subscribing_threads) <= 2).to(be_true)
+
+    with it('should keep Observables at most queue_size elements ahead of their testers'):
+        lead_on_emission = []
+        tested_elements = []
+
+        def a_source(observer):
+            for element in range(10):
+                lead_on_emission.append(element - len(tested_elements))
+                observer.on_next(element)
+            observer.on_completed()
+
+        async def a_slow_tester(element):
+            await asyncio.sleep(0.001)
+            tested_elements.append(element)
+
+        async_engine.launch_tasks(async_engine.build_tasks({
+            Observable.create(a_source): [a_slow_tester]
+        }), queue_size=2)
+
+        expect(tested_elements).to(equal(list(range(10))))
+        expect(max(lead_on_emission) <= 3).to(be_true)
+
+    with it('should stop feeding Observables whose elements are no longer consumed'):
+        source_errors = []
+        stopped = threading.Event()
+
+        def an_endless_source(observer):
+            try:
+                while True:
+                    observer.on_next(1)
+            except Exception as error:
+                source_errors.append(error)
+                stopped.set()
+
+        def a_failing_tester(element):
+            raise Exception('a failure')
+
+        async_engine.launch_tasks(async_engine.build_tasks({
+            Observable.create(an_endless_source): [a_failing_tester]
+        }))
+
+        expect(stopped.wait(2)).to(be_true)
+        expect(source_errors[0]).to(be_a(async_engine.StreamDetachedError))
+
+    with it('should keep consuming the other streams when one of them fails'):
+        received_elements = []
+
+        async def a_source():
+            for element in [1, 2]:
+                await asyncio.sleep(0)
+                yield element
+
+        async_engine.launch_tasks(async_engine.build_tasks({
+            Observable.throw(Exception('a failure')): [received_elements.append],
+            a_source: [received_elements.append]
+        }))
+
+        expect(received_elements).to(equal([1, 2]))
+
+    with it('should deliver notifications to integrations from the event loop'):
+        delivering_threads = []
+        an_integration = Subject()
+        an_integration.subscribe(lambda payload: delivering_threads.append(threading.current_thread()))
+        integrations.registered_integrations['a_test'] = {
+            'integrations': [an_integration],
+            'integration_names': ['an_integration']
+        }
+
+        @blocking
+        def a_blocking_tester(element):
+            integrations.notify_element('a_test', element)
+
+        def a_wrapped_tester(element):
+            a_wrapped_tester.tester(element)
+
+        a_wrapped_tester.tester = a_blocking_tester
+
+        try:
+            async_engine.launch_tasks(async_engine.build_tasks({
+                Observable.from_([1]): [a_wrapped_tester]
+            }))
+        finally:
+            del integrations.registered_integrations['a_test']
+
+        expect(delivering_threads).to(equal([threading.main_thread()]))
+        expect(integrations.delivery_loop).to(equal(None))
+
+    with it('should tell async sources apart from other streams'):
+        async def a_source():
+            yield
+
+        expect(async_engine.is_async_source(a_source)).to(be_true)
+        expect(async_engine.is_async_source(Observable.from_([]))).to(be_false)
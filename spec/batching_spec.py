@@ -0,0 +1,87 @@
+import time
+
+from rx import Observable
+from rx.subjects import Subject
+from expects import expect, equal, be, raise_error
+
+from pysellus import batching
+from pysellus.batching import vectorized
+
+with description('the batching module'):
+    with context('exposes a `vectorized` decorator which'):
+        with it('marks the decorated function with the default batch size'):
+            def a_tester(chunk):
+                pass
+
+            expect(vectorized(a_tester)).to(be(a_tester))
+            expect(batching.batch_size_of(a_tester)).to(equal(batching.DEFAULT_BATCH_SIZE))
+
+        with it('accepts a custom batch size'):
+            @vectorized(batch_size=16)
+            def a_tester(chunk):
+                pass
+
+            expect(batching.batch_size_of(a_tester)).to(equal(16))
+
+        with it('accepts a custom batch wait'):
+            @vectorized(batch_wait=0.5)
+            def a_tester(chunk):
+                pass
+
+            expect(batching.batch_wait_of(a_tester)).to(equal(0.5))
+
+    with context('buffers elements'):
+        with it('into batches of the given size, and emits what is left on completion'):
+            batches = []
+
+            batching.buffer_with_wait(Observable.from_([1, 2, 3, 4, 5]), 2, 60).subscribe(batches.append)
+
+            expect(batches).to(equal([[1, 2], [3, 4], [5]]))
+
+        with it('emitting batches which do not fill up once their wait is over'):
+            batches = []
+            stream = Subject()
+            batching.buffer_with_wait(stream, 10, 0.01).subscribe(batches.append)
+
+            stream.on_next(1)
+            stream.on_next(2)
+            time.sleep(0.1)
+            stream.on_next(3)
+
+            expect(batches).to(equal([[1, 2]]))
+
+        with it('only once full, or on completion, without a wait'):
+            batches = []
+            stream = Subject()
+            batching.buffer_with_wait(stream, 10, None).subscribe(batches.append)
+
+            stream.on_next(1)
+            time.sleep(0.05)
+
+            expect(batches).to(equal([]))
+
+    with it('considers unmarked functions as regular testers'):
+        expect(batching.batch_size_of(lambda element: True)).to(be(None))
+
+    with context('builds chunks'):
+        with it('as arrays from a list of scalars'):
+            chunk = batching.make_chunk([1, 2, 3])
+
+            expect(list(chunk)).to(equal([1, 2, 3]))
+
+        with it('as a dict of columns from a list of dicts'):
+            chunk = batching.make_chunk([{'a': 1, 'b': 2}, {'a': 3, 'b': 4}])
+
+            expect(list(chunk['a'])).to(equal([1, 3]))
+            expect(list(chunk['b'])).to(equal([2, 4]))
+
+    with context('finds the failing positions of a mask'):
+        with it('returns the positions of the false entries'):
+            expect(batching.failing_positions([True, False, True, False], 4)).to(equal([1, 3]))
+
+        with it('applies a scalar mask to the whole chunk'):
+            expect(batching.failing_positions(False, 3)).to(equal([0, 1, 2]))
+            expect(batching.failing_positions(True, 3)).to(equal([]))
+
+        with it('raises a ValueError if the mask length does not match the chunk length'):
+            expect(lambda: batching.failing_positions([True], 2)).to(raise_error(ValueError))
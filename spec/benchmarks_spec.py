@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+from expects import expect, equal, be_above, be_empty
+
+from benchmarks import throughput, startup
+
+with description('the benchmarks'):
+    with description('has a throughput benchmark, which'):
+        with it('should report the throughput of the whole pipeline as JSON'):
+            report = json.loads(subprocess.check_output([
+                sys.executable, '-m', 'benchmarks.throughput',
+                '--elements', '300', '--testers', '2', '--integrations', '2', '--failure-rate', '0.1'
+            ]).decode('utf-8'))
+
+            expect(report['parameters']['elements']).to(equal(300))
+            expect(report['results']['failures']).to(equal(30))
+            expect(report['results']['notifications']).to(equal(60))
+            expect(report['results']['elements_per_second']).to(be_above(0))
+            expect(report['results']['alert_latency_ms']['p99']).to(be_above(0))
+
+        with it('should find results that got worse than their baseline by more than the tolerance'):
+            baseline = {'elements_per_second': 1000.0, 'alert_latency_ms': {'p50': 10.0, 'p99': 20.0}}
+            results = {'elements_per_second': 950.0, 'alert_latency_ms': {'p50': 10.0, 'p99': 30.0}}
+
+            regressions = throughput.find_regressions(baseline, results, 0.1)
+
+            expect(regressions).to(equal(['alert_latency_ms.p99: 20.000 -> 30.000']))
+
+        with it('should not find regressions in results that got better'):
+            baseline = {'elements_per_second': 1000.0, 'peak_rss_kb': 2000}
+            results = {'elements_per_second': 2000.0, 'peak_rss_kb': 1000}
+
+            expect(throughput.find_regressions(baseline, results, 0.1)).to(be_empty)
+
+    with description('has a startup benchmark, which'):
+        with it('should generate suites with the given number of modules and checks'):
+            directory = tempfile.mkdtemp()
+
+            startup.generate_suite(directory, modules=150, checks=3000, tests_per_module=4, integration_count=3)
+
+            module_paths = [
+                os.path.join(subdirectory, filename)
+                for subdirectory, _, filenames in os.walk(directory)
+                for filename in filenames
+                if filename.endswith('.py')
+            ]
+            with open(module_paths[0]) as module_file:
+                module_source = module_file.read()
+
+            shutil.rmtree(directory)
+
+            expect(len(module_paths)).to(equal(150))
+            expect(module_source.count('@on_failure(')).to(equal(4))
+            expect(module_source.count('check_4)')).to(equal(4))
@@ -0,0 +1,85 @@
+import threading
+
+from expects import expect, equal, raise_error
+
+from pysellus.buffering import BoundedBuffer
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.elements = []
+        self.completed = False
+
+    def on_next(self, element):
+        self.elements.append(element)
+
+    def on_error(self, error):
+        self.error = error
+
+    def on_completed(self):
+        self.completed = True
+
+
+def fill(buffer, elements):
+    for element in elements:
+        buffer.on_next(element)
+    buffer.on_completed()
+
+
+with description('the buffering module'):
+    with context('exposes a `BoundedBuffer` class which'):
+        with it('rejects unknown policies'):
+            expect(lambda: BoundedBuffer(1, 'bogus')).to(raise_error(ValueError))
+
+        with it('hands every buffered element over to an observer, then completes it'):
+            buffer = BoundedBuffer(10)
+            observer = RecordingObserver()
+
+            fill(buffer, [1, 2, 3])
+            buffer.drain_into(observer)
+
+            expect(observer.elements).to(equal([1, 2, 3]))
+            expect(observer.completed).to(equal(True))
+
+        with it('drops the newest elements when full with the drop-newest policy'):
+            buffer = BoundedBuffer(2, 'drop-newest')
+            observer = RecordingObserver()
+
+            fill(buffer, [1, 2, 3, 4])
+            buffer.drain_into(observer)
+
+            expect(observer.elements).to(equal([1, 2]))
+            expect(buffer.stats()).to(equal({'depth': 0, 'high_water': 2, 'dropped': 2}))
+
+        with it('drops the oldest elements when full with the drop-oldest policy'):
+            buffer = BoundedBuffer(2, 'drop-oldest')
+            observer = RecordingObserver()
+
+            fill(buffer, [1, 2, 3, 4])
+            buffer.drain_into(observer)
+
+            expect(observer.elements).to(equal([3, 4]))
+            expect(buffer.dropped).to(equal(2))
+
+        with it('keeps one out of every few new elements when full with the sample policy'):
+            buffer = BoundedBuffer(1, 'sample', sample_every=2)
+            observer = RecordingObserver()
+
+            fill(buffer, [1, 2, 3, 4, 5])
+            buffer.drain_into(observer)
+
+            expect(observer.elements).to(equal([5]))
+            expect(buffer.dropped).to(equal(4))
+
+        with it('blocks the stream when full with the block policy'):
+            buffer = BoundedBuffer(1, 'block')
+            observer = RecordingObserver()
+
+            producer = threading.Thread(target=fill, args=(buffer, range(100)))
+            producer.start()
+            buffer.drain_into(observer)
+            producer.join()
+
+            expect(observer.elements).to(equal(list(range(100))))
+            expect(buffer.dropped).to(equal(0))
+            expect(buffer.high_water).to(equal(1))
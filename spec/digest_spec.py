@@ -0,0 +1,115 @@
+import time
+
+from expects import expect, equal, raise_error
+
+from pysellus.digest import Digest
+from pysellus.payload import FailurePayload
+
+
+class RecordingIntegration:
+    def __init__(self):
+        self.summaries = []
+        self.errors = []
+        self.completed = False
+
+    def on_next(self, payload):
+        self.summaries.append(payload)
+
+    def on_error(self, payload):
+        self.errors.append(payload)
+
+    def on_completed(self):
+        self.completed = True
+
+
+with description('the digest module'):
+    with context('exposes a `Digest` class which'):
+        with before.each:
+            self.integration = RecordingIntegration()
+
+        with it('requires a time or count window'):
+            expect(lambda: Digest(self.integration)).to(raise_error(TypeError))
+
+        with it('sends one summary per test once a count window is full'):
+            digest = Digest(self.integration, count=3, samples=2, clock=lambda: 7)
+
+            for element in range(4):
+                digest.on_next(FailurePayload('a test', 'a_tester', element))
+            digest.on_next(FailurePayload('another test', 'a_tester', 0))
+
+            expect(len(self.integration.summaries)).to(equal(1))
+            expect(self.integration.summaries[0]['test_name']).to(equal('a test'))
+            expect(self.integration.summaries[0]['element']).to(equal({
+                'count': 3,
+                'first_seen': 7,
+                'last_seen': 7,
+                'samples': [0, 1]
+            }))
+
+        with it('sends a summary once a time window closes'):
+            digest = Digest(self.integration, window=0.01)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1))
+            time.sleep(0.1)
+
+            expect(len(self.integration.summaries)).to(equal(1))
+            expect(self.integration.summaries[0]['element']['count']).to(equal(1))
+
+        with it('flushes every open window when completed'):
+            digest = Digest(self.integration, window=60)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1))
+            digest.on_next(FailurePayload('another test', 'a_tester', 1))
+            digest.on_completed()
+
+            expect(len(self.integration.summaries)).to(equal(2))
+            expect(self.integration.completed).to(equal(True))
+
+        with it('keeps the sampling rate of sampled failures in their summary'):
+            digest = Digest(self.integration, count=2)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1, sampling_rate=0.1))
+            digest.on_next(FailurePayload('a test', 'a_tester', 2, sampling_rate=0.1))
+
+            expect(self.integration.summaries[0]['sampling_rate']).to(equal(0.1))
+
+        with it('does not mix failures with different sampling rates in a window'):
+            digest = Digest(self.integration, window=60)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1, sampling_rate=0.1))
+            digest.on_next(FailurePayload('a test', 'another_tester', 2))
+            digest.flush()
+
+            expect([summary['element']['count'] for summary in self.integration.summaries]).to(equal([1, 1]))
+            expect([summary.get('sampling_rate') for summary in self.integration.summaries]).to(equal([0.1, None]))
+
+        with it('keeps separate windows for test functions sharing a description'):
+            digest = Digest(self.integration, count=2)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1, test_function='a_test'))
+            digest.on_next(FailurePayload('a test', 'a_tester', 2, test_function='another_test'))
+            digest.on_next(FailurePayload('a test', 'a_tester', 3, test_function='a_test'))
+
+            expect(len(self.integration.summaries)).to(equal(1))
+            expect(self.integration.summaries[0]['test_function']).to(equal('a_test'))
+            expect(self.integration.summaries[0]['element']['samples']).to(equal([1, 3]))
+
+        with it('does not let the timer of a closed window close the next one'):
+            digest = Digest(self.integration, window=60, count=2)
+
+            digest.on_next(FailurePayload('a test', 'a_tester', 1))
+            closed_window = digest._open_windows['a test']
+            digest.on_next(FailurePayload('a test', 'a_tester', 2))
+            digest.on_next(FailurePayload('a test', 'a_tester', 3))
+            digest._expire('a test', closed_window)
+
+            expect(len(self.integration.summaries)).to(equal(1))
+            expect(digest._open_windows['a test'].count).to(equal(1))
+
+        with it('passes errors through'):
+            digest = Digest(self.integration, count=10)
+            error_payload = FailurePayload('a test', 'a_tester', 1, error=ValueError())
+
+            digest.on_error(error_payload)
+
+            expect(self.integration.errors).to(equal([error_payload]))
@@ -0,0 +1,68 @@
+import threading
+
+from expects import expect, equal, be, be_false
+
+from pysellus.dispatcher import Dispatcher
+
+
+class RecordingSubject:
+    def __init__(self):
+        self.notifications = []
+        self.threads = set()
+
+    def on_next(self, payload):
+        self.threads.add(threading.current_thread())
+        self.notifications.append(('next', payload))
+
+    def on_error(self, payload):
+        self.notifications.append(('error', payload))
+
+    def on_completed(self):
+        self.notifications.append(('completed', None))
+
+
+with description('the dispatcher module'):
+    with context('exposes a `Dispatcher` class which'):
+        with before.each:
+            self.dispatcher = Dispatcher()
+            self.subject = RecordingSubject()
+
+        with it('returns the same channel for the same integration'):
+            channel = self.dispatcher.channel_for('an_integration', self.subject)
+
+            expect(self.dispatcher.channel_for('an_integration', self.subject)).to(be(channel))
+
+        with it('delivers notifications from a worker thread, and completes the subject after flushing them'):
+            channel = self.dispatcher.channel_for('an_integration', self.subject)
+
+            channel.on_next(1)
+            channel.on_error(2)
+            self.dispatcher.shutdown()
+
+            expect(self.subject.notifications).to(equal([('next', 1), ('error', 2), ('completed', None)]))
+            expect(threading.current_thread() in self.subject.threads).to(be_false)
+
+        with it('keeps delivering after an integration raises'):
+            class BrokenSubject(RecordingSubject):
+                def on_next(self, payload):
+                    raise ValueError
+
+            subject = BrokenSubject()
+            channel = self.dispatcher.channel_for('a_broken_integration', subject)
+
+            channel.on_next(1)
+            channel.on_error(2)
+            self.dispatcher.shutdown()
+
+            expect(subject.notifications).to(equal([('error', 2), ('completed', None)]))
+
+        with it('reports queue depth and delivery latency per integration'):
+            channel = self.dispatcher.channel_for('an_integration', self.subject)
+
+            channel.on_next(1)
+            self.dispatcher.shutdown()
+
+            stats = self.dispatcher.stats()['an_integration']
+            expect(stats['depth']).to(equal(0))
+            expect(stats['delivered']).to(equal(1))
+            expect(stats['max_latency'] >= stats['mean_latency'] > 0).to(equal(True))
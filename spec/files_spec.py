@@ -0,0 +1,189 @@
+import os
+import time
+import pickle
+import tempfile
+import threading
+
+from expects import expect, equal, be, raise_error
+
+from pysellus import files
+from pysellus.files import mapped_file, follow, split_blocks, FollowedFile, JSONLine
+
+
+def append(path, data):
+    with open(path, 'ab') as file:
+        file.write(data)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+with description('the files module'):
+    with before.each:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'a.log')
+
+    with after.each:
+        self.directory.cleanup()
+
+    with context('exposes a `mapped_file` source which'):
+        with it('emits the lines of a file as bytes, without their line endings'):
+            with open(self.path, 'wb') as file:
+                file.write(b'first\nsecond\r\nthird')
+            received_lines = []
+
+            mapped_file(self.path).subscribe(received_lines.append)
+
+            expect(received_lines).to(equal([b'first', b'second', b'third']))
+
+        with it('can be iterated'):
+            with open(self.path, 'wb') as file:
+                file.write(b'first\nsecond\n')
+
+            expect(list(mapped_file(self.path))).to(equal([b'first', b'second']))
+
+        with it('emits nothing for an empty file'):
+            open(self.path, 'wb').close()
+            received_lines = []
+
+            mapped_file(self.path).subscribe(received_lines.append)
+
+            expect(received_lines).to(equal([]))
+
+        with it('gives the same source for the same file and settings'):
+            expect(mapped_file(self.path)).to(be(mapped_file(os.path.join(self.directory.name, '.', 'a.log'))))
+            expect(mapped_file(self.path)).not_to(be(mapped_file(self.path, jsonl=True)))
+
+        with it('only parses the lines of a JSONL file when they are looked into'):
+            with open(self.path, 'wb') as file:
+                file.write(b'{"level": "ERROR"}\nnot json\n')
+
+            lines = list(mapped_file(self.path, jsonl=True))
+
+            expect(lines[0]['level']).to(equal('ERROR'))
+            expect(lines[0].get('user_id')).to(equal(None))
+            expect(lines[1].raw).to(equal(b'not json'))
+            expect(lambda: lines[1]['level']).to(raise_error(ValueError))
+
+    with context('exposes a `follow` source which'):
+        with before.each:
+            self.received_lines = []
+            self.followers = []
+
+            def start_following(**settings):
+                follower = FollowedFile(self.path, poll_interval=0.01, **settings)
+                thread = threading.Thread(target=follower.subscribe, args=(self.received_lines.append,))
+                thread.start()
+                self.followers.append((follower, thread))
+                return follower
+
+            self.start_following = start_following
+
+        with after.each:
+            for follower, thread in self.followers:
+                follower.stop()
+                thread.join()
+
+        with it('emits the lines appended to the file, once they are complete'):
+            append(self.path, b'old line\n')
+            self.start_following()
+            time.sleep(0.05)
+
+            append(self.path, b'first\nsec')
+            wait_until(lambda: self.received_lines)
+            append(self.path, b'ond\n')
+            wait_until(lambda: len(self.received_lines) == 2)
+
+            expect(self.received_lines).to(equal([b'first', b'second']))
+
+        with it('emits the lines already in the file, if asked to follow it from the start'):
+            append(self.path, b'old line\n')
+            self.start_following(from_start=True)
+
+            wait_until(lambda: self.received_lines)
+
+            expect(self.received_lines).to(equal([b'old line']))
+
+        with it('keeps following the file when it is rotated'):
+            append(self.path, b'')
+            self.start_following()
+            time.sleep(0.05)
+
+            append(self.path, b'before rotation\nlast line')
+            os.rename(self.path, self.path + '.1')
+            append(self.path, b'after rotation\n')
+            wait_until(lambda: len(self.received_lines) == 3)
+
+            expect(self.received_lines).to(equal([b'before rotation', b'last line', b'after rotation']))
+
+        with it('emits the lines written to a rotated file after it was last read'):
+            append(self.path, b'')
+            follower = FollowedFile(self.path, poll_interval=0.01)
+            is_rotated = follower._is_rotated
+
+            def rotate_while_checking(file):
+                if not os.path.exists(self.path + '.1'):
+                    append(self.path, b'written late\n')
+                    os.rename(self.path, self.path + '.1')
+                    append(self.path, b'after rotation\n')
+                return is_rotated(file)
+
+            follower._is_rotated = rotate_while_checking
+            thread = threading.Thread(target=follower.subscribe, args=(self.received_lines.append,))
+            thread.start()
+            self.followers.append((follower, thread))
+
+            wait_until(lambda: len(self.received_lines) == 2)
+
+            expect(self.received_lines).to(equal([b'written late', b'after rotation']))
+
+        with it('keeps following the file when it is truncated'):
+            append(self.path, b'')
+            self.start_following()
+            time.sleep(0.05)
+
+            append(self.path, b'before truncation\n')
+            wait_until(lambda: self.received_lines)
+            with open(self.path, 'wb') as file:
+                file.write(b'new\n')
+            wait_until(lambda: len(self.received_lines) == 2)
+
+            expect(self.received_lines).to(equal([b'before truncation', b'new']))
+
+        with it('resumes from the last line emitted when given an offset file'):
+            offset_path = os.path.join(self.directory.name, 'a.offset')
+            append(self.path, b'first\n')
+            follower = self.start_following(offset_path=offset_path, from_start=True)
+            wait_until(lambda: self.received_lines)
+            follower.stop()
+            append(self.path, b'second\n')
+
+            self.start_following(offset_path=offset_path)
+            wait_until(lambda: len(self.received_lines) == 2)
+
+            expect(self.received_lines).to(equal([b'first', b'second']))
+
+        with it('gives the same source for the same file and settings'):
+            expect(follow(self.path)).to(be(follow(self.path)))
+            expect(follow(self.path)).not_to(be(follow(self.path, from_start=True)))
+
+    with context('exposes a `split_blocks` function which'):
+        with it('splits a buffer into lines, a block at a time'):
+            blocks = list(split_blocks(b'one\ntwo\nthree\nfour', block_size=9))
+
+            expect(blocks).to(equal([[b'one', b'two'], [b'three'], [b'four']]))
+
+        with it('keeps lines longer than a block whole'):
+            expect(list(split_blocks(b'a long line\nshort', block_size=4))).to(equal([[b'a long line'], [b'short']]))
+
+    with it('can send JSON lines to other processes'):
+        line = JSONLine(b'{"a": 1}')
+
+        expect(pickle.loads(pickle.dumps(line))['a']).to(equal(1))
+
+    with after.all:
+        files._mapped_files.clear()
+        files._followed_files.clear()
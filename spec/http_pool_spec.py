@@ -0,0 +1,55 @@
+from expects import expect, be, equal, raise_error, have_key
+
+from pysellus import http_pool
+
+with description('the http_pool module'):
+    with before.each:
+        self.original_settings = dict(http_pool.settings)
+
+    with after.each:
+        http_pool.configure(**self.original_settings)
+
+    with it('shares a single session per name'):
+        expect(http_pool.get_session()).to(be(http_pool.get_session()))
+        expect(http_pool.get_session('another')).to_not(be(http_pool.get_session()))
+
+    with it('rebuilds sessions after being configured'):
+        session = http_pool.get_session()
+
+        http_pool.configure(pool_size=2)
+
+        expect(http_pool.get_session()).to_not(be(session))
+
+    with it('rejects unknown settings'):
+        expect(lambda: http_pool.configure(bogus=1)).to(raise_error(TypeError))
+
+    with it('sizes the connection pool as configured'):
+        http_pool.configure(pool_size=3)
+
+        adapter = http_pool.get_session().get_adapter('https://example.org')
+
+        expect(adapter._pool_maxsize).to(equal(3))
+
+    with it('closes connections after every request if keep-alive is disabled'):
+        http_pool.configure(keep_alive=False)
+
+        expect(http_pool.get_session().headers['Connection']).to(equal('close'))
+
+    with it('applies the default timeout unless one is given'):
+        received_kwargs = []
+        request = http_pool._with_default_timeout(
+            lambda method, url, **kwargs: received_kwargs.append(kwargs),
+            5
+        )
+
+        request('GET', 'http://example.org')
+        request('GET', 'http://example.org', timeout=1)
+
+        expect(received_kwargs).to(equal([{'timeout': 5}, {'timeout': 1}]))
+
+    with it('uses the default session in the stock integrations'):
+        from pysellus.stock_integrations import slack, trello
+
+        expect(slack.SlackIntegration('an_url')._http_client).to(be(http_pool.get_session()))
+        expect(trello.TrelloAPI('a_key', 'a_token')._http_client).to(be(http_pool.get_session()))
+        expect(http_pool.settings).to(have_key('timeout'))
@@ -3,12 +3,13 @@ import tempfile
 import shutil
 
 from doublex import Spy
-from expects import expect, have_key, raise_error, be
-from doublex_expects import have_been_called_with
+from expects import expect, have_key, raise_error, be, equal
+from doublex_expects import have_been_called, have_been_called_with
 
 from pysellus import loader
 from pysellus import integrations
 from pysellus import integration_config
+from pysellus import http_pool
 
 
 with description('the integration_config module'):
@@ -48,6 +49,24 @@ with description('the integration_config module'):
                 )
 
     with description('loads integrations from a dict'):
+        with context('which has an http section'):
+            with before.each:
+                self.original_http_settings = dict(http_pool.settings)
+
+            with after.each:
+                http_pool.configure(**self.original_http_settings)
+
+            with it('configures the shared HTTP connection pool with it'):
+                integration_config._load_http_settings({'http': {'pool_size': 4, 'timeout': 2}})
+
+                expect(http_pool.settings['pool_size']).to(equal(4))
+                expect(http_pool.settings['timeout']).to(equal(2))
+
+            with it('aborts the program if it contains unknown settings'):
+                expect(lambda: integration_config._load_http_settings({'http': {'bogus': 1}})).to(
+                    raise_error(SystemExit)
+                )
+
         with context('which has a definition section'):
             with it('returns None if it is missing'):
                 expect(integration_config._load_custom_integrations({})).to(be(None))
@@ -112,13 +131,15 @@ with description('the integration_config module'):
 
                         an_integration_class_object = Spy()
 
-                        loader.load_modules = lambda path: ['sample_returned_module']
+                        loaded_modules = []
+                        loader.load_modules = lambda path: loaded_modules.append(path) or ['sample_returned_module']
                         integration_config._get_classes_in_module = \
                             lambda module: [(an_integration_class_name, an_integration_class_object)]
 
                         integration_config._load_custom_integrations_classes(config_dict)
 
                         expect(integrations.integration_classes).to(have_key('some_alias'))
+                        expect(loaded_modules).to(equal([]))
                         expect(integration_config.integration_classes['some_alias']).to(be(an_integration_class_object))
 
                         del integration_config.integration_classes['some_alias']
@@ -130,10 +151,14 @@ with description('the integration_config module'):
                         integration_config._get_matching_classobject_from_path = lambda a, b: None
 
                         config_dict = {'some_alias': {'path': '/some/path', 'name': 'some_name'}}
-                        expect(lambda: integration_config._load_custom_integrations_classes(config_dict)).to(
+                        integration_config._load_custom_integrations_classes(config_dict)
+
+                        expect(lambda: integrations.integration_classes['some_alias']).to(
                             raise_error(SystemExit)
                         )
 
+                        del integrations.integration_classes['some_alias']
+
                         integration_config._get_matching_classobject_from_path = original_integration_class_finder
 
         with context('and a notify section'):
@@ -141,12 +166,19 @@ with description('the integration_config module'):
                 self.original_integration_instance_creator = integration_config._get_integration_instance
                 self.integration_config_spy = Spy()
                 integration_config._get_integration_instance = self.integration_config_spy._get_integration_instance
+                for integration_name in ['an_integration', 'another_integration']:
+                    integrations.integration_classes[integration_name] = Spy()
 
             with it('aborts the program if it is missing'):
                 expect(lambda: integration_config._load_defined_integrations({})).to(
                     raise_error(SystemExit)
                 )
 
+            with it('aborts the program if an integration is not defined'):
+                expect(lambda: integration_config._load_defined_integrations({'notify': {'undefined_integration': None}})).to(
+                    raise_error(SystemExit)
+                )
+
             with context('when an integration alias is specified'):
                 with context('and the integration is configured with one or more parameters'):
                     with it('requests an integration instance and registers that alias'):
@@ -162,10 +194,14 @@ with description('the integration_config module'):
 
                         integration_config._load_defined_integrations(integrations_configuration)
 
+                        expect(integrations.loaded_integrations).to(have_key('my-alias'))
+                        expect(self.integration_config_spy._get_integration_instance).to_not(have_been_called)
+
+                        integrations.loaded_integrations['my-alias']
+
                         expect(self.integration_config_spy._get_integration_instance).to(
                             have_been_called_with('an_integration', kwargs_for_integration_constructor).once
                         )
-                        expect(integrations.loaded_integrations).to(have_key('my-alias'))
 
                 with context('and the integration is configured with no parameters'):
                     with it('requests an integration instance and registers that alias'):
@@ -178,10 +214,14 @@ with description('the integration_config module'):
 
                         integration_config._load_defined_integrations(integrations_configuration)
 
+                        expect(integrations.loaded_integrations).to(have_key('my-alias'))
+                        expect(self.integration_config_spy._get_integration_instance).to_not(have_been_called)
+
+                        integrations.loaded_integrations['my-alias']
+
                         expect(self.integration_config_spy._get_integration_instance).to(
                             have_been_called_with('an_integration', kwargs_for_integration_constructor).once
                         )
-                        expect(integrations.loaded_integrations).to(have_key('my-alias'))
 
             with context('when an integration alias is not specified'):
                 with context('and the integration is configured with one or more parameters'):
@@ -195,10 +235,14 @@ with description('the integration_config module'):
 
                         integration_config._load_defined_integrations(integrations_configuration)
 
+                        expect(integrations.loaded_integrations).to(have_key('an_integration'))
+                        expect(self.integration_config_spy._get_integration_instance).to_not(have_been_called)
+
+                        integrations.loaded_integrations['an_integration']
+
                         expect(self.integration_config_spy._get_integration_instance).to(
                             have_been_called_with('an_integration', kwargs_for_integration_constructor).once
                         )
-                        expect(integrations.loaded_integrations).to(have_key('an_integration'))
 
                 with context('and the integration is configured with no parameters'):
                     with it('requests an integration instance and registers the stock name'):
@@ -209,10 +253,38 @@ with description('the integration_config module'):
 
                         integration_config._load_defined_integrations(integrations_configuration)
 
+                        expect(integrations.loaded_integrations).to(have_key('an_integration'))
+                        expect(self.integration_config_spy._get_integration_instance).to_not(have_been_called)
+
+                        integrations.loaded_integrations['an_integration']
+
                         expect(self.integration_config_spy._get_integration_instance).to(
                             have_been_called_with('an_integration', kwargs_for_integration_constructor).once
                         )
-                        expect(integrations.loaded_integrations).to(have_key('an_integration'))
+
+            with context('when an integration is configured with a digest'):
+                with it('does not pass it to the constructor, and stores it as the integration digest'):
+                    integrations_configuration = {'notify': {
+                        'an_integration': {'some_arg': 'some_value', 'digest': {'window': 60}},
+                        'another_integration': {'digest': {'count': 10}}
+                    }}
+
+                    integration_config._load_defined_integrations(integrations_configuration)
+                    integrations.loaded_integrations['an_integration']
+                    integrations.loaded_integrations['another_integration']
+
+                    expect(self.integration_config_spy._get_integration_instance).to(
+                        have_been_called_with('an_integration', {'some_arg': 'some_value'}).once
+                    )
+                    expect(self.integration_config_spy._get_integration_instance).to(
+                        have_been_called_with('another_integration', None).once
+                    )
+                    expect(integrations.integration_digests['an_integration']).to(equal({'window': 60}))
+                    expect(integrations.integration_digests['another_integration']).to(equal({'count': 10}))
+
+                    integrations.integration_digests.clear()
 
             with after.each:
                 integration_config._get_integration_instance = self.original_integration_instance_creator
+                for integration_name in ['an_integration', 'another_integration']:
+                    del integrations.integration_classes[integration_name]
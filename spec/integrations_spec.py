@@ -1,17 +1,19 @@
 import rx
 
-from expects import expect, be, contain_exactly, be_a, raise_error
+from expects import expect, be, contain_exactly, be_a, raise_error, equal
 from doublex import Spy, Mock
-from doublex_expects import have_been_called
+from doublex_expects import have_been_called, have_been_called_with
 
 from pysellus import integrations
 from pysellus.integrations import on_failure
+from pysellus.interfaces import AbstractIntegration
 
 
 with description('the integrations module'):
     with context('exposes an `on_failure` decorator which'):
         with before.each:
             integrations.registered_integrations = {}
+            integrations.setup_functions_by_module = {}
 
             with Mock() as some_integration_instance:
                 some_integration_instance.get_subject().returns(rx.subjects.Subject())
@@ -23,6 +25,7 @@ with description('the integrations module'):
         with after.each:
             integrations.registered_integrations = {}
             integrations.loaded_integrations = {}
+            integrations.setup_functions_by_module = {}
 
         with it('returns the decorated function as is'):
             decorated_function = Spy().decorated_function
@@ -51,3 +54,94 @@ with description('the integrations module'):
             for setup_function in integrations.registered_integrations:
                 for subject in integrations.registered_integrations[setup_function]['integrations']:
                     expect(subject).to(be_a(rx.subjects.Subject))
+
+        with it('records the decorated function under the name of its module'):
+            def decorated_function():
+                pass
+
+            on_failure('some_integration')(decorated_function)
+
+            expect(integrations.setup_functions_by_module[__name__]).to(
+                equal({'decorated_function': decorated_function})
+            )
+
+        with it('records the sampling rate of the test, if given one'):
+            def decorated_function():
+                pass
+
+            on_failure('some_integration', sample=0.01, sample_key='user_id')(decorated_function)
+
+            expect(integrations.registered_integrations['decorated_function']['sampler'].rate).to(equal(0.01))
+
+        with it('rejects invalid sampling rates as soon as it is called'):
+            expect(lambda: on_failure('some_integration', sample=2)).to(raise_error(ValueError))
+
+    with context('builds integration subjects'):
+        with after.each:
+            integrations.loaded_integrations = {}
+
+        with it('naming the subjects of integrations which do not override get_subject'):
+            class AnIntegration(AbstractIntegration):
+                def on_next(self, payload):
+                    pass
+
+            an_integration = AnIntegration()
+            integrations.loaded_integrations = {'an_alias': an_integration}
+            get_subject = Spy().get_subject
+            an_integration.get_subject = get_subject
+
+            integrations._create('an_alias')
+
+            expect(get_subject).to(have_been_called_with(name='an_alias'))
+
+        with it('calling get_subject without a name when it is overridden'):
+            class AnIntegration(AbstractIntegration):
+                def get_subject(self):
+                    return rx.subjects.Subject()
+
+                def on_next(self, payload):
+                    pass
+
+            integrations.loaded_integrations = {'an_alias': AnIntegration()}
+
+            expect(integrations._create('an_alias')).to(be_a(rx.subjects.Subject))
+
+    with context('when notifications are delivered inline'):
+        with it('completes every integration subject on shutdown'):
+            completed_integrations = []
+            subject = rx.subjects.Subject()
+            subject.subscribe(on_completed=lambda: completed_integrations.append('some_integration'))
+            original_integration_to_subject = integrations.integration_to_subject
+            integrations.integration_to_subject = {'some_integration': subject}
+
+            integrations.shutdown()
+
+            integrations.integration_to_subject = original_integration_to_subject
+            expect(completed_integrations).to(equal(['some_integration']))
+
+        with it('drops the notifications of tests which are no longer registered'):
+            original_registered_integrations = integrations.registered_integrations
+            integrations.registered_integrations = {}
+
+            integrations.notify_element('a_removed_test', {'element': 1})
+            integrations.notify_error('a_removed_test', {'element': 1})
+
+            integrations.registered_integrations = original_registered_integrations
+
+    with context('when the dispatcher is enabled'):
+        with before.each:
+            with Mock() as some_integration_instance:
+                some_integration_instance.get_subject().returns(rx.subjects.Subject())
+
+            integrations.loaded_integrations = {'some_integration': some_integration_instance}
+            integrations.enable_dispatcher()
+
+        with after.each:
+            integrations.shutdown()
+            integrations.dispatcher = None
+            integrations.loaded_integrations = {}
+
+        with it('wraps integration subjects in a dispatcher channel'):
+            channel = integrations._create('some_integration')
+
+            expect(channel).to(be(integrations.dispatcher.channel_for('some_integration', None)))
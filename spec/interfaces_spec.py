@@ -1,7 +1,8 @@
 import rx
 
-from expects import expect, raise_error, be_a
+from expects import expect, raise_error, be_a, equal
 
+from pysellus.payload import FailurePayload
 from pysellus.interfaces import AbstractIntegration
 
 with description('the interfaces module'):
@@ -29,3 +30,17 @@ with description('the interfaces module'):
 
         with it('exposes a `get_subject` method which returns an rx Subject'):
             expect(self.GoodIntegration().get_subject()).to(be_a(rx.subjects.Subject))
+
+        with it('aggregates failures before notifying if the subject is in digest mode'):
+            received_payloads = []
+
+            class RecordingIntegration(AbstractIntegration):
+                def on_next(self, payload):
+                    received_payloads.append(payload)
+
+            subject = RecordingIntegration().get_subject(digest={'count': 2})
+            subject.on_next(FailurePayload('a test', 'a_tester', 1))
+            subject.on_next(FailurePayload('a test', 'a_tester', 2))
+
+            expect(len(received_payloads)).to(equal(1))
+            expect(received_payloads[0]['element']['count']).to(equal(2))
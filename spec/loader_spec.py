@@ -1,8 +1,15 @@
-from expects import expect
+import os
+import sys
+import types
+import shutil
+import tempfile
+
+from rx.subjects import Subject
+from expects import expect, equal, be
 
 from spec.custom_matchers.contain_exactly_function_called import contain_exactly_function_called
 
-from pysellus import loader
+from pysellus import loader, integrations
 
 with description('the loader module loads all top-level functions in a directory or file'):
     with it('should load every function when there is only one file'):
@@ -31,3 +38,113 @@ with description('the loader module loads all top-level functions in a directory
         expect(loader.load_test_files('spec/fixtures/file_with_helper_functions/')).to(
             contain_exactly_function_called('function')
         )
+
+    with it('should load the setup functions recorded for a module without scanning it'):
+        a_module = types.ModuleType('a_module_with_recorded_functions')
+
+        def recorded_function():
+            pass
+
+        a_module.unmarked_function = recorded_function
+        integrations.setup_functions_by_module[a_module.__name__] = {'recorded_function': recorded_function}
+
+        expect(loader._get_setup_functions_from_module(a_module)).to(equal([recorded_function]))
+
+        del integrations.setup_functions_by_module[a_module.__name__]
+
+    with context('when given a directory with subdirectories'):
+        with before.each:
+            self.root = tempfile.mkdtemp()
+            for relative_path in ['recursive_suite_a/checks.py', 'recursive_suite_a/nested/checks.py', 'recursive_suite_b/checks.py']:
+                path = os.path.join(self.root, relative_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as python_file:
+                    python_file.write(
+                        'def {0}():\n    pass\n\n\n{0}.is_setup_function = True\n'.format(
+                            relative_path.replace('/', '_')[:-3]
+                        )
+                    )
+
+        with after.each:
+            shutil.rmtree(self.root)
+            for module_name in list(sys.modules):
+                if module_name.startswith('pysellus_suite.recursive_suite_'):
+                    del sys.modules[module_name]
+
+        with it('should load the setup functions of every file, recursively'):
+            setup_function_names = [function.__name__ for function in loader.load_test_files(self.root)]
+
+            expect(setup_function_names).to(equal([
+                'recursive_suite_a_checks',
+                'recursive_suite_a_nested_checks',
+                'recursive_suite_b_checks'
+            ]))
+
+        with it('should name modules after their path, so that files with the same name do not collide'):
+            module_names = [module.__name__ for module in loader.load_modules(self.root)]
+
+            expect(module_names).to(equal([
+                'pysellus_suite.recursive_suite_a.checks',
+                'pysellus_suite.recursive_suite_a.nested.checks',
+                'pysellus_suite.recursive_suite_b.checks'
+            ]))
+
+        with it('should record how long every step and every module import took'):
+            loader.load_test_files(self.root)
+
+            expect(loader.load_report['files']).to(equal(3))
+            expect('pysellus_suite.recursive_suite_a.nested.checks' in loader.module_import_seconds).to(be(True))
+
+        with it('should not list unchanged directories again'):
+            loader.load_test_files(self.root)
+
+            original_list_directory = loader._list_directory
+            listed_directories = []
+            loader._list_directory = lambda directory: listed_directories.append(directory) or original_list_directory(directory)
+
+            loader.load_test_files(self.root)
+
+            loader._list_directory = original_list_directory
+
+            expect(listed_directories).to(equal([]))
+
+    with context('when given files named like other modules'):
+        with before.each:
+            self.root = tempfile.mkdtemp()
+            for relative_path in ['json.py', 'email/checks.py']:
+                path = os.path.join(self.root, relative_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as python_file:
+                    python_file.write('import json\n\n\nLOADED_JSON = json\n')
+
+        with after.each:
+            shutil.rmtree(self.root)
+            for module_name in ['pysellus_suite.json', 'pysellus_suite.email', 'pysellus_suite.email.checks']:
+                sys.modules.pop(module_name, None)
+
+        with it('should import them without shadowing those modules'):
+            modules = loader.load_modules(self.root)
+
+            expect([module.__name__ for module in modules]).to(equal([
+                'pysellus_suite.json',
+                'pysellus_suite.email.checks'
+            ]))
+            expect(modules[1].LOADED_JSON).to(be(sys.modules['json']))
+            expect(self.root in sys.path).to(be(False))
+
+    with context('when given STL files'):
+        with before.each:
+            self.root = tempfile.mkdtemp()
+            with open(os.path.join(self.root, 'loader_spec_checks.stl'), 'w') as stl_file:
+                stl_file.write("@failure >> loader_spec_integration\n@check 'an stl test':\n    pass\n")
+            integrations.integration_to_subject['loader_spec_integration'] = Subject()
+
+        with after.each:
+            shutil.rmtree(self.root)
+            del integrations.integration_to_subject['loader_spec_integration']
+            integrations.registered_integrations.pop('pscheck_an_stl_test', None)
+
+        with it('should load the setup functions of their test cases'):
+            setup_function_names = [function.__name__ for function in loader.load_test_files(self.root)]
+
+            expect(setup_function_names).to(equal(['pscheck_an_stl_test']))
@@ -0,0 +1,97 @@
+import asyncio
+from urllib.request import urlopen
+
+from doublex import Spy
+from expects import expect, equal, contain, raise_error
+
+from pysellus import metrics
+
+with description('the metrics module'):
+    with before.each:
+        self.counter = metrics.Counter('a_spec_counter_total', 'A counter', ['label'])
+        self.histogram = metrics.Histogram('a_spec_seconds', 'A histogram', ['label'], buckets=(0.1, 1.0))
+
+    with after.each:
+        metrics._metrics.remove(self.counter)
+        metrics._metrics.remove(self.histogram)
+        metrics.enabled = False
+
+    with it('should count separately for every combination of label values'):
+        self.counter.labels('a').inc()
+        self.counter.labels('a').inc(2)
+        self.counter.labels('b').inc()
+
+        expect(self.counter.totals()).to(equal({('a',): 3, ('b',): 1}))
+
+    with it('should render metrics in the Prometheus text format'):
+        self.counter.labels('a "quoted" value').inc()
+        for value in [0.05, 0.5, 5]:
+            self.histogram.labels('a').observe(value)
+
+        rendered_metrics = metrics.render().split('\n')
+
+        expect(rendered_metrics).to(contain(
+            '# TYPE a_spec_counter_total counter',
+            'a_spec_counter_total{label="a \\"quoted\\" value"} 1',
+            '# TYPE a_spec_seconds histogram',
+            'a_spec_seconds_bucket{label="a",le="0.1"} 1',
+            'a_spec_seconds_bucket{label="a",le="1.0"} 2',
+            'a_spec_seconds_bucket{label="a",le="+Inf"} 3',
+            'a_spec_seconds_sum{label="a"} 5.55',
+            'a_spec_seconds_count{label="a"} 3'
+        ))
+
+    with it('should only time testers when enabled'):
+        metrics.time_tester('a_spec_test', 'a_disabled_tester', lambda element: True, 1)
+
+        metrics.enable()
+        result = metrics.time_tester('a_spec_test', 'an_enabled_tester', lambda element: element > 0, 1)
+
+        tester_totals = metrics.tester_seconds.totals()
+        expect(result).to(equal(True))
+        expect(tester_totals[('a_spec_test', 'an_enabled_tester')][1]).to(equal(1))
+        expect(list(tester_totals)).not_to(contain(('a_spec_test', 'a_disabled_tester')))
+
+    with it('should time async testers, including the time spent awaiting them'):
+        async def an_async_tester(element):
+            await asyncio.sleep(0.01)
+            return element > 0
+
+        metrics.enable()
+        result = asyncio.run(metrics.time_async_tester('a_spec_test', 'an_async_tester', an_async_tester, 1))
+
+        seconds, count = metrics.tester_seconds.totals()[('a_spec_test', 'an_async_tester')]
+        expect(result).to(equal(True))
+        expect(count).to(equal(1))
+        expect(seconds >= 0.01).to(equal(True))
+
+    with it('should count the notifications an integration failed to deliver'):
+        metrics.enable()
+        integration = Spy()
+        integration.on_next = lambda payload: 1 / 0
+
+        instrumented_integration = metrics.instrument_integration('a_spec_integration', integration)
+
+        expect(lambda: instrumented_integration.on_next({})).to(raise_error(ZeroDivisionError))
+        expect(metrics.integration_errors.totals()[('a_spec_integration',)]).to(equal(1))
+
+    with it('should serve the rendered metrics over HTTP'):
+        self.counter.labels('served').inc()
+        server = metrics.start_http_server(0)
+
+        with urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1])) as response:
+            body = response.read().decode('utf-8')
+
+        server.shutdown()
+        server.server_close()
+
+        expect(body).to(contain('a_spec_counter_total{label="served"} 1'))
+
+    with it('should summarize stream rates and slow testers'):
+        metrics.stream_elements.labels('a-spec-stream').inc(30)
+        metrics.tester_seconds.labels('a_spec_test', 'a_slow_tester').observe(2.0)
+
+        summary = metrics.summarize({('a-spec-stream',): 10}, 2.0)
+
+        expect(summary).to(contain('a-spec-stream: 30 elements, 10.0/s'))
+        expect(summary).to(contain('a_spec_test -> a_slow_tester: 1 calls, 2.000000s mean, 0 failures, 0 errors'))
@@ -0,0 +1,58 @@
+import pickle
+
+from expects import expect, equal, raise_error, have_key, be
+
+from pysellus.payload import FailurePayload
+
+with description('the payload module'):
+    with context('exposes a `FailurePayload` class which'):
+        with before.each:
+            self.payload = FailurePayload('a test', 'a_tester', 42)
+
+        with it('exposes its fields as attributes'):
+            expect(self.payload.test_name).to(equal('a test'))
+            expect(self.payload.expect_function).to(equal('a_tester'))
+            expect(self.payload.element).to(be(42))
+
+        with it('supports dict-style access'):
+            expect(self.payload['test_name']).to(equal('a test'))
+            expect(dict(self.payload)).to(equal({
+                'test_name': 'a test',
+                'expect_function': 'a_tester',
+                'element': 42
+            }))
+
+        with it('only contains the error once it has been set'):
+            expect(self.payload).to_not(have_key('error'))
+            expect(lambda: self.payload['error']).to(raise_error(KeyError))
+
+            an_error = ValueError()
+            self.payload['error'] = an_error
+
+            expect(self.payload['error']).to(be(an_error))
+
+        with it('rejects unknown fields'):
+            def set_unknown_field():
+                self.payload['foo'] = 'bar'
+
+            expect(set_unknown_field).to(raise_error(KeyError))
+            expect(lambda: self.payload['foo']).to(raise_error(KeyError))
+
+        with it('can be pickled, so that it can be sent across processes'):
+            unpickled_payload = pickle.loads(pickle.dumps(self.payload))
+
+            expect(dict(unpickled_payload)).to(equal(dict(self.payload)))
+
+        with it('can be copied with some fields replaced'):
+            copied_payload = self.payload.replace(suppressed=3)
+
+            expect(copied_payload['suppressed']).to(equal(3))
+            expect(copied_payload['element']).to(be(42))
+            expect(self.payload).to_not(have_key('suppressed'))
+
+        with it('only contains the sampling rate of sampled testers'):
+            expect(self.payload).to_not(have_key('sampling_rate'))
+
+            self.payload['sampling_rate'] = 0.01
+
+            expect(self.payload.replace(suppressed=3)['sampling_rate']).to(equal(0.01))
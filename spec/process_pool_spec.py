@@ -0,0 +1,66 @@
+import os
+
+from rx import Observable
+from expects import expect, equal, contain_exactly
+
+from pysellus import process_pool, integrations
+
+with description('the process_pool module'):
+    with it('should split the streams into shards of roughly the same number of testers'):
+        stream_to_testers = {
+            'a_stream': [1, 2, 3],
+            'another_stream': [4, 5],
+            'a_third_stream': [6]
+        }
+
+        shards = process_pool._make_shards(stream_to_testers, 2)
+
+        expect([sum(len(testers) for testers in shard.values()) for shard in shards]).to(
+            contain_exactly(3, 3)
+        )
+
+    with it('should not build more workers than streams'):
+        workers, _ = process_pool.build_workers({'a_stream': [1]}, 4)
+
+        expect(len(workers)).to(equal(1))
+
+    with it('should notify the failures found by the workers from the parent process'):
+        received_payloads = []
+
+        class AnIntegration:
+            def on_next(self, payload):
+                received_payloads.append(payload)
+
+            def on_error(self, payload):
+                pass
+
+        original_registered_integrations = integrations.registered_integrations
+        integrations.registered_integrations = {
+            'a_test': {'test_description': 'a test', 'integrations': [AnIntegration()]}
+        }
+
+        def a_tester(element):
+            if element < 0:
+                integrations.notify_element('a_test', element)
+
+        process_pool.launch_workers(*process_pool.build_workers({
+            Observable.from_([1, -2, 3, -4]): [a_tester]
+        }, 2))
+
+        integrations.registered_integrations = original_registered_integrations
+
+        expect(received_payloads).to(equal([-2, -4]))
+
+    with it('should stop waiting for workers which die before they are done'):
+        original_check_interval = process_pool.WORKER_CHECK_INTERVAL
+        process_pool.WORKER_CHECK_INTERVAL = 0.05
+
+        def a_crashing_tester(element):
+            os._exit(1)
+
+        workers, failure_queue = process_pool.build_workers({Observable.from_([1]): [a_crashing_tester]}, 1)
+        process_pool.launch_workers(workers, failure_queue)
+
+        process_pool.WORKER_CHECK_INTERVAL = original_check_interval
+
+        expect(workers[0].exitcode).to(equal(1))
@@ -0,0 +1,76 @@
+import os
+import atexit
+import pstats
+import shutil
+import tempfile
+from threading import Thread
+
+from expects import expect, be, contain
+
+from pysellus import profiling, registrar
+
+
+def a_profiled_tester(element):
+    return element > 0
+
+
+with description('the profiling module'):
+    with before.each:
+        self.directory = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.directory, 'pysellus.prof')
+
+    with after.each:
+        atexit.unregister(profiling.dump)
+        profiling.enabled = False
+        profiling._profiles.clear()
+        registrar.stream_to_testers.clear()
+        shutil.rmtree(self.directory)
+
+    with it('should not wrap thread targets unless enabled'):
+        expect(profiling.profiled(a_profiled_tester, 'stream-0')).to(be(a_profiled_tester))
+
+    with it('should write the merged profile of every thread, and a report grouped by test'):
+        profiling.enable(self.output_path, dump_signal=None)
+        wrapped_tester = registrar._wrap_tester(
+            registrar._on_failure_wrapper, 'pscheck_a_test', 'a test', a_profiled_tester
+        )
+        registrar.stream_to_testers['a stream'] = [wrapped_tester]
+
+        def thread_target():
+            for element in range(1, 4):
+                wrapped_tester(element)
+
+        thread = Thread(target=profiling.profiled(thread_target, 'stream-0'))
+        thread.start()
+        thread.join()
+
+        profiling.dump()
+
+        profiled_functions = [function_name for _, _, function_name in pstats.Stats(self.output_path).stats]
+        with open(self.output_path + '.txt') as report_file:
+            report = report_file.read().split('\n')
+
+        expect(profiled_functions).to(contain('a_profiled_tester'))
+        expect(report).to(contain('  pscheck_a_test'))
+        expect(report[report.index('  pscheck_a_test') + 1]).to(contain('a_profiled_tester: 3 calls'))
+        expect([line.split(':')[0] for line in report]).to(contain('  stream-0'))
+
+    with it('should keep profiling threads after a dump'):
+        profiling.enable(self.output_path, dump_signal=None)
+
+        def thread_target():
+            a_profiled_tester(1)
+            profiling.dump()
+            a_profiled_tester(2)
+
+        thread = Thread(target=profiling.profiled(thread_target, 'stream-0'))
+        thread.start()
+        thread.join()
+
+        profiling.dump()
+
+        calls = {
+            function_name: calls
+            for (_, _, function_name), (_, calls, _, _, _) in pstats.Stats(self.output_path).stats.items()
+        }
+        expect(calls['a_profiled_tester']).to(be(2))
@@ -1,8 +1,11 @@
+import asyncio
+
+from rx import Observable
 from doublex import Spy, Mock
-from expects import expect, equal
+from expects import expect, equal, have_key, have_keys, be_a
 from doublex_expects import have_been_called
 
-from pysellus import registrar
+from pysellus import registrar, integrations, sampling
 from pysellus.registrar import expect as expect_
 
 with description('the registrar module'):
@@ -16,6 +19,61 @@ with description('the registrar module'):
         for function in function_list:
             expect(function).to(have_been_called.once)
 
+    with it('should report how long registration took'):
+        registrar.register([Spy().a_function])
+
+        expect(registrar.registration_report).to(have_keys('setup_functions', 'testers', 'streams', 'seconds'))
+        expect(registrar.registration_report['setup_functions']).to(equal(1))
+
+    with it('should name tests after the setup function being registered'):
+        stream = Mock()
+
+        def a_setup_function():
+            expect_(stream)(lambda element: True)
+
+        registrar.register([a_setup_function])
+
+        expect(registrar.stream_to_testers[stream][0].args[0]).to(equal('a_setup_function'))
+
+    with it('should replace the testers of the given tests with the newly registered ones'):
+        stream = Mock()
+        another_stream = Mock()
+
+        def a_replaced_test():
+            expect_(stream)(lambda element: True)
+
+        def a_kept_test():
+            expect_(stream)(lambda element: True)
+
+        registrar.register([a_replaced_test, a_kept_test])
+        old_tester, kept_tester = registrar.stream_to_testers[stream]
+
+        def a_replaced_test():
+            expect_(another_stream)(lambda element: True)
+
+        removed_testers, added_testers = registrar.replace_tests(['a_replaced_test'], [a_replaced_test])
+
+        expect(removed_testers).to(equal([(stream, old_tester)]))
+        expect(added_testers).to(equal([(another_stream, registrar.stream_to_testers[another_stream][0])]))
+        expect(registrar.stream_to_testers[stream]).to(equal([kept_tester]))
+
+    with it('should not replace any tester if a setup function raises'):
+        stream = Mock()
+
+        def a_failing_test():
+            expect_(stream)(lambda element: True)
+            raise ValueError
+
+        registrar.register([lambda: expect_(stream)(lambda element: True)])
+        testers = list(registrar.stream_to_testers[stream])
+
+        try:
+            registrar.replace_tests(['<lambda>'], [a_failing_test])
+        except ValueError:
+            pass
+
+        expect(registrar.stream_to_testers[stream]).to(equal(testers))
+
     with it('should add a function list to the dictionary of streams to functions'):
         stream = Mock()
         function_list = [
@@ -51,3 +109,249 @@ with description('the registrar module'):
         expect(
             len(registrar.stream_to_testers[stream])
         ).to(equal(len(first_function_list + second_function_list)))
+
+    with context('wraps every tester so that'):
+        with before.each:
+            self.original_notify_element = integrations.notify_element
+            self.original_notify_error = integrations.notify_error
+            self.notified_elements = []
+            self.notified_errors = []
+            integrations.notify_element = lambda test_name, payload: self.notified_elements.append(payload)
+            integrations.notify_error = lambda test_name, payload: self.notified_errors.append(payload)
+
+        with after.each:
+            integrations.notify_element = self.original_notify_element
+            integrations.notify_error = self.original_notify_error
+
+        with it('passing elements are not notified'):
+            registrar._on_failure_wrapper('a_test', 'a test', 'a_tester', lambda element: True, 1)
+
+            expect(self.notified_elements).to(equal([]))
+            expect(self.notified_errors).to(equal([]))
+
+        with it('failing elements are notified along with the test description, function and tester name'):
+            registrar._on_failure_wrapper('a_test', 'a test', 'a_tester', lambda element: False, 1)
+
+            expect(dict(self.notified_elements[0])).to(equal({
+                'test_name': 'a test',
+                'expect_function': 'a_tester',
+                'element': 1,
+                'test_function': 'a_test'
+            }))
+
+        with it('errors raised by the tester are notified'):
+            def broken_tester(element):
+                raise ValueError
+
+            registrar._on_failure_wrapper('a_test', 'a test', 'broken_tester', broken_tester, 1)
+
+            expect(self.notified_errors[0]['error']).to(be_a(ValueError))
+
+        with it('async testers are awaited'):
+            async def a_failing_tester(element):
+                return False
+
+            asyncio.run(registrar._on_async_failure_wrapper('a_test', 'a test', 'a_failing_tester', a_failing_tester, 1))
+
+            expect(self.notified_elements[0]['element']).to(equal(1))
+
+        with it('elements not accepted by the sampler are skipped'):
+            checked_elements = []
+
+            def a_failing_tester(element):
+                checked_elements.append(element)
+                return False
+
+            sampler = sampling.Sampler(0.5, key=lambda element: element)
+            for element in range(100):
+                registrar._on_failure_wrapper('a_test', 'a test', 'a_failing_tester', a_failing_tester, element, sampler)
+
+            expect(checked_elements).to(equal([element for element in range(100) if sampler.accepts(element)]))
+
+        with it('sampled failures carry the sampling rate'):
+            sampler = sampling.Sampler(1.0)
+
+            registrar._on_failure_wrapper('a_test', 'a test', 'a_tester', lambda element: False, 1, sampler)
+
+            expect(self.notified_elements[0]['sampling_rate']).to(equal(1.0))
+
+    with context('when given a sampling rate'):
+        with before.each:
+            integrations.registered_integrations['a_test'] = {
+                'test_description': 'a test',
+                'sampler': sampling.Sampler(0.1)
+            }
+
+        with after.each:
+            del integrations.registered_integrations['a_test']
+
+        with it('should use the sampler of the test by default'):
+            stream = Mock()
+
+            def a_test():
+                expect_(stream)(Spy().a_tester)
+
+            a_test()
+
+            expect(registrar.stream_to_testers[stream][0].keywords['sampler'].rate).to(equal(0.1))
+
+        with it('should let `expect` override the sampling rate of the test'):
+            stream = Mock()
+
+            def a_test():
+                expect_(stream, sample=0.5, sample_key='user_id')(Spy().a_tester)
+                expect_(stream, sample=1)(Spy().another_tester)
+
+            a_test()
+
+            expect(registrar.stream_to_testers[stream][0].keywords['sampler'].rate).to(equal(0.5))
+            expect(registrar.stream_to_testers[stream][1].keywords).to(equal({}))
+
+    with context('when given a batch size'):
+        with before.each:
+            self.original_notify_element = integrations.notify_element
+            self.original_notify_error = integrations.notify_error
+            self.notified_elements = []
+            self.notified_errors = []
+            integrations.notify_element = lambda test_name, payload: self.notified_elements.append(payload)
+            integrations.notify_error = lambda test_name, payload: self.notified_errors.append(payload)
+            integrations.registered_integrations['a_test'] = {'test_description': 'a test'}
+
+        with after.each:
+            integrations.notify_element = self.original_notify_element
+            integrations.notify_error = self.original_notify_error
+            del integrations.registered_integrations['a_test']
+
+        with it('should register the testers against a single batched stream'):
+            stream = Observable.from_([1, 2, 3])
+
+            expect_(stream, batch=2)(Spy().first_function, Spy().second_function)
+
+            expect(registrar.stream_to_testers).to_not(have_key(stream))
+            expect(
+                len(registrar.stream_to_testers[registrar._get_batched_stream(stream, 2)])
+            ).to(equal(2))
+
+        with it('should register testers with another batch wait against another batched stream'):
+            stream = Observable.from_([1, 2, 3])
+
+            expect_(stream, batch=2, batch_wait=0.1)(Spy().a_function)
+
+            expect(registrar.stream_to_testers).to_not(have_key(registrar._get_batched_stream(stream, 2)))
+            expect(
+                len(registrar.stream_to_testers[registrar._get_batched_stream(stream, 2, 0.1)])
+            ).to(equal(1))
+
+        with it('should notify every failing element of a chunk'):
+            def is_positive(numbers):
+                return numbers > 0
+
+            registrar._on_batch_failure_wrapper('a_test', 'a test', 'is_positive', is_positive, [1, -2, 3, -4])
+
+            expect([payload['element'] for payload in self.notified_elements]).to(equal([-2, -4]))
+
+        with it('should notify an error with the whole chunk if the tester raises'):
+            def broken_tester(numbers):
+                raise ValueError
+
+            registrar._on_batch_failure_wrapper('a_test', 'a test', 'broken_tester', broken_tester, [1, 2])
+
+            expect(len(self.notified_errors)).to(equal(1))
+            expect(self.notified_errors[0]['element']).to(equal([1, 2]))
+            expect(self.notified_errors[0]['error']).to(be_a(ValueError))
+
+    with context('fuses the testers of a stream into a single function, which'):
+        with before.each:
+            self.original_notify_element = integrations.notify_element
+            self.original_notify_error = integrations.notify_error
+            self.notified_elements = []
+            self.notified_errors = []
+            integrations.notify_element = lambda test_name, payload: self.notified_elements.append((test_name, payload))
+            integrations.notify_error = lambda test_name, payload: self.notified_errors.append((test_name, payload))
+
+        with after.each:
+            integrations.notify_element = self.original_notify_element
+            integrations.notify_error = self.original_notify_error
+
+        with it('should notify failures and errors of every tester like their wrappers would'):
+            def is_positive(number):
+                return number > 0
+
+            def broken_tester(number):
+                raise ValueError
+
+            fused_testers = registrar.fuse_testers([
+                registrar._wrap_tester(registrar._on_failure_wrapper, 'a_test', 'a test', is_positive),
+                registrar._wrap_tester(registrar._on_failure_wrapper, 'another_test', 'another test', broken_tester)
+            ])
+
+            fused_testers(-1)
+
+            expect([(test_name, dict(payload)) for test_name, payload in self.notified_elements]).to(equal([
+                ('a_test', {
+                    'test_name': 'a test', 'expect_function': 'is_positive', 'element': -1, 'test_function': 'a_test'
+                })
+            ]))
+            expect(self.notified_errors[0][0]).to(equal('another_test'))
+            expect(self.notified_errors[0][1]['expect_function']).to(equal('broken_tester'))
+            expect(self.notified_errors[0][1]['error']).to(be_a(ValueError))
+
+        with it('should skip the elements the sampler of an inlined tester does not accept'):
+            def is_positive(number):
+                return number > 0
+
+            sampler = sampling.Sampler(0.5, key=lambda element: element)
+            fused_testers = registrar.fuse_testers([
+                registrar._wrap_tester(registrar._on_failure_wrapper, 'a_test', 'a test', is_positive, sampler)
+            ])
+
+            for element in range(-100, 0):
+                fused_testers(element)
+
+            expect([payload['element'] for _, payload in self.notified_elements]).to(equal([
+                element for element in range(-100, 0) if sampler.accepts(element)
+            ]))
+            expect({payload['sampling_rate'] for _, payload in self.notified_elements}).to(equal({0.5}))
+
+        with it('should notify elements lacking their sampling key as errors, without stopping the stream'):
+            checked_elements = []
+
+            def a_tester(element):
+                checked_elements.append(element)
+                return True
+
+            fused_testers = registrar.fuse_testers([
+                registrar._wrap_tester(
+                    registrar._on_failure_wrapper, 'a_test', 'a test', lambda element: True,
+                    sampling.Sampler(0.5, key='user_id')
+                ),
+                registrar._wrap_tester(registrar._on_failure_wrapper, 'another_test', 'another test', a_tester)
+            ])
+
+            Observable.from_([{'user_id': 1}, {}, {'user_id': 2}]).subscribe(fused_testers)
+
+            expect(checked_elements).to(equal([{'user_id': 1}, {}, {'user_id': 2}]))
+            expect([payload['element'] for _, payload in self.notified_errors]).to(equal([{}]))
+            expect(self.notified_errors[0][1]['error']).to(be_a(KeyError))
+
+        with it('should call any other tester through the given adapter'):
+            received_elements = []
+
+            fused_testers = registrar.fuse_testers(
+                [lambda element: received_elements.append(('tester', element))],
+                adapt=lambda tester: lambda element: received_elements.append(('adapted', element))
+            )
+            fused_testers(1)
+
+            expect(received_elements).to(equal([('adapted', 1)]))
+
+        with it('should split many testers across several functions, keeping their order'):
+            received_elements = []
+
+            def make_tester(index):
+                return lambda element: received_elements.append(index)
+
+            testers = [make_tester(index) for index in range(registrar.FUSED_TESTERS_PER_FUNCTION * 2 + 1)]
+            registrar.fuse_testers(testers)(1)
+
+            expect(received_elements).to(equal(list(range(len(testers)))))
@@ -0,0 +1,79 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+from doublex import Spy
+from expects import expect, be, be_true, be_false, equal, raise_error, contain
+from doublex_expects import have_been_called
+
+from pysellus.registries import LazyClassRegistry, LazyInstanceRegistry
+
+with description('the registries module'):
+    with description('has a lazy class registry, which'):
+        with it('should only import the module of a class when it is asked for'):
+            directory = tempfile.mkdtemp()
+            with open(os.path.join(directory, 'registries_spec_module.py'), 'w') as module_file:
+                module_file.write('class AClass:\n    pass\n')
+            sys.path.insert(0, directory)
+
+            registry = LazyClassRegistry({'a_class': 'registries_spec_module:AClass'})
+
+            expect('a_class' in registry).to(be_true)
+            expect('registries_spec_module' in sys.modules).to(be_false)
+
+            expect(registry['a_class'].__name__).to(equal('AClass'))
+            expect('registries_spec_module' in sys.modules).to(be_true)
+
+            sys.path.remove(directory)
+            sys.modules.pop('registries_spec_module')
+            shutil.rmtree(directory)
+
+        with it('should get classes defined later by calling their loader once'):
+            registry = LazyClassRegistry()
+            a_class = object
+            class_loader = Spy().class_loader
+            registry.define('a_class', lambda: class_loader() or a_class)
+
+            expect(registry['a_class']).to(be(a_class))
+            expect(registry['a_class']).to(be(a_class))
+            expect(class_loader).to(have_been_called.once)
+
+        with it('should raise a KeyError for unknown names'):
+            registry = LazyClassRegistry(entry_point_group='pysellus.spec.no_such_group')
+
+            expect('an_unknown_class' in registry).to(be_false)
+            expect(lambda: registry['an_unknown_class']).to(raise_error(KeyError))
+
+    with description('has a lazy instance registry, which'):
+        with it('should only build instances when they are asked for, and only once'):
+            registry = LazyInstanceRegistry()
+            factory = Spy().factory
+
+            registry.define('an_instance', factory)
+
+            expect('an_instance' in registry).to(be_true)
+            expect(factory).to_not(have_been_called)
+
+            registry['an_instance']
+            registry['an_instance']
+
+            expect(factory).to(have_been_called.once)
+
+        with it('should keep the definition if building the instance fails'):
+            registry = LazyInstanceRegistry()
+            registry.define('an_instance', lambda: 1 / 0)
+
+            expect(lambda: registry['an_instance']).to(raise_error(ZeroDivisionError))
+            expect('an_instance' in registry).to(be_true)
+
+    with it('should not import stock integrations on startup'):
+        imported_modules = subprocess.check_output([
+            sys.executable,
+            '-c',
+            'import sys, pysellus.core; print(" ".join(sys.modules))'
+        ]).decode().split()
+
+        expect(imported_modules).not_to(contain('pysellus.stock_integrations.slack'))
+        expect(imported_modules).not_to(contain('requests'))
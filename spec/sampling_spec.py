@@ -0,0 +1,57 @@
+from expects import expect, equal, be, be_none, be_a, raise_error
+
+from pysellus.sampling import make_sampler, Sampler
+
+with description('the sampling module'):
+    with context('exposes a `make_sampler` function which'):
+        with it('returns no sampler when every element should be checked'):
+            expect(make_sampler()).to(be_none)
+            expect(make_sampler(1)).to(be_none)
+
+        with it('returns a sampler with the given rate'):
+            sampler = make_sampler(0.5, 'user_id')
+
+            expect(sampler).to(be_a(Sampler))
+            expect(sampler.rate).to(equal(0.5))
+
+        with it('rejects rates outside of (0, 1]'):
+            expect(lambda: make_sampler(0)).to(raise_error(ValueError))
+            expect(lambda: make_sampler(1.5)).to(raise_error(ValueError))
+
+        with it('rejects a key without a rate'):
+            expect(lambda: make_sampler(key='user_id')).to(raise_error(ValueError))
+
+    with context('exposes a `Sampler` class which'):
+        with it('accepts roughly its rate of the elements at random'):
+            sampler = Sampler(0.25)
+
+            accepted = sum(1 for _ in range(10000) if sampler.accepts(None))
+
+            expect(2000 < accepted < 3000).to(be(True))
+
+        with it('accepts the same elements every time, given a key'):
+            sampler = Sampler(0.25, key=lambda element: element['user_id'])
+            elements = [{'user_id': number} for number in range(1000)]
+
+            accepted = [element['user_id'] for element in elements if sampler.accepts(element)]
+
+            expect(200 < len(accepted) < 300).to(be(True))
+            expect([element['user_id'] for element in elements if sampler.accepts(element)]).to(equal(accepted))
+
+        with it('accepts either all or none of the elements sharing a key'):
+            sampler = Sampler(0.5, key='user_id')
+
+            decisions = {sampler.accepts({'user_id': 'a user', 'value': value}) for value in range(100)}
+
+            expect(len(decisions)).to(equal(1))
+
+        with it('keeps the elements accepted at a lower rate when the rate grows'):
+            elements = [{'user_id': number} for number in range(1000)]
+            accepted_at_low_rate = {
+                element['user_id'] for element in elements if Sampler(0.1, key='user_id').accepts(element)
+            }
+            accepted_at_high_rate = {
+                element['user_id'] for element in elements if Sampler(0.5, key='user_id').accepts(element)
+            }
+
+            expect(accepted_at_low_rate <= accepted_at_high_rate).to(be(True))
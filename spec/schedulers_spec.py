@@ -0,0 +1,52 @@
+import threading
+
+from rx import Observable
+from rx.concurrency import current_thread_scheduler
+from expects import expect, equal, be_none
+
+from pysellus import schedulers
+
+with description('the schedulers module'):
+    with it('should let threads emit while another thread is blocked in its trampoline'):
+        blocked = threading.Event()
+        released = threading.Event()
+        received_elements = []
+
+        def a_blocking_source(observer):
+            blocked.set()
+            released.wait(2)
+            observer.on_completed()
+
+        subscribe = schedulers.with_own_trampoline(Observable.create(a_blocking_source).subscribe)
+        blocking_thread = threading.Thread(target=subscribe)
+        blocking_thread.start()
+        blocked.wait(2)
+
+        emitting_thread = threading.Thread(target=schedulers.with_own_trampoline(
+            lambda: Observable.from_([1, 2]).subscribe(received_elements.append)
+        ))
+        emitting_thread.start()
+        emitting_thread.join(1)
+        received_in_time = list(received_elements)
+        released.set()
+        blocking_thread.join()
+
+        expect(received_in_time).to(equal([1, 2]))
+
+    with it('should leave the shared trampoline to threads which do not own one'):
+        owning_thread = threading.Thread(target=schedulers.own_trampoline)
+        owning_thread.start()
+        owning_thread.join()
+        uses_shared_trampoline = []
+
+        def a_source(observer):
+            shared_trampoline = current_thread_scheduler.__dict__.get('queue')
+            uses_shared_trampoline.append(shared_trampoline is current_thread_scheduler.queue is not None)
+            observer.on_completed()
+
+        thread = threading.Thread(target=lambda: Observable.create(a_source).subscribe())
+        thread.start()
+        thread.join()
+
+        expect(uses_shared_trampoline).to(equal([True]))
+        expect(current_thread_scheduler.__dict__.get('queue')).to(be_none)
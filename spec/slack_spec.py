@@ -1,3 +1,5 @@
+from doublex import Spy
+from doublex_expects import have_been_called, have_been_called_with
 from expects import expect, be, have_key
 
 from pysellus.stock_integrations import slack, stock_integration_classes
@@ -42,11 +44,11 @@ with description('the slack integration module'):
         }
 
         slack_instance = slack.SlackIntegration(slack_url)
-        slack_instance._compose_on_next_message(slack_element)
+        payload = slack_instance._compose_on_next_message(slack_element)
 
-        expect(slack_instance._payload).to(have_key('attachments'))
+        expect(payload).to(have_key('attachments'))
 
-        pairs = zip(slack_instance._payload['attachments'], expected_payload['attachments'])
+        pairs = zip(payload['attachments'], expected_payload['attachments'])
 
         # For some reason, comparing directly the dictionaries didn't work
         expect(any(x != y for x, y in pairs)).to(be(False))
@@ -71,11 +73,31 @@ with description('the slack integration module'):
         }
 
         slack_instance = slack.SlackIntegration(slack_url)
-        slack_instance._compose_on_error_message(slack_element)
+        payload = slack_instance._compose_on_error_message(slack_element)
 
-        expect(slack_instance._payload).to(have_key('attachments'))
+        expect(payload).to(have_key('attachments'))
 
-        pairs = zip(slack_instance._payload['attachments'], expected_payload['attachments'])
+        pairs = zip(payload['attachments'], expected_payload['attachments'])
 
         # For some reason, comparing directly the dictionaries didn't work
         expect(any(x != y for x, y in pairs)).to(be(False))
+
+    with it('should post messages through its http client'):
+        http_client_spy = Spy()
+        slack_instance = slack.SlackIntegration('an_url', http_client=http_client_spy)
+
+        slack_instance.on_next({'test_name': 'some test'})
+
+        expect(http_client_spy.post).to(have_been_called.once)
+
+    with it('should build a separate payload for every message'):
+        http_client_spy = Spy()
+        slack_instance = slack.SlackIntegration('an_url', 'a_channel', http_client=http_client_spy)
+
+        slack_instance.on_next({'test_name': 'some test', 'suppressed': 3})
+        slack_instance.on_completed()
+
+        expect(http_client_spy.post).to(have_been_called_with('an_url', json={
+            'channel': 'a_channel',
+            'text': 'All tests run, out of data.\nAll done for now...'
+        }))
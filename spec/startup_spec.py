@@ -0,0 +1,44 @@
+from expects import expect, equal, contain
+
+from pysellus import startup, loader, integrations
+
+with description('the startup module'):
+    with before.each:
+        self.previous_phases = list(startup.phases)
+        self.previous_module_import_seconds = dict(loader.module_import_seconds)
+        self.previous_integration_build_seconds = dict(integrations.integration_build_seconds)
+        del startup.phases[:]
+
+    with after.each:
+        startup.phases[:] = self.previous_phases
+        loader.module_import_seconds.clear()
+        loader.module_import_seconds.update(self.previous_module_import_seconds)
+        integrations.integration_build_seconds.clear()
+        integrations.integration_build_seconds.update(self.previous_integration_build_seconds)
+
+    with it('should record how long every phase took, in order'):
+        with startup.phase('a phase'):
+            pass
+        with startup.phase('another phase'):
+            pass
+
+        expect([name for name, _ in startup.phases]).to(equal(['a phase', 'another phase']))
+
+    with it('should report the total time, and the slowest modules and integrations first'):
+        startup.phases[:] = [('a phase', 1.0), ('another phase', 0.5)]
+        loader.module_import_seconds.clear()
+        loader.module_import_seconds.update({'a_fast_module': 0.1, 'a_slow_module': 0.3, 'a_medium_module': 0.2})
+        integrations.integration_build_seconds.update({'a_spec_integration': 0.25})
+
+        report = startup.report(slowest_modules=2).split('\n')
+
+        expect(report).to(contain(
+            'Startup: 1.500s',
+            '  a phase: 1.000s',
+            '  0.250s  a_spec_integration'
+        ))
+        expect(report[report.index('Slowest test modules to import (2 of 3):') + 1:][:3]).to(equal([
+            '  0.300s  a_slow_module',
+            '  0.200s  a_medium_module',
+            ''
+        ]))
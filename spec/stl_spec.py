@@ -0,0 +1,101 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from rx.subjects import Subject
+from expects import expect, equal, raise_error, be_true, be_false
+
+from pysellus import stl, integrations
+
+A_TEST_CASE = """input = stream([0, 1, 2])
+
+@failure >> stl_spec_integration
+@check 'all numbers should be positive':
+    expect(input)(lambda number: number > 0)
+"""
+
+with description('the stl module'):
+    with context('transpiles STL to Python'):
+        with it('should turn test cases into decorated setup functions'):
+            expect(stl.transpile(A_TEST_CASE)).to(equal(
+                "input = stream([0, 1, 2])\n"
+                "\n"
+                "@_pscheck('all numbers should be positive', 'stl_spec_integration')\n"
+                "def pscheck_all_numbers_should_be_positive():\n"
+                "    expect(input)(lambda number: number > 0)\n"
+            ))
+
+        with it('should keep every line where it was'):
+            expect(stl.transpile(A_TEST_CASE).count('\n')).to(equal(A_TEST_CASE.count('\n')))
+
+        with it('should accept every way of notifying more than one integration'):
+            decorators = [
+                stl.transpile(failure_lines + "@check 'a test':\n    pass\n").split('\n')[0]
+                for failure_lines in [
+                    "@failure >> slack, terminal\n",
+                    "@failure >> slack >> terminal\n",
+                    "@failure >> slack\n@failure >> terminal\n"
+                ]
+            ]
+
+            for decorator in decorators:
+                expect(decorator).to(equal("@_pscheck('a test', 'slack', 'terminal')"))
+
+        with it('should give setup functions with the same description different names'):
+            python_source = stl.transpile(
+                "@failure >> terminal\n@check 'a test':\n    pass\n"
+                "@failure >> terminal\n@check 'a test':\n    pass\n"
+            )
+
+            expect(python_source.split('\n')[4]).to(equal('def pscheck_a_test_5():'))
+
+        with it('should reject a test case without a failure notification'):
+            expect(lambda: stl.transpile("@check 'a test':\n    pass\n")).to(raise_error(stl.STLSyntaxError))
+
+        with it('should reject a failure notification without a test case'):
+            expect(lambda: stl.transpile("@failure >> terminal\nx = 1\n")).to(raise_error(stl.STLSyntaxError))
+
+        with it('should reject test descriptions that are not strings'):
+            expect(lambda: stl.transpile("@failure >> terminal\n@check a_test:\n    pass\n")).to(
+                raise_error(stl.STLSyntaxError)
+            )
+
+    with context('imports STL files'):
+        with before.each:
+            self.directory = tempfile.mkdtemp()
+            self.path = os.path.join(self.directory, 'stl_spec_module.stl')
+            with open(self.path, 'w') as stl_file:
+                stl_file.write(A_TEST_CASE)
+
+            sys.path.insert(0, self.directory)
+            stl.install_import_hook()
+            integrations.integration_to_subject['stl_spec_integration'] = Subject()
+
+        with after.each:
+            sys.path.remove(self.directory)
+            sys.modules.pop('stl_spec_module', None)
+            shutil.rmtree(self.directory)
+            del integrations.integration_to_subject['stl_spec_integration']
+            integrations.registered_integrations.pop('pscheck_all_numbers_should_be_positive', None)
+
+        with it('should register their test cases'):
+            import stl_spec_module
+
+            test_case = integrations.registered_integrations['pscheck_all_numbers_should_be_positive']
+            expect(stl_spec_module.pscheck_all_numbers_should_be_positive.is_setup_function).to(be_true)
+            expect(test_case['test_description']).to(equal('all numbers should be positive'))
+            expect(test_case['integration_names']).to(equal(['stl_spec_integration']))
+
+        with it('should cache their compiled code until their contents change'):
+            expect(stl.has_stale_cache(self.path)).to(be_true)
+
+            stl.compile_file(self.path)
+            os.utime(self.path, ns=(10 ** 18, 10 ** 18))
+
+            expect(stl.has_stale_cache(self.path)).to(be_false)
+
+            with open(self.path, 'a') as stl_file:
+                stl_file.write('# changed\n')
+
+            expect(stl.has_stale_cache(self.path)).to(be_true)
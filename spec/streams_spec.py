@@ -0,0 +1,95 @@
+from rx import Observable
+from expects import expect, be, equal
+
+from pysellus.streams import stream, get_source, get_shared_source
+
+THRESHOLD = 5
+
+
+def is_even(number):
+    return number % 2 == 0
+
+
+with description('the streams module'):
+    with it('should turn iterables into streams of their elements'):
+        received_elements = []
+
+        stream([1, 2, 3]).subscribe(received_elements.append)
+
+        expect(received_elements).to(equal([1, 2, 3]))
+
+    with it('should turn observables into streams of their elements'):
+        received_elements = []
+
+        stream(Observable.from_([1, 2, 3])).map(lambda number: number * 2).subscribe(received_elements.append)
+
+        expect(received_elements).to(equal([2, 4, 6]))
+
+    with it('should return async sources as they are'):
+        async def an_async_source():
+            yield 1
+
+        expect(stream(an_async_source)).to(be(an_async_source))
+
+    with it('should give the same stream for the same source'):
+        an_observable = Observable.from_([1, 2, 3])
+
+        expect(stream(an_observable)).to(be(stream(an_observable)))
+        expect(stream(range(3))).to(be(stream(range(3))))
+
+    with it('should give the same stream for equivalent operator chains, wherever they are defined'):
+        a_stream = stream(range(10)).filter(lambda number: number > 2).map(is_even)
+        another_stream = stream(range(10)).filter(
+            lambda number: number > 2
+        ).map(is_even)
+
+        expect(a_stream).to(be(another_stream))
+        expect(get_source(a_stream)).to(be(stream(range(10))))
+
+    with it('should give different streams for operators closing over different values'):
+        def greater_than(threshold):
+            return lambda number: number > threshold
+
+        expect(stream(range(10)).filter(greater_than(2))).not_to(be(stream(range(10)).filter(greater_than(3))))
+        expect(stream(range(10)).filter(greater_than(2))).to(be(stream(range(10)).filter(greater_than(2))))
+
+    with it('should apply its operators to another upstream when rebased'):
+        received_elements = []
+
+        stream(range(10)).filter(lambda number: number > 7).rebase(
+            Observable.from_([5, 8, 9])
+        ).subscribe(received_elements.append)
+
+        expect(received_elements).to(equal([8, 9]))
+
+    with it('should give different streams for operators using different globals in nested code'):
+        def greater_than_threshold(number):
+            return any(number > THRESHOLD for _ in [0])
+
+        a_stream = stream(range(10)).filter(greater_than_threshold)
+        globals()['THRESHOLD'] = 8
+        try:
+            another_stream = stream(range(10)).filter(greater_than_threshold)
+        finally:
+            globals()['THRESHOLD'] = 5
+
+        expect(another_stream).not_to(be(a_stream))
+
+    with it('should rebase the streams given as arguments to its operators too'):
+        received_elements = []
+        numbers = stream(range(10))
+        odd = numbers.filter(lambda number: number % 2 == 1)
+
+        odd.merge(numbers.filter(lambda number: number % 2 == 0)).rebase(
+            Observable.from_([1, 2, 3])
+        ).subscribe(received_elements.append)
+
+        expect(sorted(received_elements)).to(equal([1, 2, 3]))
+
+    with it('should only share the source of streams combined with streams from the same source'):
+        numbers = stream(range(10))
+        other_numbers = stream(range(20))
+
+        expect(get_shared_source(numbers.merge(numbers.map(lambda number: -number)))).to(be(numbers))
+        expect(get_shared_source(numbers.merge(other_numbers))).to(be(None))
+        expect(get_shared_source(numbers.merge(Observable.from_([1])))).to(be(None))
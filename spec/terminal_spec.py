@@ -0,0 +1,67 @@
+import io
+
+from expects import expect, equal, contain, raise_error, be_below_or_equal
+
+from pysellus.payload import FailurePayload
+from pysellus.stock_integrations import terminal, stock_integration_classes
+
+with description('the terminal integration module'):
+    with before.each:
+        self.output = io.StringIO()
+
+    with it('should be in the integration classes dictionary'):
+        expect(stock_integration_classes['terminal']).to(equal(terminal.TerminalIntegration))
+
+    with it('should reject unknown modes'):
+        expect(lambda: terminal.TerminalIntegration(mode='bogus')).to(raise_error(ValueError))
+
+    with it('should print failures once its buffer is flushed'):
+        integration = terminal.TerminalIntegration(output=self.output)
+
+        integration.on_next(FailurePayload('a test', 'a_tester', {'a': 1}))
+
+        expect(self.output.getvalue()).to(equal(''))
+
+        integration.on_completed()
+
+        expect(self.output.getvalue()).to(equal(
+            "Assert error: in a test -> a_tester\nGot:\n{'a': 1}\nAll tests done.\n"
+        ))
+
+    with it('should write as soon as its buffer is full'):
+        integration = terminal.TerminalIntegration(output=self.output, buffer_size=1)
+
+        integration.on_error(FailurePayload('a test', 'a_tester', 1, error=ValueError('boom')))
+
+        expect(self.output.getvalue()).to(contain("Runtime Error: In a test -> a_tester"))
+        expect(self.output.getvalue()).to(contain("ValueError('boom')"))
+
+    with it('should truncate long elements'):
+        integration = terminal.TerminalIntegration(output=self.output, buffer_size=1, max_element_length=10)
+
+        integration.on_next(FailurePayload('a test', 'a_tester', 'x' * 100))
+
+        expect(len(self.output.getvalue().splitlines()[2])).to(be_below_or_equal(13))
+
+    with it('should only print failure counters in summary mode'):
+        integration = terminal.TerminalIntegration(mode='summary', output=self.output, flush_interval=60)
+
+        integration.on_next(FailurePayload('a test', 'a_tester', 1))
+        integration.on_next(FailurePayload('a test', 'a_tester', 2))
+        integration.on_error(FailurePayload('a test', 'a_tester', 3, error=ValueError()))
+        integration.on_completed()
+
+        expect(self.output.getvalue()).to(equal(
+            '--- Failures so far ---\na test -> a_tester: 2 failures, 1 errors\nAll tests done.\n'
+        ))
+
+    with it('should estimate the total failures of sampled checks in summary mode'):
+        integration = terminal.TerminalIntegration(mode='summary', output=self.output, flush_interval=60)
+
+        integration.on_next(FailurePayload('a test', 'a_tester', 1, sampling_rate=0.1))
+        integration.on_next(FailurePayload('a test', 'a_tester', 2, sampling_rate=0.1))
+        integration.on_completed()
+
+        expect(self.output.getvalue()).to(contain(
+            'a test -> a_tester: 2 failures, 0 errors (sampled at 10.00%, about 20 failures, 0 errors in total)\n'
+        ))
@@ -1,11 +1,23 @@
+import threading
 from queue import Queue
 from functools import partial
 
 from doublex import Spy, Mock
-from expects import expect, be
+from expects import expect, be, equal
 from doublex_expects import have_been_called
 
-from pysellus import threader
+from rx import Observable
+from rx.subjects import Subject
+
+from pysellus import threader, streams
+
+
+class AStoppableSource(Subject):
+    stopped = False
+
+    def stop(self):
+        self.stopped = True
+
 
 with description('the threader module'):
     with it('should create as many threads as streams in the supplied dict'):
@@ -95,3 +107,170 @@ with description('the threader module'):
 
         for stream in stream_to_testers.keys():
             expect(stream.subscribe).to(have_been_called.once)
+
+    with it('should run async sources and testers to completion'):
+        received_elements = []
+
+        async def a_source():
+            for element in [1, 2]:
+                yield element
+
+        async def a_tester(element):
+            received_elements.append(element)
+
+        threads = threader.build_threads({a_source: [a_tester]})
+        threader.launch_threads(threads)
+        for thread in threads:
+            thread.join()
+
+        expect(received_elements).to(equal([1, 2]))
+
+    with it('should create an extra thread per stream to drain its queue when given a queue size'):
+        stream_to_testers = {
+            Mock(): [Spy().a_tester],
+            Mock(): [Spy().another_tester]
+        }
+
+        threads = threader.build_threads(stream_to_testers, queue_size=10, queue_policy='drop-newest')
+
+        expect(len(threads)).to(be(2 * len(stream_to_testers)))
+        for stream in stream_to_testers:
+            expect(threader.stream_buffers[stream].policy).to(equal('drop-newest'))
+
+    with it('should subscribe once to a source shared by several streams'):
+        subscriptions = []
+        received_elements = []
+
+        def a_source(observer):
+            subscriptions.append(observer)
+            for number in range(5):
+                observer.on_next(number)
+            observer.on_completed()
+
+        source = streams.stream(Observable.create(a_source))
+        stream_to_testers = {
+            source.filter(lambda number: number % 2 == 0): [lambda element: received_elements.append(('even', element))],
+            source.map(lambda number: number * 10): [lambda element: received_elements.append(('times ten', element))]
+        }
+
+        threads = threader.build_threads(stream_to_testers)
+        threader.launch_threads(threads)
+        threader.join_threads(threads)
+
+        expect(len(threads)).to(equal(1))
+        expect(len(subscriptions)).to(equal(1))
+        expect([element for name, element in received_elements if name == 'even']).to(equal([0, 2, 4]))
+        expect([element for name, element in received_elements if name == 'times ten']).to(equal([0, 10, 20, 30, 40]))
+
+    with it('should subscribe to a shared source only from its own thread, even for merged streams'):
+        subscribing_threads = []
+        received_elements = []
+
+        def a_source(observer):
+            subscribing_threads.append(threading.current_thread())
+            for number in range(6):
+                observer.on_next(number)
+            observer.on_completed()
+
+        source = streams.stream(Observable.create(a_source))
+        odd = source.filter(lambda number: number % 2 == 1)
+        stream_to_testers = {
+            odd: [lambda element: received_elements.append(('odd', element))],
+            odd.merge(source.filter(lambda number: number % 2 == 0)): [
+                lambda element: received_elements.append(('all', element))
+            ]
+        }
+
+        threads = threader.build_threads(stream_to_testers)
+        expect(subscribing_threads).to(equal([]))
+        threader.launch_threads(threads)
+        threader.join_threads(threads)
+
+        expect(len(subscribing_threads)).to(equal(1))
+        expect([element for name, element in received_elements if name == 'odd']).to(equal([1, 3, 5]))
+        expect(sorted(element for name, element in received_elements if name == 'all')).to(equal(list(range(6))))
+
+    with context('while streams are running'):
+        with before.each:
+            self.stream = Subject()
+            self.received_elements = []
+            self.threads = threader.build_threads(
+                {self.stream: [lambda element: self.received_elements.append(('first', element))]},
+                thread_target=lambda stream, subject: stream.subscribe(subject)
+            )
+            threader.launch_threads(self.threads)
+            threader.join_threads(self.threads)
+
+        with it('should attach testers to a running stream without building new threads'):
+            threads = threader.attach_testers(
+                self.stream,
+                [lambda element: self.received_elements.append(('second', element))]
+            )
+            self.stream.on_next(1)
+
+            expect(threads).to(equal([]))
+            expect(self.received_elements).to(equal([('first', 1), ('second', 1)]))
+
+        with it('should detach testers, leaving the stream running'):
+            def a_tester(element):
+                self.received_elements.append(('second', element))
+
+            threader.attach_testers(self.stream, [a_tester])
+
+            threader.detach_testers([a_tester])
+            self.stream.on_next(1)
+
+            expect(self.received_elements).to(equal([('first', 1)]))
+
+        with it('should stop streams whose last tester is detached, and their source if it can be stopped'):
+            source = AStoppableSource()
+            stream = streams.stream(source).filter(lambda number: number > 0)
+
+            def a_tester(element):
+                self.received_elements.append(('stopped', element))
+
+            threads = threader.build_threads({stream: [a_tester]}, thread_target=lambda stream, subject: stream.subscribe(subject))
+            threader.launch_threads(threads)
+            threader.join_threads(threads)
+
+            threader.detach_testers([a_tester])
+            source.on_next(1)
+
+            expect(source.stopped).to(be(True))
+            expect(stream in threader.stream_subjects).to(be(False))
+            expect(self.received_elements).to(equal([]))
+
+        with it('should only stop a shared source once its last stream is stopped'):
+            source = AStoppableSource()
+            positive = streams.stream(source).filter(lambda number: number > 0)
+            negative = streams.stream(source).filter(lambda number: number < 0)
+
+            def a_positive_tester(element):
+                self.received_elements.append(('positive', element))
+
+            def a_negative_tester(element):
+                self.received_elements.append(('negative', element))
+
+            threads = threader.build_threads(
+                {positive: [a_positive_tester], negative: [a_negative_tester]},
+                thread_target=lambda stream, subject: stream.subscribe(subject)
+            )
+            threader.launch_threads(threads)
+            threader.join_threads(threads)
+
+            threader.detach_testers([a_positive_tester])
+            source.on_next(1)
+            source.on_next(-1)
+
+            expect(source.stopped).to(be(False))
+            expect(self.received_elements).to(equal([('negative', -1)]))
+
+            threader.detach_testers([a_negative_tester])
+
+            expect(source.stopped).to(be(True))
+            expect(streams.get_source(positive).key in threader.source_subjects).to(be(False))
+
+        with it('should build threads for testers attached to a stream that is not running'):
+            threads = threader.attach_testers(Mock(), [Spy().a_tester])
+
+            expect(len(threads)).to(equal(1))
@@ -0,0 +1,140 @@
+from expects import expect, equal, be_true, be_false
+
+from pysellus.payload import FailurePayload
+from pysellus.throttling import Throttle, TokenBucket, TTLKeyStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+with description('the throttling module'):
+    with before.each:
+        self.clock = FakeClock()
+
+    with context('exposes a `TokenBucket` class which'):
+        with it('allows bursts of up to the given size'):
+            bucket = TokenBucket(rate=1, burst=2, clock=self.clock)
+
+            expect([bucket.take(), bucket.take(), bucket.take()]).to(equal([True, True, False]))
+
+        with it('refills at the given rate'):
+            bucket = TokenBucket(rate=2, burst=1, clock=self.clock)
+            bucket.take()
+
+            self.clock.now = 0.5
+
+            expect(bucket.take()).to(be_true)
+            expect(bucket.take()).to(be_false)
+
+    with context('exposes a `TTLKeyStore` class which'):
+        with it('remembers keys until they expire'):
+            store = TTLKeyStore(ttl=10, max_keys=10, clock=self.clock)
+
+            expect(store.seen('a_key')).to(be_false)
+            expect(store.seen('a_key')).to(be_true)
+
+            self.clock.now = 10
+
+            expect(store.seen('a_key')).to(be_false)
+
+        with it('evicts the oldest keys once full'):
+            store = TTLKeyStore(ttl=10, max_keys=2, clock=self.clock)
+
+            for key in ['a', 'b', 'c']:
+                store.seen(key)
+
+            expect(len(store)).to(equal(2))
+            expect(store.seen('a')).to(be_false)
+
+    with context('exposes a `Throttle` class which'):
+        with before.each:
+            self.integrations = ['a_subject', 'another_subject']
+            self.integration_names = ['an_integration', 'another_integration']
+
+        with it('suppresses identical failures within the TTL'):
+            throttle = Throttle(dedup_ttl=10, clock=self.clock)
+            payload = FailurePayload('a test', 'a_tester', 1)
+
+            first_deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, payload)
+            second_deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, payload)
+
+            expect(len(first_deliveries)).to(equal(2))
+            expect(second_deliveries).to(equal([]))
+
+        with it('tells apart failures of unhashable elements'):
+            throttle = Throttle(dedup_ttl=10, clock=self.clock)
+
+            first_deliveries = throttle.deliveries(
+                'a_test', self.integration_names, self.integrations, FailurePayload('a test', 'a_tester', {'id': 1})
+            )
+            second_deliveries = throttle.deliveries(
+                'a_test', self.integration_names, self.integrations, FailurePayload('a test', 'a_tester', {'id': 2})
+            )
+            repeated_deliveries = throttle.deliveries(
+                'a_test', self.integration_names, self.integrations, FailurePayload('a test', 'a_tester', {'id': 2})
+            )
+
+            expect(len(first_deliveries)).to(equal(2))
+            expect(len(second_deliveries)).to(equal(2))
+            expect(repeated_deliveries).to(equal([]))
+
+        with it('rate-limits each integration separately'):
+            throttle = Throttle(rate=1, burst=1, clock=self.clock)
+
+            throttle.deliveries('a_test', self.integration_names[:1], self.integrations[:1], FailurePayload('t', 'f', 1))
+            deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 2))
+
+            expect([integration for integration, _ in deliveries]).to(equal(['another_subject']))
+
+        with it('rate-limits each integration across all tests'):
+            throttle = Throttle(integration_rate=1, integration_burst=1, clock=self.clock)
+
+            throttle.deliveries('a_test', self.integration_names[:1], self.integrations[:1], FailurePayload('t', 'f', 1))
+            deliveries = throttle.deliveries('another_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 2))
+
+            expect([integration for integration, _ in deliveries]).to(equal(['another_subject']))
+
+        with it('rate-limits each test across all its integrations'):
+            throttle = Throttle(test_rate=1, test_burst=1, clock=self.clock)
+
+            first_deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 1))
+            second_deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 2))
+            other_deliveries = throttle.deliveries('another_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 3))
+
+            expect(len(first_deliveries)).to(equal(2))
+            expect(second_deliveries).to(equal([]))
+            expect(len(other_deliveries)).to(equal(2))
+
+        with it('only takes tokens when every limit lets a notification through'):
+            throttle = Throttle(rate=1, burst=1, integration_rate=1, integration_burst=2, clock=self.clock)
+
+            throttle.deliveries('a_test', self.integration_names[:1], self.integrations[:1], FailurePayload('t', 'f', 1))
+            throttle.deliveries('a_test', self.integration_names[:1], self.integrations[:1], FailurePayload('t', 'f', 2))
+            deliveries = throttle.deliveries('another_test', self.integration_names[:1], self.integrations[:1], FailurePayload('t', 'f', 3))
+
+            expect([integration for integration, _ in deliveries]).to(equal(['a_subject']))
+
+        with it('only charges a test for failures that reach an integration'):
+            throttle = Throttle(rate=1, burst=1, test_rate=0.1, test_burst=2, clock=self.clock)
+
+            throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 1))
+            throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 2))
+            self.clock.now = 1
+            deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 3))
+
+            expect(len(deliveries)).to(equal(2))
+
+        with it('reports the suppressed count in the next payload that gets through'):
+            throttle = Throttle(rate=1, burst=1, clock=self.clock)
+            for element in range(3):
+                throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', element))
+
+            self.clock.now = 1
+            deliveries = throttle.deliveries('a_test', self.integration_names, self.integrations, FailurePayload('t', 'f', 3))
+
+            expect([payload['suppressed'] for _, payload in deliveries]).to(equal([2, 2]))
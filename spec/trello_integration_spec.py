@@ -335,6 +335,19 @@ with description('the Trello API object'):
             well_formed_url = 'https://trello.com/1/' + self.endpoint
             expect(self.http_client_spy.post).to(have_been_called_with(url=well_formed_url).once)
 
+        with it('posts to the given base url instead, if any'):
+            trello_api = trello.TrelloAPI(
+                key=self.some_api_key,
+                token=self.some_api_token,
+                http_client=self.http_client_spy,
+                base_url='http://127.0.0.1:8080/1/'
+            )
+
+            trello_api.post(self.endpoint, self.dummy_request_body)
+
+            well_formed_url = 'http://127.0.0.1:8080/1/' + self.endpoint
+            expect(self.http_client_spy.post).to(have_been_called_with(url=well_formed_url).once)
+
         with it('sends auth params passed in constructor as query parameters'):
             self.trello_api.post(self.endpoint, self.dummy_request_body)
 
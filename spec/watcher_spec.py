@@ -0,0 +1,108 @@
+import os
+import sys
+import types
+import shutil
+import tempfile
+
+from rx.subjects import Subject
+from expects import expect, equal
+
+from pysellus import loader, registrar, threader, watcher
+
+TEST_FILE_TEMPLATE = """
+from watcher_spec_streams import stream, received_elements
+from pysellus.registrar import expect
+
+
+def {name}():
+    expect(stream)(lambda element: received_elements.append(('{label}', element)) or True)
+
+
+{name}.is_setup_function = True
+"""
+
+
+def write_test_file(directory, filename, name, label, modification_time):
+    path = os.path.join(directory, filename)
+    with open(path, 'w') as test_file:
+        test_file.write(TEST_FILE_TEMPLATE.format(name=name, label=label))
+    os.utime(path, ns=(modification_time, modification_time))
+
+
+with description('the watcher module'):
+    with before.each:
+        self.directory = tempfile.mkdtemp()
+
+        self.streams_module = types.ModuleType('watcher_spec_streams')
+        self.streams_module.stream = Subject()
+        self.streams_module.received_elements = []
+        sys.modules['watcher_spec_streams'] = self.streams_module
+
+        registrar.stream_to_testers.clear()
+        threader.stream_subjects.clear()
+        threader.stream_testers.clear()
+        threader.stream_dispatchers.clear()
+
+        write_test_file(self.directory, 'watched_first.py', 'a_watched_test', 'first', 10 ** 18)
+        write_test_file(self.directory, 'watched_second.py', 'another_watched_test', 'second', 10 ** 18)
+
+        threads = threader.build_threads(
+            registrar.register(loader.load_test_files(self.directory)),
+            thread_target=lambda stream, subject: stream.subscribe(subject)
+        )
+        threader.launch_threads(threads)
+        threader.join_threads(threads)
+
+        self.watcher = watcher.Watcher(self.directory)
+
+    with after.each:
+        shutil.rmtree(self.directory)
+        sys.modules.pop('watcher_spec_streams', None)
+        for name in ['watched_first', 'watched_second', 'watched_third']:
+            sys.modules.pop('pysellus_suite.' + name, None)
+        registrar.stream_to_testers.clear()
+
+    with it('should replace the testers of changed files'):
+        write_test_file(self.directory, 'watched_first.py', 'a_watched_test', 'first, changed', 2 * 10 ** 18)
+
+        self.watcher.poll()
+        self.streams_module.stream.on_next(1)
+
+        expect(sorted(self.streams_module.received_elements)).to(equal([('first, changed', 1), ('second', 1)]))
+
+    with it('should leave unchanged files alone'):
+        tester = registrar.stream_to_testers[self.streams_module.stream][1]
+
+        write_test_file(self.directory, 'watched_first.py', 'a_watched_test', 'first, changed', 2 * 10 ** 18)
+        self.watcher.poll()
+
+        expect(registrar.stream_to_testers[self.streams_module.stream][0]).to(equal(tester))
+
+    with it('should attach the testers of new files'):
+        write_test_file(self.directory, 'watched_third.py', 'a_new_watched_test', 'third', 10 ** 18)
+
+        self.watcher.poll()
+        self.streams_module.stream.on_next(1)
+
+        expect(sorted(self.streams_module.received_elements)).to(equal([('first', 1), ('second', 1), ('third', 1)]))
+
+    with it('should detach the testers of deleted files'):
+        os.remove(os.path.join(self.directory, 'watched_first.py'))
+
+        self.watcher.poll()
+        self.streams_module.stream.on_next(1)
+
+        expect(self.streams_module.received_elements).to(equal([('second', 1)]))
+
+    with it('should keep the previous testers of files that can not be imported'):
+        path = os.path.join(self.directory, 'watched_first.py')
+        with open(path, 'w') as test_file:
+            test_file.write('def broken(:\n')
+        os.utime(path, ns=(2 * 10 ** 18, 2 * 10 ** 18))
+
+        watcher.logger.disabled = True
+        self.watcher.poll()
+        watcher.logger.disabled = False
+        self.streams_module.stream.on_next(1)
+
+        expect(sorted(self.streams_module.received_elements)).to(equal([('first', 1), ('second', 1)]))